@@ -0,0 +1,338 @@
+"""
+Headless batch runner.
+
+Searches every store for each query in a file (one per line, blank lines
+and # comments skipped) or stdin, and streams one row per (query, store)
+as JSON Lines or CSV:
+
+    python batch.py queries.txt -o results.jsonl
+    python batch.py queries.txt -o results.csv --concurrency 16 --per-store 2
+    cat queries.txt | python batch.py - --stores amazon.nl bol.com > results.jsonl
+
+Completed queries are appended to a checkpoint file (results.jsonl.checkpoint
+by default), so rerunning the same command after a crash skips them and
+appends to the existing output. A query's rows are written before it is
+checkpointed: after a crash the rows of at most the queries that were being
+written may appear twice, never zero times.
+
+Per-stage latencies (rate limit, connect, TTFB, download, parse, match,
+validate) can be written at the end as Prometheus text with --metrics, and
+each store search as OpenTelemetry-style spans (JSON Lines) with --traces.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Set, TextIO
+
+from config.stores import STORE_CONFIGS
+from scrapers.search_engine import STATUS_FOUND, STATUS_NOT_FOUND, STATUS_ERROR, STATUS_UNAVAILABLE
+from utils.circuit_breaker import CircuitOpenError
+from utils.metrics import get_metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENGINES = ('scrapers', 'factory')
+FIELDS = ['query', 'store', 'status', 'price', 'title', 'link', 'description', 'elapsed']
+
+
+def read_queries(lines: Iterable[str]) -> Iterator[str]:
+    """Queries from lines of text, without blank lines, comments and repeats (remembers every query read)."""
+    seen = set()
+    for line in lines:
+        query = line.strip()
+        if query and not query.startswith('#') and query not in seen:
+            seen.add(query)
+            yield query
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        """
+        Append-only record of the queries that were completed.
+
+        Each query is one JSON string per line, flushed and fsynced as soon
+        as it is marked; a line cut off by a crash is ignored on load. The
+        completed queries are also kept in memory, for the skip check.
+        """
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line))
+                    except ValueError:
+                        continue
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, query: str) -> bool:
+        return query in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def mark(self, query: str):
+        self.done.add(query)
+        self._file.write(json.dumps(query, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, row: Dict[str, Any]):
+        self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CsvWriter:
+    def __init__(self, stream: TextIO, write_header: bool = True):
+        self.stream = stream
+        self._writer = csv.DictWriter(stream, fieldnames=FIELDS, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+
+    def write(self, row: Dict[str, Any]):
+        self._writer.writerow(row)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class BatchRunner:
+    def __init__(self,
+                 search_functions: Dict[str, Callable[[str], Optional[Dict[str, Any]]]],
+                 concurrency: int = 8,
+                 per_store: Optional[Dict[str, int]] = None,
+                 max_open_queries: Optional[int] = None):
+        """
+        Runs many queries against many stores with bounded concurrency.
+
+        A single dispatcher (the thread calling run()) keeps a queue of
+        pending searches per store and only hands one to the worker pool
+        when both a global slot and one of that store's slots are free, so a
+        slow store never ties up workers that other stores could use. Queries
+        are read lazily and at most max_open_queries are in progress at once,
+        so searches and unwritten rows never pile up, however long the query
+        list. What does grow is one set entry per distinct query, in
+        read_queries() (repeats) and in the Checkpoint (completed queries).
+
+        Args:
+            search_functions: Mapping of store id to a function taking the query
+            concurrency: Searches in flight across all stores
+            per_store: Searches in flight per store id (default: 2)
+            max_open_queries: Queries in progress at once (default: 4 x concurrency)
+        """
+        self.search_functions = search_functions
+        self.concurrency = max(1, concurrency)
+        self.per_store = {store: max(1, (per_store or {}).get(store, 2)) for store in search_functions}
+        self.max_open_queries = max_open_queries or self.concurrency * 4
+
+    def _search(self, store: str, query: str, completed: Queue):
+        start = time.monotonic()
+        try:
+            result = self.search_functions[store](query)
+            status = STATUS_FOUND if result else STATUS_NOT_FOUND
+        except CircuitOpenError:
+            result, status = None, STATUS_UNAVAILABLE
+        except Exception as e:
+            logger.error(f"Error searching {store} for {query!r}: {str(e)}")
+            result, status = None, STATUS_ERROR
+        row = {'query': query, 'store': store, 'status': status}
+        for field in ('price', 'title', 'link', 'description'):
+            row[field] = (result or {}).get(field)
+        row['elapsed'] = round(time.monotonic() - start, 3)
+        completed.put(row)
+
+    def run(self, queries: Iterable[str], writer, checkpoint: Optional[Checkpoint] = None) -> Dict[str, int]:
+        """
+        Search every store for every query not yet in the checkpoint.
+
+        Rows of a query are written together once all its stores are done
+        (queries finish in completion order, not input order), after which
+        the query is checkpointed.
+
+        Returns:
+            Counters of queries run, skipped and rows per status
+        """
+        stores = list(self.search_functions)
+        pending = {store: deque() for store in stores}
+        in_flight = {store: 0 for store in stores}
+        open_queries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        completed: Queue = Queue()
+        counts = {
+            'queries': 0, 'skipped': 0, STATUS_FOUND: 0, STATUS_NOT_FOUND: 0, STATUS_ERROR: 0, STATUS_UNAVAILABLE: 0
+        }
+        queries = iter(queries)
+        exhausted = False
+        total_in_flight = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch-search')
+        try:
+            while True:
+                # Read queries until enough are in progress
+                while not exhausted and len(open_queries) < self.max_open_queries:
+                    query = next(queries, None)
+                    if query is None:
+                        exhausted = True
+                    elif (checkpoint is not None and query in checkpoint) or query in open_queries:
+                        counts['skipped'] += 1
+                    else:
+                        open_queries[query] = {}
+                        for store in stores:
+                            pending[store].append(query)
+
+                # Start searches wherever a global and a store slot are free
+                for store in stores:
+                    while pending[store] and in_flight[store] < self.per_store[store] \
+                            and total_in_flight < self.concurrency:
+                        executor.submit(self._search, store, pending[store].popleft(), completed)
+                        in_flight[store] += 1
+                        total_in_flight += 1
+
+                if not total_in_flight:
+                    break
+
+                row = completed.get()
+                in_flight[row['store']] -= 1
+                total_in_flight -= 1
+                counts[row['status']] += 1
+                rows = open_queries[row['query']]
+                rows[row['store']] = row
+                if len(rows) == len(stores):
+                    for store in stores:
+                        writer.write(rows[store])
+                    writer.flush()
+                    if checkpoint is not None:
+                        checkpoint.mark(row['query'])
+                    del open_queries[row['query']]
+                    counts['queries'] += 1
+                    if counts['queries'] % 100 == 0:
+                        logger.info(f"{counts['queries']} queries done")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return counts
+
+
+def search_functions_for(engine: str, store_ids: List[str],
+                         parse_workers: int = 0) -> Dict[str, Callable[[str], Optional[Dict[str, Any]]]]:
+    """Search function per store id, backed by StoreScrapers (optionally parsing in a process pool) or StoreFactory."""
+    if engine == 'factory':
+        from scrapers.store_factory import StoreFactory
+        factory = StoreFactory()
+        return {store_id: (lambda query, store_id=store_id: factory.search_store(store_id, query))
+                for store_id in store_ids}
+    from scrapers.store_scrapers import StoreScrapers
+    parse_pool = None
+    if parse_workers:
+        from utils.parse_pool import ParsePool
+        parse_pool = ParsePool(workers=parse_workers)
+    scrapers = StoreScrapers(parse_pool=parse_pool)
+    missing = [store_id for store_id in store_ids if store_id not in scrapers.store_configs]
+    if missing:
+        logger.warning(f"No search selectors configured for: {', '.join(missing)}")
+    return {store_id: (lambda query, store_id=store_id: scrapers.search(store_id, query))
+            for store_id in store_ids if store_id in scrapers.store_configs}
+
+
+def write_metrics(metrics_path: Optional[str], traces_path: Optional[str]):
+    """Write the shared registry's histograms and finished traces, if asked for."""
+    metrics = get_metrics()
+    if metrics_path:
+        with open(metrics_path, 'w', encoding='utf-8') as f:
+            f.write(metrics.prometheus())
+    if traces_path:
+        with open(traces_path, 'w', encoding='utf-8') as f:
+            for span in metrics.spans():
+                f.write(json.dumps(span) + '\n')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Search every store for each query in a file, without the GUI.')
+    parser.add_argument('queries', help="File with one query per line, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'),
+                        help='Output format (default: from the output extension, else jsonl)')
+    parser.add_argument('--stores', nargs='+', choices=sorted(STORE_CONFIGS), metavar='STORE',
+                        help=f"Store ids to search (default: all of {', '.join(STORE_CONFIGS)})")
+    parser.add_argument('--engine', choices=ENGINES, default='scrapers',
+                        help='StoreScrapers (config-driven) or StoreFactory (BaseScraper with result cache)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Searches in flight across all stores')
+    parser.add_argument('--per-store', type=int,
+                        help="Searches in flight per store (default: each store's max_concurrency)")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Parse pages in this many worker processes (scrapers engine; default: in the fetching threads)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint; none for stdout)')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and output')
+    parser.add_argument('--metrics', help='Write per-stage latency histograms to this file (Prometheus text format)')
+    parser.add_argument('--traces', help='Write the spans of each store search to this file (OpenTelemetry JSON Lines)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    store_ids = args.stores or list(STORE_CONFIGS)
+    output_format = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    checkpoint_path = args.checkpoint or (None if args.output == '-' else f"{args.output}.checkpoint")
+
+    if args.restart:
+        for path in (checkpoint_path, None if args.output == '-' else args.output):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    search_functions = search_functions_for(args.engine, store_ids, args.parse_workers)
+    per_store = {
+        store_id: args.per_store or STORE_CONFIGS[store_id].max_concurrency for store_id in search_functions
+    }
+    runner = BatchRunner(search_functions, concurrency=args.concurrency, per_store=per_store)
+
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+    if checkpoint is not None and len(checkpoint):
+        logger.info(f"Resuming: {len(checkpoint)} queries already done")
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8', newline='')
+    query_file = sys.stdin if args.queries == '-' else open(args.queries, encoding='utf-8')
+    try:
+        if output_format == 'csv':
+            writer = CsvWriter(output, write_header=output is sys.stdout or output.tell() == 0)
+        else:
+            writer = JsonLinesWriter(output)
+        start = time.monotonic()
+        counts = runner.run(read_queries(query_file), writer, checkpoint)
+        logger.info(
+            f"{counts['queries']} queries in {time.monotonic() - start:.1f}s ({counts['skipped']} skipped): "
+            f"{counts[STATUS_FOUND]} found, {counts[STATUS_NOT_FOUND]} not found, {counts[STATUS_ERROR]} errors, "
+            f"{counts[STATUS_UNAVAILABLE]} skipped while a store was unavailable"
+        )
+    except KeyboardInterrupt:
+        logger.warning('Interrupted; rerun the same command to resume')
+        return 130
+    finally:
+        if query_file is not sys.stdin:
+            query_file.close()
+        if output is not sys.stdout:
+            output.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        write_metrics(args.metrics, args.traces)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Title matching benchmark.
+
+Scores search queries against the product titles found in the parser
+fixtures, once per matching backend, and compares each backend with the
+pairwise difflib.SequenceMatcher implementation it replaces:
+
+    python -m benchmarks.bench_matching                  # 48..5000 titles per page
+    python -m benchmarks.bench_matching --titles 20000 --queries 3
+
+For every page size it reports the time to score one query against every
+title (including building the TF-IDF index, as a store search does per
+page), the time per query once the index is built, and how often the
+backend's top 5 contains the title difflib ranks best.
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_parsers import DEFAULT_FIXTURES  # noqa: E402
+from config.stores import STORE_CONFIGS  # noqa: E402
+from utils.extraction import build_extractor  # noqa: E402
+from utils.title_matcher import TitleMatcher, RAPIDFUZZ_AVAILABLE  # noqa: E402
+
+DEFAULT_SIZES = [48, 500, 5000]
+DEFAULT_QUERIES = [
+    'playstation 5 console',
+    'dualsense wireless controller',
+    'nintendo switch oled',
+    'xbox series x',
+    'ps5 slim digital edition',
+]
+
+# Fixture -> store config whose selectors extract its titles
+FIXTURE_STORES = {
+    'amazon': 'amazon.nl',
+    'bol': 'bol.com',
+    'mediamarkt': 'mediamarkt.nl',
+    'gamemania': 'gamemania.nl',
+}
+
+
+def load_titles() -> List[str]:
+    """Every product title in the store fixtures."""
+    titles = []
+    for fixture, store_id in FIXTURE_STORES.items():
+        extractor = build_extractor(STORE_CONFIGS[store_id].selectors)
+        with open(DEFAULT_FIXTURES[fixture], encoding='utf-8') as f:
+            products = extractor.products(f.read())
+        titles.extend(product['title'].strip() for product in products if product.get('title'))
+    return titles
+
+
+def make_corpus(titles: List[str], size: int) -> List[str]:
+    """Repeat the fixture titles up to `size`, numbering repeats so they are not identical."""
+    return [
+        titles[i % len(titles)] + (f" #{i // len(titles)}" if i >= len(titles) else '')
+        for i in range(size)
+    ]
+
+
+def base_title(title: str) -> str:
+    """A corpus title without its repeat number."""
+    return title.split(' #')[0]
+
+
+def timed(run: Callable[[], Any], repeat: int) -> float:
+    """Average milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_size(corpus: List[str], queries: List[str], backends: List[str]) -> Dict[str, Dict[str, float]]:
+    reference = TitleMatcher(corpus, backend='difflib')
+    best = {query: base_title(corpus[reference.top_k(query, k=1)[0][0]]) for query in queries}
+    repeat = max(1, 2000 // len(corpus))
+
+    results = {}
+    for backend in backends:
+        matcher = TitleMatcher(corpus, backend=backend)
+        build_and_score = timed(
+            lambda: [TitleMatcher(corpus, backend=backend).scores(query) for query in queries], repeat
+        ) / len(queries)
+        score_only = timed(lambda: [matcher.scores(query) for query in queries], repeat) / len(queries)
+        agreement = sum(
+            best[query] in [base_title(corpus[index]) for index, _ in matcher.top_k(query, k=5)] for query in queries
+        ) / len(queries)
+        results[backend] = {'build_and_score_ms': build_and_score, 'score_ms': score_only, 'top5_agreement': agreement}
+    return results
+
+
+def format_table(size: int, results: Dict[str, Dict[str, float]]) -> str:
+    reference = results['difflib']['build_and_score_ms']
+    lines = [f"{size} titles", f"{'backend':<12}{'ms/query':>10}{'indexed':>10}{'speedup':>9}{'top5 agrees':>13}"]
+    for backend, r in results.items():
+        speedup = reference / r['build_and_score_ms'] if r['build_and_score_ms'] else 0.0
+        lines.append(
+            f"{backend:<12}{r['build_and_score_ms']:>10.2f}{r['score_ms']:>10.2f}"
+            f"{speedup:>8.1f}x{r['top5_agreement']:>12.0%}"
+        )
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Compare title matching backends against difflib.')
+    parser.add_argument('--titles', type=int, action='append', metavar='N',
+                        help=f"Titles per page (default: {', '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--queries', type=int, default=len(DEFAULT_QUERIES), help='Number of queries to score')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    titles = load_titles()
+    queries = DEFAULT_QUERIES[:max(1, args.queries)]
+    backends = ['difflib', 'tfidf'] + (['rapidfuzz'] if RAPIDFUZZ_AVAILABLE else [])
+    for size in args.titles or DEFAULT_SIZES:
+        print(format_table(size, bench_size(make_corpus(titles, size), queries, backends)))
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Offline parser benchmarks.
+
+Replays saved search pages through every parser with the fetch layer
+stubbed out, so only HTML parsing and extraction are measured. For each
+parser it reports ms per page, products per second and peak memory of one
+parse (tracemalloc).
+
+    python -m benchmarks.bench_parsers                   # run and print
+    python -m benchmarks.bench_parsers --save-baseline   # record benchmarks/baseline.json
+    python -m benchmarks.bench_parsers --compare         # exit 1 on regression
+    python -m benchmarks.bench_parsers --fixture amazon=debug/amazon_search_x.html
+
+Fixtures default to amazon_response.html in the repo root and the synthetic
+pages in benchmarks/fixtures (regenerate with benchmarks/make_fixtures.py).
+Any saved page, e.g. one of the scrapers' debug/*.html dumps, can be swapped
+in with --fixture. Logging is disabled while measuring so that log I/O does
+not drown out parse cost. tracemalloc only sees memory allocated through
+Python, so the libxml2 tree built by the lxml extraction backend is not
+included in peak KiB.
+"""
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from scrapers.amazon_scraper import AmazonScraper  # noqa: E402
+from scrapers.hema_scraper import HemaScraper  # noqa: E402
+from scrapers.marktplaats_scraper import MarktplaatsScraper  # noqa: E402
+from scrapers.base.base_scraper import BaseScraper  # noqa: E402
+from scrapers.store_scrapers import StoreScrapers  # noqa: E402
+from config.stores import STORE_CONFIGS  # noqa: E402
+from utils.rate_limiter import RateLimiter  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_ITERATIONS = 10
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown / memory growth before a case fails
+
+DEFAULT_FIXTURES = {
+    'amazon': os.path.join(ROOT, 'amazon_response.html'),
+    'hema': os.path.join(FIXTURE_DIR, 'hema_search.html'),
+    'marktplaats': os.path.join(FIXTURE_DIR, 'marktplaats_search.html'),
+    'bol': os.path.join(FIXTURE_DIR, 'bol_search.html'),
+    'mediamarkt': os.path.join(FIXTURE_DIR, 'mediamarkt_search.html'),
+    'gamemania': os.path.join(FIXTURE_DIR, 'gamemania_search.html'),
+}
+
+QUERY = 'playstation 5'
+MAX_RESULTS = 10 ** 6  # Parse every product on the page
+
+
+class _FakeResponse:
+    """Just enough of httpx.Response for StoreScrapers (which reads the undecoded content)."""
+
+    def __init__(self, text: str, content: Optional[bytes] = None):
+        self.text = text
+        self.content = text.encode('utf-8') if content is None else content
+        self.encoding = 'utf-8'
+        self.status_code = 200
+
+
+class _FakeStream:
+    """Just enough of SyncStream; the body arrives in socket-sized chunks."""
+    chunk_size = 64 * 1024
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.status_code = 200
+        self.encoding = 'utf-8'
+
+    def raise_for_status(self):
+        pass
+
+    def iter_bytes(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+class _FakeHttp:
+    """Stands in for the shared HTTP client; every GET returns the fixture."""
+
+    def __init__(self, html: str, pages: Optional[int] = None, body: Optional[bytes] = None):
+        self.html = html
+        self.body = body
+        self.pages = pages  # Streamed pages with products; later pages are empty
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        if self.body is None:
+            self.body = self.html.encode('utf-8')
+        return _FakeResponse(self.html, self.body)
+
+    @contextmanager
+    def stream(self, method, url, **kwargs):
+        self.calls += 1
+        empty = self.pages is not None and self.calls > self.pages
+        if self.body is None:
+            self.body = self.html.encode('utf-8')
+        yield _FakeStream(b'' if empty else self.body)
+
+
+def _replay_pages(scraper, html: str, body: Optional[bytes] = None):
+    """Make the scraper's fetch return the fixture once, then no more pages."""
+    scraper.http = _FakeHttp(html, pages=1, body=body)
+
+
+def _scraper_case(factory: Callable[..., Any], store_id: str, max_results: int = MAX_RESULTS,
+                  **search_kwargs) -> Callable[[str], Tuple[int, int]]:
+    # Every iteration fetches the fixture; the store's token bucket would only add sleeps
+    scraper = factory(replace(STORE_CONFIGS[store_id], rate_limit=0), RateLimiter())
+    encoded: Dict[int, bytes] = {}
+
+    def run(html: str) -> Tuple[int, int]:
+        key = id(html)
+        if key not in encoded:
+            encoded[key] = html.encode('utf-8')
+        _replay_pages(scraper, html, encoded[key])
+        # _search skips the result cache, otherwise every iteration after the first is a hit
+        results = scraper._search(QUERY, max_results=max_results, **search_kwargs)
+        return 1, len(results)
+    return run
+
+
+def _parse_product_case() -> Callable[[str], Tuple[int, int]]:
+    scraper = BaseScraper(STORE_CONFIGS['amazon.nl'], http_client=_FakeHttp(''))
+
+    def run(html: str) -> Tuple[int, int]:
+        containers = scraper.extractor.containers(scraper.extractor.parse(html))
+        parsed = [scraper.parse_product(element) for element in containers]
+        products = sum(1 for product in parsed if product)
+        if not products:
+            raise RuntimeError('parse_product extracted no products; the selectors do not match the fixture')
+        return 1, products
+    return run
+
+
+def _store_scrapers_case(store_id: str) -> Callable[[str], Tuple[int, int]]:
+    """
+    StoreScrapers.search returns only the best match, so throughput is
+    counted in the candidates its parser extracted from the page rather
+    than in results.
+    """
+    # Without a rate limit interval the replays do not wait for tokens
+    configs = {store_id: replace(STORE_CONFIGS[store_id], rate_limit=0)}
+    scrapers = StoreScrapers(http_client=_FakeHttp(''), store_configs=configs, rate_limiter=RateLimiter())
+    pages: List[int] = []
+    parse_page = scrapers._candidates
+
+    def candidates(*args):
+        page = parse_page(*args)
+        pages.append(len(page))
+        return page
+    scrapers._candidates = candidates
+
+    def run(html: str) -> Tuple[int, int]:
+        scrapers.http = _FakeHttp(html)
+        pages.clear()
+        output = io.StringIO()  # StoreScrapers reports errors with print() and returns None
+        with redirect_stdout(output):
+            result = scrapers.search(store_id, QUERY)
+        if result is None:
+            raise RuntimeError(f"{store_id} found no result: {output.getvalue().strip() or 'no output'}")
+        return len(pages), sum(pages)
+    return run
+
+
+# name -> (fixture, builder)
+CASES: Dict[str, Tuple[str, Callable[[], Callable[[str], Tuple[int, int]]]]] = {
+    'amazon_scraper': ('amazon', lambda: _scraper_case(AmazonScraper, 'amazon.nl')),
+    # Streaming parse stops reading the page once max_results products were extracted
+    'amazon_scraper.first5': ('amazon', lambda: _scraper_case(AmazonScraper, 'amazon.nl', max_results=5)),
+    'hema_scraper': ('hema', lambda: _scraper_case(HemaScraper, 'hema.nl')),
+    'marktplaats_scraper': ('marktplaats', lambda: _scraper_case(MarktplaatsScraper, 'marktplaats.nl')),
+    'base_parse_product': ('amazon', _parse_product_case),
+    'store_scrapers.bol': ('bol', lambda: _store_scrapers_case('bol.com')),
+    'store_scrapers.amazon': ('amazon', lambda: _store_scrapers_case('amazon.nl')),
+    'store_scrapers.mediamarkt': ('mediamarkt', lambda: _store_scrapers_case('mediamarkt.nl')),
+    'store_scrapers.gamemania': ('gamemania', lambda: _store_scrapers_case('gamemania.nl')),
+}
+
+
+def measure(run: Callable[[str], Tuple[int, int]], html: str, iterations: int) -> Dict[str, Any]:
+    """
+    Time `iterations` replays of one fixture, then measure one more under tracemalloc.
+
+    Returns:
+        Dictionary with ms_per_page, products_per_sec, peak_kb, pages and products
+    """
+    pages, products = run(html)  # Warm-up (imports, selector caches)
+
+    total_pages = 0
+    total_products = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        p, n = run(html)
+        total_pages += p
+        total_products += n
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        run(html)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ms_per_page': elapsed * 1000 / total_pages if total_pages else 0.0,
+        'products_per_sec': total_products / elapsed if elapsed else 0.0,
+        'peak_kb': peak / 1024,
+        'pages': pages,
+        'products': products,
+    }
+
+
+def run_benchmarks(fixtures: Dict[str, str],
+                   iterations: int = DEFAULT_ITERATIONS,
+                   only: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run every case (or just `only`) and return its measurements by name."""
+    html_cache: Dict[str, str] = {}
+    results = {}
+    previous_level = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        for name, (fixture, build) in CASES.items():
+            if only and name not in only:
+                continue
+            path = fixtures[fixture]
+            if fixture not in html_cache:
+                with open(path, encoding='utf-8') as f:
+                    html_cache[fixture] = f.read()
+            try:
+                result = measure(build(), html_cache[fixture], iterations)
+            except Exception as e:
+                # A case whose parser fails must not pass as a fast one
+                result = {'error': f"{type(e).__name__}: {e}"}
+            result['fixture'] = os.path.relpath(path, ROOT)
+            results[name] = result
+    finally:
+        logging.disable(previous_level)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Compare a run against a baseline.
+
+    A case regresses when it fails, is more than `tolerance` slower per
+    page, uses more than `tolerance` extra peak memory, or extracts a
+    different number of products from the same fixture.
+
+    Returns:
+        One message per regression (empty when everything is within bounds)
+    """
+    failures = []
+    for name, result in results.items():
+        if 'error' in result:
+            failures.append(f"{name}: failed with {result['error']}")
+            continue
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['products'] != base['products']:
+            failures.append(f"{name}: extracted {result['products']} products, baseline {base['products']}")
+        if base['ms_per_page'] and result['ms_per_page'] > base['ms_per_page'] * (1 + tolerance):
+            failures.append(
+                f"{name}: {result['ms_per_page']:.2f} ms/page, baseline {base['ms_per_page']:.2f} ms/page"
+            )
+        if base['peak_kb'] and result['peak_kb'] > base['peak_kb'] * (1 + tolerance):
+            failures.append(f"{name}: peak {result['peak_kb']:.0f} KiB, baseline {base['peak_kb']:.0f} KiB")
+    return failures
+
+
+def format_table(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    lines = [f"{'case':<28}{'ms/page':>10}{'products/s':>12}{'peak KiB':>10}{'products':>10}{'vs base':>9}"]
+    for name, r in results.items():
+        if 'error' in r:
+            lines.append(f"{name:<28}FAILED {r['error']}")
+            continue
+        change = ''
+        base = (baseline or {}).get(name)
+        if base and base['ms_per_page']:
+            change = f"{(r['ms_per_page'] / base['ms_per_page'] - 1) * 100:+.0f}%"
+        lines.append(
+            f"{name:<28}{r['ms_per_page']:>10.2f}{r['products_per_sec']:>12.0f}"
+            f"{r['peak_kb']:>10.0f}{r['products']:>10}{change:>9}"
+        )
+    return '\n'.join(lines)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['cases']
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]], iterations: int):
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'iterations': iterations,
+        'cases': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay saved search pages through the parsers.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Timed replays per case')
+    parser.add_argument('--fixture', action='append', default=[], metavar='NAME=PATH',
+                        help=f"Replace a fixture ({', '.join(DEFAULT_FIXTURES)})")
+    parser.add_argument('--only', action='append', metavar='CASE', help=f"Run only this case ({', '.join(CASES)})")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--compare', action='store_true', help='Exit with status 1 if a case regressed')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative slowdown / memory growth (default 0.25)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    fixtures = dict(DEFAULT_FIXTURES)
+    for override in args.fixture:
+        name, _, path = override.partition('=')
+        if name not in fixtures or not path:
+            print(f"Unknown fixture override: {override}", file=sys.stderr)
+            return 2
+        fixtures[name] = path
+
+    results = run_benchmarks(fixtures, args.iterations, args.only)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        baseline = load_baseline(args.baseline)
+    print(format_table(results, baseline))
+
+    errors = [name for name, result in results.items() if 'error' in result]
+    if args.save_baseline and errors:
+        print(f"Not saving a baseline with failed cases: {', '.join(errors)}", file=sys.stderr)
+        return 1
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args.iterations)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+            return 2
+        failures = compare(results, baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            return 1
+        print("No regressions")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Price parsing microbenchmark.
+
+Parses the price texts found in the parser fixtures with utils.price_parser,
+one text at a time and a page at a time (parse_many), and with the
+per-scraper code it replaced (strip everything but digits, then divide by
+100 or not), and reports how often the old code got the price wrong:
+
+    python -m benchmarks.bench_prices                  # 48..50000 prices per page
+    python -m benchmarks.bench_prices --prices 100000
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench_parsers import DEFAULT_FIXTURES  # noqa: E402
+from scrapers import amazon_scraper, hema_scraper, marktplaats_scraper  # noqa: E402
+from config.stores import STORE_CONFIGS  # noqa: E402
+from utils.extraction import build_extractor  # noqa: E402
+from utils.price_parser import NO_PRICE, parse_many, parse_price_cents  # noqa: E402
+
+DEFAULT_SIZES = [48, 5000, 50000]
+
+# Fixture -> (extractor, price format the scraper parses it with)
+FIXTURE_PRICES = {
+    'amazon': (amazon_scraper.SEARCH_EXTRACTOR, 'auto'),
+    'hema': (hema_scraper.SEARCH_EXTRACTOR, 'cents'),
+    'marktplaats': (marktplaats_scraper.SEARCH_EXTRACTOR, 'eu'),
+    'bol': (build_extractor(STORE_CONFIGS['bol.com'].selectors), STORE_CONFIGS['bol.com'].price_format),
+    'gamemania': (build_extractor(STORE_CONFIGS['gamemania.nl'].selectors), STORE_CONFIGS['gamemania.nl'].price_format),
+}
+
+
+def load_price_texts() -> Dict[str, Tuple[str, List[str]]]:
+    """Every price text in the store fixtures, with the format it is parsed in."""
+    texts = {}
+    for fixture, (extractor, price_format) in FIXTURE_PRICES.items():
+        with open(DEFAULT_FIXTURES[fixture], encoding='utf-8') as f:
+            products = extractor.products(f.read())
+        texts[fixture] = (price_format, [product['price'].strip() for product in products if product.get('price')])
+    return texts
+
+
+def legacy_cents(text: str, price_format: str):
+    """What the scrapers did before: keep the digits, and treat them as cents or as euros."""
+    digits = re.sub(r'\D', '', text.replace(',', '.'))
+    if not digits:
+        return None
+    return int(digits) if price_format == 'cents' else int(digits) * 100
+
+
+def timed(run: Callable[[], object], repeat: int) -> float:
+    """Average milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_size(corpus: List[Tuple[str, str]], size: int) -> Dict[str, float]:
+    page = [corpus[i % len(corpus)] for i in range(size)]
+    by_format: Dict[str, List[str]] = {}
+    for price_format, text in page:
+        by_format.setdefault(price_format, []).append(text)
+    repeat = max(1, 20000 // size)
+
+    results = {
+        'legacy_ms': timed(lambda: [legacy_cents(text, price_format) for price_format, text in page], repeat),
+        'parse_ms': timed(lambda: [parse_price_cents(text, price_format) for price_format, text in page], repeat),
+        'parse_many_ms': timed(
+            lambda: [parse_many(texts, price_format) for price_format, texts in by_format.items()], repeat
+        ),
+    }
+    expected = [parse_price_cents(text, price_format) for price_format, text in page]
+    bulk = {price_format: iter(parse_many(texts, price_format)) for price_format, texts in by_format.items()}
+    assert [None if (cents := next(bulk[price_format])) == NO_PRICE else cents for price_format, _ in page] == expected
+    results['legacy_wrong'] = sum(
+        legacy_cents(text, price_format) != cents for (price_format, text), cents in zip(page, expected)
+    ) / size
+    return results
+
+
+def format_table(size: int, results: Dict[str, float]) -> str:
+    per_price = 1000000 / size  # ms per page -> ns per price
+    return (
+        f"{size} prices: legacy {results['legacy_ms'] * per_price:.0f} ns/price "
+        f"({results['legacy_wrong']:.0%} wrong), parse_price_cents {results['parse_ms'] * per_price:.0f} ns/price, "
+        f"parse_many {results['parse_many_ms'] * per_price:.0f} ns/price"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark price parsing on the fixture price texts.')
+    parser.add_argument('--prices', type=int, action='append', metavar='N',
+                        help=f"Prices per page (default: {', '.join(map(str, DEFAULT_SIZES))})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    corpus = [
+        (price_format, text) for price_format, texts in load_price_texts().values() for text in texts
+    ]
+    for size in args.prices or DEFAULT_SIZES:
+        print(format_table(size, bench_size(corpus, size)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
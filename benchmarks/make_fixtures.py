@@ -0,0 +1,144 @@
+"""
+Generate the synthetic search-result fixtures used by the parser benchmarks.
+
+Only Amazon has a real saved page (amazon_response.html in the repo root).
+For the other stores this writes deterministic pages that follow the markup
+each scraper's selectors expect, padded with navigation and script noise so
+parse cost is in the same range as a real results page. Re-running it
+produces byte-identical files.
+
+    python -m benchmarks.make_fixtures
+"""
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+PRODUCTS_PER_PAGE = 48
+
+TITLES = [
+    'PlayStation 5 Console Disc Edition', 'PlayStation 5 Digital Edition Slim',
+    'DualSense Wireless Controller Midnight Black', 'Xbox Series X 1TB Console',
+    'Xbox Wireless Controller Carbon Black', 'Nintendo Switch OLED Model White',
+    'Nintendo Switch Lite Turquoise', 'Pro Controller for Nintendo Switch',
+    'EA Sports FC 25 PS5', 'The Legend of Zelda: Tears of the Kingdom',
+    'Finger Trainer Hand Grip Set', 'Apple iPad 10.9 inch 64GB Wi-Fi',
+    'PS5 Charging Station Dual', 'Gaming Headset with Microphone',
+]
+
+
+def _noise(rng: random.Random, blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        parts.append(
+            f'<div class="nav-block nav-{i}"><ul>'
+            + ''.join(f'<li><a href="/c/{i}-{j}">Categorie {i}.{j}</a></li>' for j in range(12))
+            + '</ul></div>'
+        )
+        parts.append(f'<script>window.__state_{i} = {{"id": {rng.randint(1, 10**9)}, "flags": [1, 2, 3]}};</script>')
+    return '\n'.join(parts)
+
+
+def _page(rng: random.Random, body: str) -> str:
+    return (
+        '<!doctype html><html lang="nl"><head><meta charset="utf-8"><title>Zoekresultaten</title></head><body>\n'
+        + _noise(rng, 40) + '\n<main>\n' + body + '\n</main>\n' + _noise(rng, 40)
+        + '\n</body></html>\n'
+    )
+
+
+def _products(rng: random.Random):
+    for i in range(PRODUCTS_PER_PAGE):
+        title = f"{TITLES[i % len(TITLES)]} - variant {i}"
+        euros = rng.randint(5, 700)
+        cents = rng.choice([0, 49, 95, 99])
+        yield i, title, euros, cents
+
+
+def hema(rng: random.Random) -> str:
+    items = []
+    for i, title, euros, cents in _products(rng):
+        items.append(f'''<article class="product-tile">
+  <a class="product-tile__link" href="/product/{i}">
+    <img class="product-tile__image" src="https://www.hema.nl/img/{i}.jpg">
+    <h3 class="product-tile__title">{title}</h3>
+  </a>
+  <span class="product-tile__price">€ {euros},{cents:02d}</span>
+  <div class="product-tile__description">Handig product voor dagelijks gebruik, nummer {i}.</div>
+  <div class="product-tile__article-number">{60000000 + i}</div>
+  <div class="product-tile__availability">{'niet online verkrijgbaar' if i % 7 == 0 else 'online verkrijgbaar'}</div>
+</article>''')
+    return _page(rng, '\n'.join(items))
+
+
+def marktplaats(rng: random.Random) -> str:
+    items = []
+    for i, title, euros, cents in _products(rng):
+        price = 'Bieden' if i % 9 == 0 else f'€ {euros},{cents:02d}'
+        items.append(f'''<article data-test="advertisement-item" class="mp-Listing">
+  <a class="mp-Listing-coverLink" href="/v/spelcomputers/{i}">
+    <img class="mp-Listing-image" src="https://images.marktplaats.com/{i}.jpg">
+  </a>
+  <h3 class="mp-Listing-title">{title}</h3>
+  <p class="mp-Listing-description">Zo goed als nieuw, ophalen of verzenden. Advertentie {i}.</p>
+  <span class="mp-Listing-price">{price}</span>
+  <span class="mp-Listing-location">Utrecht</span>
+  <span class="mp-Listing-seller">verkoper{i}</span>
+  <span class="mp-Listing-attributes">Zo goed als nieuw</span>
+</article>''')
+    return _page(rng, '\n'.join(items))
+
+
+def bol(rng: random.Random) -> str:
+    items = []
+    for i, title, euros, cents in _products(rng):
+        items.append(f'''<li class="product-item--row">
+  <a class="product-title" href="/nl/nl/p/{i}/">{title}</a>
+  <p class="product-description">Gratis verzending, morgen in huis. Artikel {i}.</p>
+  <span class="promo-price">{euros},{cents:02d}</span>
+</li>''')
+    return _page(rng, '<ul class="product-list">\n' + '\n'.join(items) + '\n</ul>')
+
+
+def mediamarkt(rng: random.Random) -> str:
+    items = []
+    for i, title, euros, cents in _products(rng):
+        items.append(f'''<div class="product-wrapper">
+  <a href="/nl/product/_{i}.html"><img src="https://assets.mmsrg.com/{i}.jpg"></a>
+  <div class="content">{title}</div>
+  <div class="price-box">€ {euros},{cents:02d}</div>
+</div>''')
+    return _page(rng, '\n'.join(items))
+
+
+def gamemania(rng: random.Random) -> str:
+    items = []
+    for i, title, euros, cents in _products(rng):
+        items.append(f'''<div class="product-item">
+  <a class="product-link" href="/product/{i}">
+    <h3 class="product-title">{title}</h3>
+  </a>
+  <span class="price">€ {euros},{cents:02d}</span>
+</div>''')
+    return _page(rng, '\n'.join(items))
+
+
+FIXTURES = {
+    'hema_search.html': hema,
+    'marktplaats_search.html': marktplaats,
+    'bol_search.html': bol,
+    'mediamarkt_search.html': mediamarkt,
+    'gamemania_search.html': gamemania,
+}
+
+
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, build in FIXTURES.items():
+        path = os.path.join(FIXTURE_DIR, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(build(random.Random(name)))
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from typing import List
+
+@dataclass
+class PriceRule:
+    category: str
+    keywords: List[str]  # Lowercase words or phrases that put a product in this category (matched anywhere in the text)
+    min_price: float  # Plausible price range in euros, inclusive
+    max_price: float
+
+# Price ranges per product category. A product falls in the first rule with one of
+# its keywords in the text ('PS5 game' is a PS5 by this order); without any it is
+# an accessory.
+PRICE_RULES = [
+    PriceRule('ps5', ['ps5', 'playstation 5'], 350, 800),
+    PriceRule('xbox', ['xbox'], 350, 800),
+    PriceRule('switch', ['switch', 'nintendo'], 250, 500),
+    PriceRule('console', ['console', 'playstation'], 100, 1000),
+    PriceRule('game', ['game', 'spel', 'software'], 10, 100),
+]
+
+DEFAULT_PRICE_RULE = PriceRule('accessory', [], 5, 200)
+
+# A listing is a price outlier when its modified z-score (distance from the median in
+# scaled median absolute deviations) against the other plausible prices exceeds this
+OUTLIER_THRESHOLD = 3.5
+OUTLIER_MIN_PRICES = 5  # Fewer plausible prices than this are not checked for outliers
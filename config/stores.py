@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 import os
 
 @dataclass
@@ -7,11 +7,22 @@ class StoreConfig:
     name: str
     base_url: str
     search_url: str
-    selectors: Dict[str, str]
-    custom_headers: Optional[Dict[str, str]] = None
+    selectors: Dict[str, Union[str, List[str]]]  # 'container' plus one selector (or list of fallbacks) per field
+    custom_headers: Optional[Dict[str, str]] = None  # HTTP headers sent with every request to this store
+    api_credentials: Optional[Dict[str, Optional[str]]] = None  # Keys for the store's API; never sent as headers
     custom_processing: Optional[Any] = None
     requires_ssl_verify: bool = True
-    rate_limit: float = 0.5
+    rate_limit: float = 0.5  # Seconds between requests to this host
+    burst: int = 1  # Requests allowed back-to-back after the host has been idle
+    max_connections: int = 10  # Pooled keep-alive connections to this host
+    max_concurrency: int = 4  # Requests to this store in flight at once
+    cache_ttl: float = 300.0  # Seconds a cached search page is served without revalidation; 0 disables
+    pagination: Optional[Dict[str, Any]] = None  # {'param': 'page', 'start': 1, 'max_pages': 3}; None fetches one page
+    price_format: str = 'eu'  # 'eu' (1.299,99), 'us' (1,299.99), 'cents' (129999) or 'auto' (see utils.price_parser)
+    requires_js: bool = False  # Render the search page in a pooled headless browser instead of fetching it
+    skip_keywords: Optional[List[str]] = None  # Skip products whose 'skip' selector text contains one of these
+    warm_up: bool = False  # Visit the homepage once per session before searching; the cookies are cached
+    hedge: bool = True  # Send a second copy of a GET still unanswered after the store's p95 latency; the first response wins
 
 # Common selectors used across stores
 COMMON_SELECTORS = {
@@ -28,23 +39,106 @@ STORE_CONFIGS = {
         name='Amazon',
         base_url='https://www.amazon.nl',
         search_url='https://www.amazon.nl/s?k={query}&language=en',
-        selectors={},  # Not needed for API
+        selectors={
+            # One pass in document order over every kind of result card
+            'container': 'div.s-result-item, div.s-card-container, div[data-component-type="s-search-result"]',
+            'title': [
+                'span.a-text-normal', 'h2.a-size-mini', 'h2.a-size-base', 'h2.a-size-medium',
+                'h2.a-size-large', 'h2.a-size-small', 'h2.a-size-base-plus', 'h2.a-size-medium-plus'
+            ],
+            'price': [
+                'span.a-price-whole', 'span.a-price', 'span.a-offscreen', 'span.a-color-price', 'span.a-price-nowrap',
+                # Lowest price from multiple sellers, then the price in the product details
+                'div[class="a-row a-size-base a-color-secondary"]',
+                'div[class="a-section a-spacing-none a-spacing-top-micro"]'
+            ],
+            'link': 'a.a-link-normal',
+            'skip': 'span.a-color-secondary'
+        },
         custom_headers={
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3.1 Safari/605.1.15'
+        },
+        api_credentials={
             'AWS_ACCESS_KEY': os.getenv('AMAZON_ACCESS_KEY'),
             'AWS_SECRET_KEY': os.getenv('AMAZON_SECRET_KEY'),
-            'ASSOCIATE_TAG': os.getenv('AMAZON_ASSOCIATE_TAG'),
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3.1 Safari/605.1.15'
+            'ASSOCIATE_TAG': os.getenv('AMAZON_ASSOCIATE_TAG')
         },
         requires_ssl_verify=True,
-        rate_limit=1.0  # API has its own rate limits
+        rate_limit=1.0,  # API has its own rate limits
+        price_format='us',  # The search URL asks for English pages: '€1,299.00', and '429.' in the whole-euro span
+        skip_keywords=['sponsored', 'gesponsord'],
+        warm_up=True,
+        hedge=False  # Duplicate requests look like a bot
+    ),
+    'hema.nl': StoreConfig(
+        name='HEMA',
+        base_url='https://www.hema.nl',
+        search_url='https://www.hema.nl/search?q={query}&lang=nl_NL',
+        selectors={
+            'container': 'article.product-tile',
+            'title': 'h3.product-tile__title',
+            'price': 'span.product-tile__price',
+            'link': 'a.product-tile__link',
+            'description': 'div.product-tile__description'
+        },
+        rate_limit=2.0,
+        price_format='cents'  # '4999' for €49.99
+    ),
+    'marktplaats.nl': StoreConfig(
+        name='Marktplaats',
+        base_url='https://www.marktplaats.nl',
+        search_url='https://www.marktplaats.nl/q/{query}/',
+        selectors={
+            'container': 'article[data-test="advertisement-item"]',
+            'title': 'h3.mp-Listing-title',
+            'price': 'span.mp-Listing-price',
+            'link': 'a.mp-Listing-coverLink',
+            'description': 'p.mp-Listing-description'
+        },
+        rate_limit=2.0
+    ),
+    'bol.com': StoreConfig(
+        name='Bol.com',
+        base_url='https://www.bol.com',
+        search_url='https://www.bol.com/nl/nl/s/?searchtext={query}',
+        selectors={
+            'container': 'li.product-item--row',
+            'title': 'a.product-title',
+            'price': 'span.promo-price',
+            'link': 'a.product-title',
+            'description': 'p.product-description'
+        }
+    ),
+    'mediamarkt.nl': StoreConfig(
+        name='MediaMarkt.nl',
+        base_url='https://www.mediamarkt.nl',
+        search_url='https://www.mediamarkt.nl/zoeken.html?query={query}',
+        selectors={
+            'container': 'div.product-wrapper',
+            'title': 'div.content',
+            'price': 'div.price-box',
+            'link': 'a'
+        }
+    ),
+    'gamemania.nl': StoreConfig(
+        name='Game Mania',
+        base_url='https://www.gamemania.nl',
+        search_url='https://www.gamemania.nl/zoeken?q={query}',
+        selectors={
+            'container': 'div.product-item',
+            'title': 'h3.product-title',
+            'price': 'span.price',
+            'link': 'a.product-link'
+        },
+        requires_ssl_verify=False
     )
 }
 
 # Store categories
 STORE_CATEGORIES = {
-    'electronics': ['amazon.nl'],
-    'gaming': ['amazon.nl'],
-    'general': ['amazon.nl']
+    'electronics': ['amazon.nl', 'bol.com', 'mediamarkt.nl'],
+    'gaming': ['amazon.nl', 'bol.com', 'mediamarkt.nl', 'gamemania.nl'],
+    'general': ['amazon.nl', 'bol.com']
 }
 
 # Common headers used across stores
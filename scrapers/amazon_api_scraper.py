@@ -2,6 +2,7 @@ import logging
 from typing import Dict, List, Optional, Any
 from amazon.api import AmazonAPI
 from config.stores import STORE_CONFIGS
+from utils.product import Product, to_cents
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,9 +19,10 @@ class AmazonAPIScraper:
         self.store_config = store_config
         
         # Get API credentials from environment variables
-        self.access_key = store_config.custom_headers.get('AWS_ACCESS_KEY')
-        self.secret_key = store_config.custom_headers.get('AWS_SECRET_KEY')
-        self.associate_tag = store_config.custom_headers.get('ASSOCIATE_TAG')
+        credentials = store_config.api_credentials or {}
+        self.access_key = credentials.get('AWS_ACCESS_KEY')
+        self.secret_key = credentials.get('AWS_SECRET_KEY')
+        self.associate_tag = credentials.get('ASSOCIATE_TAG')
         
         if not all([self.access_key, self.secret_key, self.associate_tag]):
             raise ValueError("Missing required Amazon API credentials")
@@ -74,13 +76,13 @@ class AmazonAPIScraper:
                     logger.warning(f"Invalid price format: {price}")
                     return None
                 
-                result = {
-                    'title': product.title,
-                    'price': f"{price:.2f}",
-                    'link': product.offer_url,
-                    'description': product.get('EditorialReview', {}).get('Content', ''),
-                    'store': self.store_config.name
-                }
+                result = Product(
+                    store=self.store_config.name,
+                    title=product.title,
+                    price_cents=to_cents(price),
+                    link=product.offer_url,
+                    description=product.get('EditorialReview', {}).get('Content', '')
+                )
                 
                 logger.info(f"Found product: {result}")
                 return result
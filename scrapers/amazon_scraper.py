@@ -1,20 +1,49 @@
 import logging
 import time
-import random
-from typing import Dict, List, Optional, Any, Tuple
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+import httpx
 from urllib.parse import quote, urlencode
-import os
+
+from config.stores import STORE_CONFIGS
+from utils.http_client import get_http_client
+from utils.rate_limiter import get_rate_limiter
+from utils.result_cache import get_result_cache, make_key
+from utils.extraction import Extractor, Field
+from utils.debug_capture import get_debug_capture
+from utils.metrics import STAGE_RATE_LIMIT, get_metrics
+from utils.product import Product, ProductBatch, to_cents
+from utils.price_parser import parse_price
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Search result selectors, compiled once; each field lists its fallbacks in order
+SEARCH_EXTRACTOR = Extractor(
+    containers=['div[data-component-type="s-search-result"]', '.s-result-item'],
+    fields={
+        'title': ['h2 a span', '.a-text-normal'],
+        'price': ['span.a-price-whole', '.a-price .a-offscreen'],
+        'link': Field('h2 a', '.a-link-normal', attr='href'),
+        'description': ['div.a-section.a-spacing-small', '.a-color-secondary'],
+        'image': Field('img.s-image', '.s-image', attr='src'),
+        'rating': Field('i.a-icon-star-small', '.a-icon-star', raw=True)
+    }
+)
+
 class AmazonScraper:
-    def __init__(self):
-        """Initialize the Amazon scraper with proper headers."""
-        self.session = requests.Session()
+    def __init__(self, store_config=None, rate_limiter=None):
+        """
+        Initialize the Amazon scraper with proper headers.
+
+        Args:
+            store_config: StoreConfig the requests belong to (default: STORE_CONFIGS['amazon.nl'])
+            rate_limiter: Per-store token buckets (default: the shared limiter)
+        """
+        self.store_config = store_config or STORE_CONFIGS['amazon.nl']
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.http = get_http_client()
+        self.result_cache = get_result_cache()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -24,64 +53,74 @@ class AmazonScraper:
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0'
         }
-        self.session.headers.update(self.headers)
         
-        # Create debug directory
-        self.debug_dir = 'debug'
-        if not os.path.exists(self.debug_dir):
-            os.makedirs(self.debug_dir)
-            logger.info(f"Created debug directory: {self.debug_dir}")
+        # Pages that yield no products are saved in the background (see utils.debug_capture)
+        self.debug_capture = get_debug_capture()
+        
+        # Per-stage latency of each search (see utils.metrics)
+        self.metrics = get_metrics()
+
+    def _rate_limit(self):
+        """Wait for the store's token bucket."""
+        waited = self.rate_limiter.acquire(self.store_config)
+        self.metrics.observe(STAGE_RATE_LIMIT, self.store_config.name, waited)
 
-    def _random_sleep(self, min_seconds: float = 1.0, max_seconds: float = 3.0):
-        """Add random delay between requests to avoid detection."""
-        time.sleep(random.uniform(min_seconds, max_seconds))
+    def _stream_containers(self, url: str) -> Iterator[Any]:
+        """
+        Yield product containers while the page is still downloading.
 
-    def _make_request(self, url: str) -> Optional[str]:
-        """Make a request with retry logic and error handling."""
+        Closing the generator (or breaking out of the loop over it) stops
+        reading the response. Connection failures are retried with
+        exponential backoff as long as no container has been yielded yet.
+        """
         max_retries = 3
         for attempt in range(max_retries):
+            started = False
             try:
-                self._random_sleep()
+                self._rate_limit()
                 logger.info(f"Making request to: {url}")
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
-                
-                # Save HTML response for debugging
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                debug_file = os.path.join(self.debug_dir, f'amazon_response_{timestamp}.html')
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                logger.info(f"Saved HTML response to {debug_file}")
-                
-                # Log response details
-                logger.info(f"Response status code: {response.status_code}")
-                logger.info(f"Response headers: {dict(response.headers)}")
-                
-                return response.text
-            except requests.RequestException as e:
+                # Without an explicit timeout the client adapts one to the store's observed latency
+                with self.http.stream('GET', url, store_config=self.store_config, headers=self.headers,
+                                      rate_limiter=self.rate_limiter) as response:
+                    response.raise_for_status()
+                    logger.info(f"Response status code: {response.status_code}")
+                    recorder = self.debug_capture.recorder(self.store_config.name, url)
+                    timer = self.metrics.stream_timer(self.store_config.name)
+                    chunks = timer.wrap(recorder.tee(response.iter_bytes()))
+                    try:
+                        for container in SEARCH_EXTRACTOR.iter_containers(chunks, response.encoding):
+                            if not started:
+                                started = True
+                                recorder.succeeded()
+                            yield container
+                    finally:
+                        # Also runs when the caller stops early; only sampled pages are then kept
+                        timer.finish()
+                        recorder.finish(failed=not started, reason='no products')
+                return
+            except httpx.HTTPError as e:
                 logger.error(f"Request failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
+                if started:
+                    return
                 if attempt < max_retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-        return None
 
     def _extract_price(self, price_text: str) -> Optional[float]:
         """Extract numeric price from text."""
         try:
-            # Remove currency symbols and convert to float
-            price = ''.join(filter(str.isdigit, price_text.replace(',', '.')))
-            return float(price)
+            # English pages (see _build_search_url): the whole-euro span reads '1,299.' and the full price '€1,299.00'
+            return parse_price(price_text, self.store_config.price_format)
         except (ValueError, AttributeError):
             return None
 
     def _extract_rating(self, rating_elem) -> Tuple[Optional[float], Optional[int]]:
         """Extract rating and review count."""
         try:
-            if not rating_elem:
+            if rating_elem is None:
                 return None, None
                 
             # Get rating text (e.g., "4.6 van 5 sterren")
-            rating_text = rating_elem.text.strip()
+            rating_text = SEARCH_EXTRACTOR.text(rating_elem).strip()
             if not rating_text:
                 return None, None
                 
@@ -90,7 +129,7 @@ class AmazonScraper:
             
             # Extract review count
             review_count = 0
-            review_text = rating_elem.find_next_sibling(text=True)
+            review_text = SEARCH_EXTRACTOR.next_text(rating_elem)
             if review_text:
                 review_count = int(''.join(filter(str.isdigit, review_text)))
                 
@@ -122,7 +161,8 @@ class AmazonScraper:
         """Build Amazon search URL with parameters."""
         params = {
             'k': query,
-            'page': page
+            'page': page,
+            'language': 'en'  # The pages of the store config's search_url, with prices in its price_format
         }
         
         # Add sorting parameter
@@ -168,51 +208,46 @@ class AmazonScraper:
         Returns:
             List of dictionaries containing product information
         """
+        key = make_key(
+            'amazon.nl', query,
+            max_results=max_results, sort_by=sort_by, min_price=min_price, max_price=max_price
+        )
+        with self.metrics.trace(self.store_config.name, query):
+            return self.result_cache.get_or_compute(
+                key,
+                lambda: self._search(query, max_results, sort_by, min_price, max_price)
+            )
+
+    def _search(self, 
+               query: str, 
+               max_results: int = 20,
+               sort_by: str = None,
+               min_price: float = None,
+               max_price: float = None) -> List[Dict[str, Any]]:
+        """Run the search against Amazon, bypassing the result cache."""
         try:
-            results = []
+            results = ProductBatch()
             page = 1
             
             while len(results) < max_results and page <= 5:  # Limit to 5 pages to avoid too many requests
                 url = self._build_search_url(query, page, sort_by, min_price, max_price)
                 logger.info(f"Searching Amazon for: {query} (page {page})")
                 
-                html = self._make_request(url)
-                if not html:
-                    logger.error("Failed to get HTML response")
-                    break
-                    
-                soup = BeautifulSoup(html, 'lxml')
-                
-                # Log page title and other metadata
-                logger.info(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-                
-                # Look for all product containers
-                products = soup.select('div[data-component-type="s-search-result"]') or soup.select('.s-result-item')
-                logger.info(f"Found {len(products)} product containers on page {page}")
-                
-                if not products:
-                    logger.error("No products found on page")
-                    break
-
-                for product in products:
-                    if len(results) >= max_results:
-                        break
+                containers = self._stream_containers(url)
+                found = 0
+                for product in containers:
+                    found += 1
                         
                     try:
                         # Extract product information with updated selectors
-                        title_elem = product.select_one('h2 a span') or product.select_one('.a-text-normal')
-                        price_elem = product.select_one('span.a-price-whole') or product.select_one('.a-price .a-offscreen')
-                        link_elem = product.select_one('h2 a') or product.select_one('.a-link-normal')
-                        description_elem = product.select_one('div.a-section.a-spacing-small') or product.select_one('.a-color-secondary')
-                        image_elem = product.select_one('img.s-image') or product.select_one('.s-image')
-                        rating_elem = product.select_one('i.a-icon-star-small') or product.select_one('.a-icon-star')
+                        fields = SEARCH_EXTRACTOR.extract(product)
                         
-                        if not all([title_elem, price_elem, link_elem]):
+                        if fields['title'] is None or fields['price'] is None or not fields['link']:
                             logger.warning("Missing required product elements")
                             continue
                         
                         # Extract and validate price
-                        price = self._extract_price(price_elem.text)
+                        price = self._extract_price(fields['price'])
                         if not price:
                             logger.warning("Failed to extract price")
                             continue
@@ -224,40 +259,53 @@ class AmazonScraper:
                             continue
 
                         # Get rating information
-                        rating, review_count = self._extract_rating(rating_elem)
+                        rating, review_count = self._extract_rating(fields['rating'])
                         
                         # Get image URL and convert to high resolution
-                        image_url = image_elem.get('src') if image_elem else None
+                        image_url = fields['image']
                         high_res_image = self._get_high_res_image(image_url)
                         
                         # Construct result
-                        result = {
-                            'title': title_elem.text.strip(),
-                            'price': f"{price:.2f}",
-                            'link': f"https://www.amazon.nl{link_elem['href']}" if link_elem.get('href', '').startswith('/') else link_elem['href'],
-                            'description': self._clean_description(description_elem.text if description_elem else ''),
-                            'store': 'Amazon',
-                            'image_url': image_url,
-                            'high_res_image_url': high_res_image,
-                            'rating': rating,
-                            'review_count': review_count
-                        }
+                        result = Product(
+                            store='Amazon',
+                            title=fields['title'].strip(),
+                            price_cents=to_cents(price),
+                            link=f"https://www.amazon.nl{fields['link']}" if fields['link'].startswith('/') else fields['link'],
+                            description=self._clean_description(fields['description'] or ''),
+                            image_url=image_url,
+                            extra={
+                                'high_res_image_url': high_res_image,
+                                'rating': rating,
+                                'review_count': review_count
+                            }
+                        )
                         
                         results.append(result)
-                        logger.info(f"Added product: {result['title']} - €{result['price']}")
+                        logger.info(f"Added product: {result.title} - {result.display_price}")
                         
                     except Exception as e:
                         logger.error(f"Error processing product: {str(e)}")
                         continue
+                    
+                    if len(results) >= max_results:
+                        break
+                
+                # Stop downloading the rest of the page once enough products were found
+                containers.close()
+                logger.info(f"Parsed {found} product containers on page {page}")
+                
+                if not found:
+                    logger.error("No products found on page")
+                    break
                 
                 page += 1
             
             # Sort results if needed
             if sort_by:
                 if sort_by == 'price_low_to_high':
-                    results.sort(key=lambda x: float(x['price']))
+                    results.sort()
                 elif sort_by == 'price_high_to_low':
-                    results.sort(key=lambda x: float(x['price']), reverse=True)
+                    results.sort(reverse=True)
                 elif sort_by == 'rating' and all(x['rating'] for x in results):
                     results.sort(key=lambda x: x['rating'], reverse=True)
             
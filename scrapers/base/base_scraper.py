@@ -1,125 +1,206 @@
-import requests
-from bs4 import BeautifulSoup
-import time
-import re
+import httpx
 from urllib.parse import quote
-from difflib import SequenceMatcher
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 import logging
 
+from utils.http_client import RETRY_STATUSES, get_http_client
+from utils.rate_limiter import RateLimiter
+from utils.debug_capture import get_debug_capture
+from utils.metrics import STAGE_VALIDATE, get_metrics
+from utils.circuit_breaker import CircuitBreaker, get_circuit_breaker, is_failure_status
+from utils.product import Product
+from utils.price_parser import parse_price_cents
+from utils.price_rules import PriceRules, get_price_rules
+from utils.session_warmer import SessionWarmer, BLOCKED_BODY, BLOCKED_STATUSES, cookie_header, get_session_warmer
+from utils.extraction import Extractor, build_extractor
+from utils.title_matcher import match_scores
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _BlockSniffer:
+    """Passes response chunks through while watching for an anti-bot page."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = chunks
+        self.blocked = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.chunks:
+            if not self.blocked and BLOCKED_BODY.search(chunk):
+                self.blocked = True
+            yield chunk
+
+
 class BaseScraper:
-    def __init__(self, store_config):
+    def __init__(self, store_config, http_client=None, session_warmer: Optional[SessionWarmer] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, price_rules: Optional[PriceRules] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         self.store_config = store_config
-        self.session = requests.Session()
         
-        # Initialize cookies
-        self.session.cookies.clear()
+        # Shared connection pool (also pauses the host's rate limiter on 429)
+        self.http = http_client or get_http_client()
+        
+        # Limiter paused by 429 Retry-After (default: the HTTP client's, which is the shared limiter)
+        self.rate_limiter = rate_limiter
+        
+        # Pages that yield no products are saved in the background (see utils.debug_capture)
+        self.debug_capture = get_debug_capture()
+        
+        # Per-stage latency of each search (see utils.metrics)
+        self.metrics = get_metrics()
+        
+        # Health shared by every scraper of this store; failing stores are skipped (see utils.circuit_breaker)
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker()
+        
+        # Plausible price range per product category (see config.price_rules)
+        self.price_rules = price_rules or get_price_rules()
+        
+        # Stores with StoreConfig.warm_up share one warmed session (default: the shared, disk-backed warmer)
+        self._session_warmer = session_warmer
         
         # Set default headers
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3.1 Safari/605.1.15',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9,nl;q=0.8',
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive'
-        })
+        }
         
         # Update with store-specific headers
         if self.store_config.custom_headers:
-            self.session.headers.update(self.store_config.custom_headers)
+            self.headers.update(self.store_config.custom_headers)
         
-        # Configure session with retry strategy
-        retry_strategy = requests.adapters.Retry(
-            total=3,  # number of retries
-            backoff_factor=1,  # wait 1, 2, 4 seconds between retries
-            status_forcelist=[429, 500, 502, 503, 504],  # HTTP status codes to retry on
-        )
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        # Retry 5xx responses 3 times, waiting 1, 2, 4 seconds (429 is left to the rate limiter)
+        self.max_retries = 3
+        
+        # Compile the store's selectors once for every page this scraper parses
+        self.extractor = self._build_extractor()
 
-    def _init_session(self, url: str):
-        """Initialize session with a visit to the homepage."""
+    def _build_extractor(self) -> Optional[Extractor]:
+        """Compile StoreConfig.selectors (None for stores without HTML selectors)."""
+        return build_extractor(self.store_config.selectors)
+
+    @property
+    def session_warmer(self) -> SessionWarmer:
+        if self._session_warmer is None:
+            self._session_warmer = get_session_warmer()
+        return self._session_warmer
+
+    def _init_session(self) -> Optional[Tuple[Dict[str, str], Optional[float]]]:
+        """
+        Visit the homepage to obtain session cookies.
+
+        Returns:
+            (cookies, earliest cookie expiry or None), or None on failure
+        """
         try:
             base_url = self.store_config.base_url
             logger.info(f"Initializing session with visit to {base_url}")
             
-            # Visit homepage first
-            response = self.session.get(
+            response = self.http.get(
                 base_url,
-                verify=self.store_config.requires_ssl_verify,
-                timeout=10
+                store_config=self.store_config,
+                headers=self.headers,
+                timeout=10,
+                use_cache=False,
+                rate_limiter=self.rate_limiter
             )
             response.raise_for_status()
             
-            # Small delay to mimic human behavior
-            time.sleep(1.5)
-            
-            return True
+            # Cookies may be set on any response of a redirect chain
+            cookies, expiries = {}, []
+            for hop in response.history + [response]:
+                for cookie in hop.cookies.jar:
+                    cookies[cookie.name] = cookie.value
+                    if cookie.expires:
+                        expiries.append(float(cookie.expires))
+            return cookies, min(expiries, default=None)
         except Exception as e:
             logger.error(f"Failed to initialize session: {str(e)}")
+            return None
+
+    def _request_headers(self) -> Dict[str, str]:
+        """Headers for a request, with the warmed session's cookies for stores that need one."""
+        if not self.store_config.warm_up:
+            return self.headers
+        cookies = self.session_warmer.cookies(
+            self.store_config.name, self.headers.get('User-Agent', ''), self._init_session
+        )
+        if not cookies:
+            return self.headers
+        return dict(self.headers, Cookie=cookie_header(cookies))
+
+    def _retries_for(self, attempt: int) -> int:
+        # A half-open circuit's trial request is never retried
+        if self.circuit_breaker.is_trial(self.store_config.name):
+            return 0
+        # A warmed session's first request is not retried with backoff: a 503 usually means the session was rejected
+        return 0 if self.store_config.warm_up and not attempt else self.max_retries
+
+    def _retry_request(self, attempt: int, status_code: int, blocked_page: bool = False) -> bool:
+        """
+        Whether to send the first request of a warm-up store again.
+
+        A response showing the store rejected the session invalidates it, so
+        the retry warms a new one; other 5xx responses are retried with backoff.
+        """
+        if attempt or not self.store_config.warm_up:
             return False
+        if status_code in BLOCKED_STATUSES or blocked_page:
+            self.session_warmer.invalidate(self.store_config.name, self.headers.get('User-Agent', ''))
+            return True
+        return status_code in RETRY_STATUSES
+
+    def _record_health(self, status_code: int, blocked_page: bool = False):
+        """Report a fetched search page to the store's circuit breaker."""
+        if blocked_page:
+            self.circuit_breaker.record_failure(self.store_config.name, 'anti-bot page')
+        elif is_failure_status(status_code):
+            self.circuit_breaker.record_failure(self.store_config.name, f"HTTP {status_code}")
+        else:
+            self.circuit_breaker.record_success(self.store_config.name)
 
     def string_similarity(self, a: str, b: str) -> float:
         """Calculate similarity between two strings."""
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+        return match_scores(a, [b])[0]
 
     def extract_price(self, price_str: str) -> Optional[str]:
-        """Extract numeric price from string."""
-        if not price_str:
-            return None
-            
-        try:
-            # Remove currency symbols and spaces
-            price_str = re.sub(r'[^\d.,]', '', price_str)
-            
-            # Handle different decimal separators
-            if ',' in price_str and '.' in price_str:
-                # If both separators exist, assume European format
-                price_str = price_str.replace('.', '').replace(',', '.')
-            elif ',' in price_str:
-                # If only comma exists, assume European format
-                price_str = price_str.replace(',', '.')
-                
-            # Convert to float and back to string to validate
-            price = float(price_str)
-            return f"{price:.2f}"
-        except (ValueError, TypeError):
-            logger.warning(f"Failed to extract price from: {price_str}")
+        """Extract numeric price from string, in the store's number format."""
+        cents = parse_price_cents(price_str, self.store_config.price_format)
+        if cents is None:
+            if price_str:
+                logger.warning(f"Failed to extract price from: {price_str}")
             return None
+        return f"{cents // 100}.{cents % 100:02d}"
 
-    def validate_price(self, price: float, product_type: str) -> bool:
-        """Validate price based on product type."""
-        try:
-            if product_type == "console":
-                return 300 <= price <= 600
-            elif product_type == "game":
-                return 20 <= price <= 80
-            elif product_type == "accessory":
-                return 10 <= price <= 100
-            return True
-        except (ValueError, TypeError):
-            return False
+    def validate_price(self, price: float, product: str) -> bool:
+        """Validate price against the range of the product's category."""
+        return self.price_rules.validate(price, product)
 
-    def make_request(self, url: str, method: str = 'GET', **kwargs) -> Optional[requests.Response]:
+    def make_request(self, url: str, method: str = 'GET', **kwargs) -> Optional[httpx.Response]:
         """Make HTTP request with retry logic and error handling."""
         try:
-            # Initialize session if needed
-            if 'amazon' in url.lower():
-                self._init_session(url)
-            
-            # Add timeout to prevent hanging
-            kwargs['timeout'] = kwargs.get('timeout', 10)
-            
-            # Add verify parameter if specified in config
-            kwargs['verify'] = self.store_config.requires_ssl_verify
-            
-            # Make the request
-            response = self.session.request(method, url, **kwargs)
+            # Make the request through the shared pool; a rejected session is warmed again once.
+            # Without an explicit timeout the client adapts one to the store's observed latency.
+            for attempt in range(2):
+                if attempt or self.circuit_breaker.is_trial(self.store_config.name):
+                    # A retry after a blocked page, or a half-open circuit's trial, must reach the store
+                    kwargs['use_cache'] = False
+                response = self.http.request(
+                    method,
+                    url,
+                    store_config=self.store_config,
+                    headers=self._request_headers(),
+                    retries=self._retries_for(attempt),
+                    rate_limiter=self.rate_limiter,
+                    **kwargs
+                )
+                blocked_page = self.store_config.warm_up and bool(BLOCKED_BODY.search(response.content))
+                if not self._retry_request(attempt, response.status_code, blocked_page):
+                    break
             
             # Log response details for debugging
             logger.info(f"Request to {url} - Status: {response.status_code}")
@@ -128,19 +209,15 @@ class BaseScraper:
             response.raise_for_status()
             return response
             
-        except requests.exceptions.SSLError as e:
-            logger.error(f"SSL Error for {url}: {str(e)}")
-            return None
-                
-        except requests.exceptions.ConnectionError as e:
+        except httpx.ConnectError as e:
             logger.error(f"Connection Error for {url}: {str(e)}")
             return None
             
-        except requests.exceptions.Timeout as e:
+        except httpx.TimeoutException as e:
             logger.error(f"Timeout Error for {url}: {str(e)}")
             return None
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Request failed for {url}: {str(e)}")
             return None
             
@@ -151,49 +228,58 @@ class BaseScraper:
     def parse_product(self, element) -> Optional[Dict[str, Any]]:
         """Parse product information from HTML element."""
         try:
+            fields = self.extractor.extract(element)
+            
             # Extract title
-            title_elem = element.find(self.store_config.selectors['title'])
-            if not title_elem:
+            if fields['title'] is None:
                 logger.warning("Title element not found")
                 return None
-            title = title_elem.get_text(strip=True)
+            title = fields['title'].strip()
 
             # Extract price
-            price_elem = element.find(self.store_config.selectors['price'])
-            if not price_elem:
+            if fields['price'] is None:
                 logger.warning("Price element not found")
                 return None
-            price = self.extract_price(price_elem.get_text(strip=True))
-            if not price:
+            price_cents = parse_price_cents(fields['price'], self.store_config.price_format)
+            if not price_cents:
                 logger.warning("Failed to extract valid price")
                 return None
 
             # Extract link
-            link_elem = element.find(self.store_config.selectors['link'])
-            if not link_elem:
+            link = fields['link']
+            if not link:
                 logger.warning("Link element not found")
                 return None
-            link = link_elem.get('href')
-            if link and not link.startswith('http'):
+            if not link.startswith('http'):
                 link = f"{self.store_config.base_url.rstrip('/')}/{link.lstrip('/')}"
 
             # Extract description
-            desc_elem = element.find(self.store_config.selectors['description'])
-            description = desc_elem.get_text(strip=True) if desc_elem else None
-
-            return {
-                'title': title,
-                'price': price,
-                'link': link,
-                'description': description,
-                'store': self.store_config.name
-            }
+            description = fields.get('description')
+            description = description.strip() if description is not None else None
+
+            return Product(
+                store=self.store_config.name,
+                title=title,
+                price_cents=price_cents,
+                link=link,
+                description=description
+            )
         except Exception as e:
             logger.error(f"Error parsing product: {str(e)}")
             return None
 
     def search(self, query: str) -> Optional[Dict[str, Any]]:
-        """Search for products and return the best match."""
+        """
+        Search for products and return the best match.
+
+        Raises:
+            CircuitOpenError: The store is skipped because its recent searches failed
+        """
+        self.circuit_breaker.check(self.store_config.name)
+        with self.metrics.trace(self.store_config.name, query):
+            return self._search(query)
+
+    def _search(self, query: str) -> Optional[Dict[str, Any]]:
         try:
             # Encode query for URL
             encoded_query = quote(query)
@@ -201,39 +287,73 @@ class BaseScraper:
             # Construct search URL
             search_url = self.store_config.search_url.format(query=encoded_query)
             
-            # Make request
-            response = self.make_request(search_url)
-            if not response:
-                logger.error(f"Failed to get response from {search_url}")
-                return None
-                
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Find product container
-            container = soup.find(self.store_config.selectors['container'])
-            if not container:
-                logger.warning(f"No products found for query: {query}")
+            if self.extractor is None:
+                logger.error(f"No selectors configured for {self.store_config.name}")
                 return None
                 
-            # Parse product
-            result = self.parse_product(container)
-            if not result:
-                logger.warning(f"Failed to parse product for query: {query}")
-                return None
+            # Only the first product is used, so stop downloading as soon as it has been parsed
+            for attempt in range(2):
+                with self.http.stream(
+                    'GET',
+                    search_url,
+                    store_config=self.store_config,
+                    headers=self._request_headers(),
+                    retries=self._retries_for(attempt),
+                    # A retry after a blocked page, or a half-open circuit's trial, must reach the store
+                    use_cache=not attempt and not self.circuit_breaker.is_trial(self.store_config.name),
+                    rate_limiter=self.rate_limiter
+                ) as response:
+                    logger.info(f"Request to {search_url} - Status: {response.status_code}")
+                    if self._retry_request(attempt, response.status_code):
+                        continue
+                    response.raise_for_status()
+                    
+                    recorder = self.debug_capture.recorder(self.store_config.name, search_url)
+                    timer = self.metrics.stream_timer(self.store_config.name)
+                    chunks = _BlockSniffer(timer.wrap(recorder.tee(response.iter_bytes())))
+                    containers = self.extractor.iter_containers(chunks, response.encoding)
+                    container = next(containers, None)
+                    if container is None:
+                        timer.finish()
+                        recorder.finish(failed=True, reason='anti-bot page' if chunks.blocked else 'no products')
+                        if self._retry_request(attempt, response.status_code, chunks.blocked):
+                            continue
+                        self._record_health(response.status_code, chunks.blocked)
+                        logger.warning(f"No products found for query: {query}")
+                        return None
+                        
+                    # Parse product
+                    result = self.parse_product(container)
+                    containers.close()
+                    timer.finish()
+                    self._record_health(response.status_code, chunks.blocked)
+                    recorder.finish(failed=not result, reason='unparseable product')
+                    if not result:
+                        logger.warning(f"Failed to parse product for query: {query}")
+                        return None
+                    break
                 
             # Validate price
-            try:
-                price = float(result['price'])
-                if not self.validate_price(price, "console"):  # Default to console validation
-                    logger.warning(f"Invalid price {price} for product: {result['title']}")
+            with self.metrics.timer(STAGE_VALIDATE, self.store_config.name):
+                try:
+                    price = result.price
+                    if not self.validate_price(price, query):
+                        logger.warning(f"Invalid price {price} for product: {result['title']}")
+                        return None
+                except (ValueError, TypeError):
+                    logger.warning(f"Failed to validate price for product: {result['title']}")
                     return None
-            except (ValueError, TypeError):
-                logger.warning(f"Failed to validate price for product: {result['title']}")
-                return None
                 
             return result
             
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed for {search_url}: {str(e)}")
+            if not isinstance(e, httpx.HTTPStatusError):
+                self.circuit_breaker.record_failure(self.store_config.name, type(e).__name__)
+            elif is_failure_status(e.response.status_code):
+                self.circuit_breaker.record_failure(self.store_config.name, f"HTTP {e.response.status_code}")
+            return None
+            
         except Exception as e:
             logger.error(f"Error during search: {str(e)}")
             return None 
\ No newline at end of file
@@ -1,20 +1,50 @@
 import logging
 import time
-import random
-from typing import Dict, List, Optional, Any, Tuple
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+import httpx
 from urllib.parse import quote, urlencode
-import os
+
+from config.stores import STORE_CONFIGS
+from utils.http_client import get_http_client
+from utils.rate_limiter import get_rate_limiter
+from utils.result_cache import get_result_cache, make_key
+from utils.extraction import Extractor, Field
+from utils.debug_capture import get_debug_capture
+from utils.metrics import STAGE_RATE_LIMIT, get_metrics
+from utils.product import Product, ProductBatch, to_cents
+from utils.price_parser import parse_price
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Search result selectors, compiled once
+SEARCH_EXTRACTOR = Extractor(
+    containers='article.product-tile',
+    fields={
+        'title': 'h3.product-tile__title',
+        'price': 'span.product-tile__price',
+        'link': Field('a.product-tile__link', attr='href'),
+        'description': 'div.product-tile__description',
+        'image': Field('img.product-tile__image', attr='src'),
+        'article_number': 'div.product-tile__article-number',
+        'availability': 'div.product-tile__availability'
+    }
+)
+
 class HemaScraper:
-    def __init__(self):
-        """Initialize the HEMA scraper with proper headers."""
-        self.session = requests.Session()
+    def __init__(self, store_config=None, rate_limiter=None):
+        """
+        Initialize the HEMA scraper with proper headers.
+
+        Args:
+            store_config: StoreConfig the requests belong to (default: STORE_CONFIGS['hema.nl'])
+            rate_limiter: Per-store token buckets (default: the shared limiter)
+        """
+        self.store_config = store_config or STORE_CONFIGS['hema.nl']
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.http = get_http_client()
+        self.result_cache = get_result_cache()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -24,55 +54,64 @@ class HemaScraper:
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0'
         }
-        self.session.headers.update(self.headers)
         
-        # Create debug directory
-        self.debug_dir = 'debug'
-        if not os.path.exists(self.debug_dir):
-            os.makedirs(self.debug_dir)
-            logger.info(f"Created debug directory: {self.debug_dir}")
+        # Pages that yield no products are saved in the background (see utils.debug_capture)
+        self.debug_capture = get_debug_capture()
+        
+        # Per-stage latency of each search (see utils.metrics)
+        self.metrics = get_metrics()
+
+    def _rate_limit(self):
+        """Wait for the store's token bucket."""
+        waited = self.rate_limiter.acquire(self.store_config)
+        self.metrics.observe(STAGE_RATE_LIMIT, self.store_config.name, waited)
 
-    def _random_sleep(self, min_seconds: float = 1.0, max_seconds: float = 3.0):
-        """Add random delay between requests to avoid detection."""
-        time.sleep(random.uniform(min_seconds, max_seconds))
+    def _stream_containers(self, url: str) -> Iterator[Any]:
+        """
+        Yield product containers while the page is still downloading.
 
-    def _make_request(self, url: str) -> Optional[str]:
-        """Make a request with retry logic and error handling."""
+        Closing the generator (or breaking out of the loop over it) stops
+        reading the response. Connection failures are retried with
+        exponential backoff as long as no container has been yielded yet.
+        """
         max_retries = 3
         for attempt in range(max_retries):
+            started = False
             try:
-                self._random_sleep()
+                self._rate_limit()
                 logger.info(f"Making request to: {url}")
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
-                
-                # Save HTML response for debugging
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                debug_file = os.path.join(self.debug_dir, f'hema_response_{timestamp}.html')
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                logger.info(f"Saved HTML response to {debug_file}")
-                
-                # Log response details
-                logger.info(f"Response status code: {response.status_code}")
-                logger.info(f"Response headers: {dict(response.headers)}")
-                
-                return response.text
-            except requests.RequestException as e:
+                # Without an explicit timeout the client adapts one to the store's observed latency
+                with self.http.stream('GET', url, store_config=self.store_config, headers=self.headers,
+                                      rate_limiter=self.rate_limiter) as response:
+                    response.raise_for_status()
+                    logger.info(f"Response status code: {response.status_code}")
+                    recorder = self.debug_capture.recorder(self.store_config.name, url)
+                    timer = self.metrics.stream_timer(self.store_config.name)
+                    chunks = timer.wrap(recorder.tee(response.iter_bytes()))
+                    try:
+                        for container in SEARCH_EXTRACTOR.iter_containers(chunks, response.encoding):
+                            if not started:
+                                started = True
+                                recorder.succeeded()
+                            yield container
+                    finally:
+                        # Also runs when the caller stops early; only sampled pages are then kept
+                        timer.finish()
+                        recorder.finish(failed=not started, reason='no products')
+                return
+            except httpx.HTTPError as e:
                 logger.error(f"Request failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
+                if started:
+                    return
                 if attempt < max_retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-        return None
 
     def _extract_price(self, price_text: str) -> Optional[float]:
         """Extract numeric price from text."""
         try:
             if not price_text:
                 return None
-            # Remove currency symbols and convert to float
-            price = ''.join(filter(str.isdigit, price_text.replace(',', '.')))
-            return float(price) / 100  # HEMA prices are in cents
+            return parse_price(price_text, self.store_config.price_format)  # HEMA prices are in cents
         except (ValueError, AttributeError):
             return None
 
@@ -122,76 +161,78 @@ class HemaScraper:
         Returns:
             List of dictionaries containing product information
         """
+        key = make_key('hema.nl', query, max_results=max_results, sort_by=sort_by)
+        with self.metrics.trace(self.store_config.name, query):
+            return self.result_cache.get_or_compute(
+                key,
+                lambda: self._search(query, max_results, sort_by)
+            )
+
+    def _search(self, 
+               query: str, 
+               max_results: int = 20,
+               sort_by: str = None) -> List[Dict[str, Any]]:
+        """Run the search against HEMA, bypassing the result cache."""
         try:
-            results = []
+            results = ProductBatch()
             page = 1
             
             while len(results) < max_results and page <= 5:  # Limit to 5 pages
                 url = self._build_search_url(query, page, sort_by)
                 logger.info(f"Searching HEMA for: {query} (page {page})")
                 
-                html = self._make_request(url)
-                if not html:
-                    logger.error("Failed to get HTML response")
-                    break
-                    
-                soup = BeautifulSoup(html, 'lxml')
-                
-                # Log page title
-                logger.info(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-                
-                # Look for all product containers
-                products = soup.select('article.product-tile')
-                logger.info(f"Found {len(products)} product containers on page {page}")
-                
-                if not products:
-                    logger.error("No products found on page")
-                    break
-
-                for product in products:
-                    if len(results) >= max_results:
-                        break
+                containers = self._stream_containers(url)
+                found = 0
+                for product in containers:
+                    found += 1
                         
                     try:
                         # Extract product information
-                        title_elem = product.select_one('h3.product-tile__title')
-                        price_elem = product.select_one('span.product-tile__price')
-                        link_elem = product.select_one('a.product-tile__link')
-                        description_elem = product.select_one('div.product-tile__description')
-                        image_elem = product.select_one('img.product-tile__image')
-                        article_number = product.select_one('div.product-tile__article-number')
-                        availability = product.select_one('div.product-tile__availability')
+                        fields = SEARCH_EXTRACTOR.extract(product)
                         
-                        if not all([title_elem, link_elem]):
+                        if fields['title'] is None or not fields['link']:
                             logger.warning("Missing required product elements")
                             continue
                         
                         # Extract price
-                        price = self._extract_price(price_elem.text.strip() if price_elem else None)
+                        price = self._extract_price(fields['price'].strip() if fields['price'] is not None else None)
                         
                         # Get availability status
                         is_available = True
-                        if availability:
-                            is_available = 'niet online' not in availability.text.lower()
+                        if fields['availability'] is not None:
+                            is_available = 'niet online' not in fields['availability'].lower()
                         
                         # Construct result
-                        result = {
-                            'title': title_elem.text.strip(),
-                            'price': f"{price:.2f}" if price else None,
-                            'link': f"https://www.hema.nl{link_elem['href']}" if link_elem.get('href', '').startswith('/') else link_elem['href'],
-                            'description': self._clean_description(description_elem.text if description_elem else ''),
-                            'store': 'HEMA',
-                            'image_url': image_elem.get('src') if image_elem else None,
-                            'article_number': article_number.text.strip() if article_number else None,
-                            'available_online': is_available
-                        }
+                        result = Product(
+                            store='HEMA',
+                            title=fields['title'].strip(),
+                            price_cents=to_cents(price) if price else None,
+                            link=f"https://www.hema.nl{fields['link']}" if fields['link'].startswith('/') else fields['link'],
+                            description=self._clean_description(fields['description'] or ''),
+                            image_url=fields['image'],
+                            available=is_available,
+                            extra={
+                                'article_number': fields['article_number'].strip() if fields['article_number'] is not None else None
+                            }
+                        )
                         
                         results.append(result)
-                        logger.info(f"Added product: {result['title']} - €{result['price']}")
+                        logger.info(f"Added product: {result.title} - {result.display_price}")
                         
                     except Exception as e:
                         logger.error(f"Error processing product: {str(e)}")
                         continue
+                    
+                    if len(results) >= max_results:
+                        break
+                
+                # Stop downloading the rest of the page once enough products were found
+                containers.close()
+                logger.info(f"Parsed {found} product containers on page {page}")
+                
+                if not found:
+                    logger.error("No products found on page")
+                    break
                 
                 page += 1
             
@@ -1,20 +1,51 @@
 import logging
 import time
-import random
-from typing import Dict, List, Optional, Any, Tuple
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+import httpx
 from urllib.parse import quote, urlencode
-import os
+
+from config.stores import STORE_CONFIGS
+from utils.http_client import get_http_client
+from utils.rate_limiter import get_rate_limiter
+from utils.result_cache import get_result_cache, make_key
+from utils.extraction import Extractor, Field
+from utils.debug_capture import get_debug_capture
+from utils.metrics import STAGE_RATE_LIMIT, get_metrics
+from utils.product import Product, ProductBatch, to_cents
+from utils.price_parser import parse_price
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Search result selectors, compiled once
+SEARCH_EXTRACTOR = Extractor(
+    containers='article[data-test="advertisement-item"]',
+    fields={
+        'title': 'h3.mp-Listing-title',
+        'price': 'span.mp-Listing-price',
+        'link': Field('a.mp-Listing-coverLink', attr='href'),
+        'description': 'p.mp-Listing-description',
+        'image': Field('img.mp-Listing-image', attr='src'),
+        'location': 'span.mp-Listing-location',
+        'seller': 'span.mp-Listing-seller',
+        'condition': 'span.mp-Listing-attributes'
+    }
+)
+
 class MarktplaatsScraper:
-    def __init__(self):
-        """Initialize the Marktplaats scraper with proper headers."""
-        self.session = requests.Session()
+    def __init__(self, store_config=None, rate_limiter=None):
+        """
+        Initialize the Marktplaats scraper with proper headers.
+
+        Args:
+            store_config: StoreConfig the requests belong to (default: STORE_CONFIGS['marktplaats.nl'])
+            rate_limiter: Per-store token buckets (default: the shared limiter)
+        """
+        self.store_config = store_config or STORE_CONFIGS['marktplaats.nl']
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.http = get_http_client()
+        self.result_cache = get_result_cache()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -24,55 +55,63 @@ class MarktplaatsScraper:
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0'
         }
-        self.session.headers.update(self.headers)
         
-        # Create debug directory
-        self.debug_dir = 'debug'
-        if not os.path.exists(self.debug_dir):
-            os.makedirs(self.debug_dir)
-            logger.info(f"Created debug directory: {self.debug_dir}")
+        # Pages that yield no products are saved in the background (see utils.debug_capture)
+        self.debug_capture = get_debug_capture()
+        
+        # Per-stage latency of each search (see utils.metrics)
+        self.metrics = get_metrics()
+
+    def _rate_limit(self):
+        """Wait for the store's token bucket."""
+        waited = self.rate_limiter.acquire(self.store_config)
+        self.metrics.observe(STAGE_RATE_LIMIT, self.store_config.name, waited)
 
-    def _random_sleep(self, min_seconds: float = 1.0, max_seconds: float = 3.0):
-        """Add random delay between requests to avoid detection."""
-        time.sleep(random.uniform(min_seconds, max_seconds))
+    def _stream_containers(self, url: str) -> Iterator[Any]:
+        """
+        Yield product containers while the page is still downloading.
 
-    def _make_request(self, url: str) -> Optional[str]:
-        """Make a request with retry logic and error handling."""
+        Closing the generator (or breaking out of the loop over it) stops
+        reading the response. Connection failures are retried with
+        exponential backoff as long as no container has been yielded yet.
+        """
         max_retries = 3
         for attempt in range(max_retries):
+            started = False
             try:
-                self._random_sleep()
+                self._rate_limit()
                 logger.info(f"Making request to: {url}")
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
-                
-                # Save HTML response for debugging
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                debug_file = os.path.join(self.debug_dir, f'marktplaats_response_{timestamp}.html')
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                logger.info(f"Saved HTML response to {debug_file}")
-                
-                # Log response details
-                logger.info(f"Response status code: {response.status_code}")
-                logger.info(f"Response headers: {dict(response.headers)}")
-                
-                return response.text
-            except requests.RequestException as e:
+                # Without an explicit timeout the client adapts one to the store's observed latency
+                with self.http.stream('GET', url, store_config=self.store_config, headers=self.headers,
+                                      rate_limiter=self.rate_limiter) as response:
+                    response.raise_for_status()
+                    logger.info(f"Response status code: {response.status_code}")
+                    recorder = self.debug_capture.recorder(self.store_config.name, url)
+                    timer = self.metrics.stream_timer(self.store_config.name)
+                    chunks = timer.wrap(recorder.tee(response.iter_bytes()))
+                    try:
+                        for container in SEARCH_EXTRACTOR.iter_containers(chunks, response.encoding):
+                            if not started:
+                                started = True
+                                recorder.succeeded()
+                            yield container
+                    finally:
+                        # Also runs when the caller stops early; only sampled pages are then kept
+                        timer.finish()
+                        recorder.finish(failed=not started, reason='no products')
+                return
+            except httpx.HTTPError as e:
                 logger.error(f"Request failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
+                if started:
+                    return
                 if attempt < max_retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-        return None
 
     def _extract_price(self, price_text: str) -> Optional[float]:
         """Extract numeric price from text."""
         try:
-            if price_text.lower() == 'bieden':
-                return None
-            # Remove currency symbols and convert to float
-            price = ''.join(filter(str.isdigit, price_text.replace(',', '.')))
-            return float(price)
+            # 'Bieden' (make an offer) and the like hold no number
+            return parse_price(price_text, self.store_config.price_format)
         except (ValueError, AttributeError):
             return None
 
@@ -127,53 +166,46 @@ class MarktplaatsScraper:
         Returns:
             List of dictionaries containing product information
         """
+        key = make_key(
+            'marktplaats.nl', query,
+            max_results=max_results, distance=distance, min_price=min_price, max_price=max_price
+        )
+        with self.metrics.trace(self.store_config.name, query):
+            return self.result_cache.get_or_compute(
+                key,
+                lambda: self._search(query, max_results, distance, min_price, max_price)
+            )
+
+    def _search(self, 
+               query: str, 
+               max_results: int = 20,
+               distance: Optional[int] = None,
+               min_price: Optional[float] = None,
+               max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run the search against Marktplaats, bypassing the result cache."""
         try:
-            results = []
+            results = ProductBatch()
             page = 1
             
             while len(results) < max_results and page <= 5:  # Limit to 5 pages
                 url = self._build_search_url(query, page, distance, min_price, max_price)
                 logger.info(f"Searching Marktplaats for: {query} (page {page})")
                 
-                html = self._make_request(url)
-                if not html:
-                    logger.error("Failed to get HTML response")
-                    break
-                    
-                soup = BeautifulSoup(html, 'lxml')
-                
-                # Log page title
-                logger.info(f"Page title: {soup.title.string if soup.title else 'No title found'}")
-                
-                # Look for all product containers
-                products = soup.select('article[data-test="advertisement-item"]')
-                logger.info(f"Found {len(products)} product containers on page {page}")
-                
-                if not products:
-                    logger.error("No products found on page")
-                    break
-
-                for product in products:
-                    if len(results) >= max_results:
-                        break
+                containers = self._stream_containers(url)
+                found = 0
+                for product in containers:
+                    found += 1
                         
                     try:
                         # Extract product information
-                        title_elem = product.select_one('h3.mp-Listing-title')
-                        price_elem = product.select_one('span.mp-Listing-price')
-                        link_elem = product.select_one('a.mp-Listing-coverLink')
-                        description_elem = product.select_one('p.mp-Listing-description')
-                        image_elem = product.select_one('img.mp-Listing-image')
-                        location_elem = product.select_one('span.mp-Listing-location')
-                        seller_elem = product.select_one('span.mp-Listing-seller')
-                        condition_elem = product.select_one('span.mp-Listing-attributes')
+                        fields = SEARCH_EXTRACTOR.extract(product)
                         
-                        if not all([title_elem, link_elem]):
+                        if fields['title'] is None or not fields['link']:
                             logger.warning("Missing required product elements")
                             continue
                         
                         # Extract price (handle "Bieden" case)
-                        price_text = price_elem.text.strip() if price_elem else "Bieden"
+                        price_text = fields['price'].strip() if fields['price'] is not None else "Bieden"
                         price = self._extract_price(price_text)
                         
                         # Apply price filters
@@ -183,24 +215,38 @@ class MarktplaatsScraper:
                             continue
                         
                         # Construct result
-                        result = {
-                            'title': title_elem.text.strip(),
-                            'price': f"{price:.2f}" if price else price_text,
-                            'link': f"https://www.marktplaats.nl{link_elem['href']}" if link_elem.get('href', '').startswith('/') else link_elem['href'],
-                            'description': self._clean_description(description_elem.text if description_elem else ''),
-                            'store': 'Marktplaats',
-                            'image_url': image_elem.get('src') if image_elem else None,
-                            'location': location_elem.text.strip() if location_elem else None,
-                            'seller': seller_elem.text.strip() if seller_elem else None,
-                            'condition': condition_elem.text.strip() if condition_elem else None
-                        }
+                        result = Product(
+                            store='Marktplaats',
+                            title=fields['title'].strip(),
+                            price_cents=to_cents(price) if price else None,
+                            price_text=None if price else price_text,
+                            link=f"https://www.marktplaats.nl{fields['link']}" if fields['link'].startswith('/') else fields['link'],
+                            description=self._clean_description(fields['description'] or ''),
+                            image_url=fields['image'],
+                            extra={
+                                'location': fields['location'].strip() if fields['location'] is not None else None,
+                                'seller': fields['seller'].strip() if fields['seller'] is not None else None,
+                                'condition': fields['condition'].strip() if fields['condition'] is not None else None
+                            }
+                        )
                         
                         results.append(result)
-                        logger.info(f"Added product: {result['title']} - {result['price']}")
+                        logger.info(f"Added product: {result.title} - {result.display_price}")
                         
                     except Exception as e:
                         logger.error(f"Error processing product: {str(e)}")
                         continue
+                    
+                    if len(results) >= max_results:
+                        break
+                
+                # Stop downloading the rest of the page once enough products were found
+                containers.close()
+                logger.info(f"Parsed {found} product containers on page {page}")
+                
+                if not found:
+                    logger.error("No products found on page")
+                    break
                 
                 page += 1
             
@@ -0,0 +1,203 @@
+from typing import Callable, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
+import logging
+from queue import Queue, Empty
+from threading import Event, Lock
+
+from utils.circuit_breaker import CircuitOpenError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Outcome of a single store search, reported through on_result
+STATUS_FOUND = 'found'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_CANCELLED = 'cancelled'
+STATUS_UNAVAILABLE = 'unavailable'  # Skipped because the store's circuit breaker is open
+
+
+class SearchJob:
+    """Handle for a running fan-out search that can be cancelled from any thread."""
+
+    def __init__(self):
+        self._cancelled = Event()
+        self._done = Event()
+
+    def cancel(self):
+        """Stop waiting for outstanding stores and drop their late results."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the search has finished or was cancelled."""
+        return self._done.wait(timeout)
+
+
+class SearchEngine:
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 store_timeout: float = 30.0,
+                 store_timeouts: Optional[Dict[str, float]] = None,
+                 poll_interval: float = 0.1):
+        """
+        Initialize the search engine with a bounded worker pool.
+
+        Args:
+            max_concurrency: Maximum number of stores searched at the same time
+            store_timeout: Seconds a store may run before it is reported as timed out
+            store_timeouts: Optional per-store overrides of store_timeout
+            poll_interval: How often the coordinator checks for cancellation and deadlines
+        """
+        self.max_concurrency = max_concurrency
+        self.store_timeout = store_timeout
+        self.store_timeouts = store_timeouts or {}
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix='store-search'
+        )
+
+    def _timeout_for(self, store: str) -> float:
+        return self.store_timeouts.get(store, self.store_timeout)
+
+    def run(self,
+            search_functions: Dict[str, Callable[[str], Optional[Dict[str, Any]]]],
+            query: str,
+            job: Optional[SearchJob] = None,
+            on_start: Optional[Callable[[str], None]] = None,
+            on_result: Optional[Callable[[str, str, Optional[Dict[str, Any]]], None]] = None,
+            deadline: Optional[float] = None
+            ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Search every store at once and stream outcomes as they complete.
+
+        Stores are dispatched immediately; at most max_concurrency run at the
+        same time. A store's deadline starts when it begins running, not when
+        it is queued. Worker threads cannot be interrupted, so a store that
+        times out or is cancelled keeps its thread until the underlying
+        request returns, but its result is discarded. With a deadline, the
+        search returns once it has passed with whatever has completed; the
+        stores still outstanding are reported as timed out.
+
+        Both callbacks run on the thread that called run(), never on a worker.
+
+        Args:
+            search_functions: Mapping of store name to a function taking the query
+            query: Search query
+            job: Optional handle used to cancel the search from another thread
+            on_start: Called with the store name when a worker picks it up
+            on_result: Called with (store, status, result) once per store
+            deadline: Seconds after which the whole search returns partial results (default: no deadline)
+
+        Returns:
+            Mapping of store name to its result (None when nothing was found)
+        """
+        job = job or SearchJob()
+        ends_at = None if deadline is None else time.monotonic() + deadline
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        started: Dict[str, float] = {}
+        started_lock = Lock()
+        start_events: Queue = Queue()
+
+        def run_store(store: str, search_func):
+            if job.cancelled:
+                return None
+            with started_lock:
+                started[store] = time.monotonic()
+            start_events.put(store)
+            return search_func(query)
+
+        def report(store: str, status: str, result: Optional[Dict[str, Any]] = None):
+            results[store] = result
+            if on_result:
+                on_result(store, status, result)
+
+        def drain_start_events():
+            while True:
+                try:
+                    store = start_events.get_nowait()
+                except Empty:
+                    return
+                if on_start and not job.cancelled:
+                    on_start(store)
+
+        pending = {
+            self.executor.submit(run_store, store, search_func): store
+            for store, search_func in search_functions.items()
+        }
+
+        try:
+            while pending:
+                if job.cancelled:
+                    for future, store in pending.items():
+                        future.cancel()
+                        report(store, STATUS_CANCELLED)
+                    pending.clear()
+                    break
+
+                done, _ = wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                drain_start_events()
+
+                for future in done:
+                    store = pending.pop(future)
+                    if job.cancelled:
+                        report(store, STATUS_CANCELLED)
+                        continue
+                    try:
+                        result = future.result()
+                    except CircuitOpenError as e:
+                        logger.info(str(e))
+                        report(store, STATUS_UNAVAILABLE)
+                        continue
+                    except Exception as e:
+                        logger.error(f"Error searching {store}: {str(e)}")
+                        report(store, STATUS_ERROR)
+                        continue
+                    if result:
+                        report(store, STATUS_FOUND, result)
+                    else:
+                        report(store, STATUS_NOT_FOUND)
+
+                now = time.monotonic()
+                with started_lock:
+                    expired = [
+                        future for future, store in pending.items()
+                        if store in started and now - started[store] > self._timeout_for(store)
+                    ]
+                for future in expired:
+                    store = pending.pop(future)
+                    logger.warning(f"Search for {store} timed out after {self._timeout_for(store):.1f}s")
+                    report(store, STATUS_TIMEOUT)
+
+                if ends_at is not None and now >= ends_at and pending:
+                    logger.warning(f"Search deadline of {deadline:.1f}s passed; {len(pending)} stores outstanding")
+                    for future, store in pending.items():
+                        future.cancel()
+                        report(store, STATUS_TIMEOUT)
+                    pending.clear()
+        finally:
+            job._done.set()
+
+        return results
+
+    def shutdown(self, wait: bool = False):
+        """Release the worker pool."""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __del__(self):
+        """Cleanup thread pool on deletion."""
+        try:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
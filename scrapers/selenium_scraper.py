@@ -2,66 +2,57 @@ import logging
 from typing import Dict, List, Optional, Any
 import time
 import random
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
-import re
-from webdriver_manager.chrome import ChromeDriverManager
+
+from utils.browser_pool import BrowserPool, get_browser_pool
+from utils.debug_capture import get_debug_capture
+from utils.metrics import STAGE_DOWNLOAD, get_metrics
+from utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from utils.product import Product
+from utils.price_parser import parse_price_cents
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SeleniumScraper:
-    def __init__(self, store_config, headless: bool = True):
+    def __init__(self, store_config, headless: bool = True, browser_pool: Optional[BrowserPool] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         """
-        Initialize Selenium scraper with Chrome browser.
+        Initialize Selenium scraper backed by a shared pool of Chrome browsers.
         
         Args:
             store_config: Store configuration
             headless: Whether to run browser in headless mode
+            browser_pool: Pool to borrow browsers from (default: shared pool for this profile)
+            circuit_breaker: Per-store health shared with the other scrapers (default: the shared breaker)
         """
         self.store_config = store_config
         
-        # Initialize Chrome options
-        options = Options()
-        if headless:
-            options.add_argument('--headless')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--disable-infobars')
-        options.add_argument('--disable-notifications')
-        options.add_argument('--disable-popup-blocking')
-        options.add_argument('--window-size=1920,1080')
-        
-        # Add custom user agent
-        options.add_argument(f'user-agent={self.store_config.custom_headers["User-Agent"]}')
-        
-        # Initialize Chrome driver with webdriver_manager
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        # Browsers are started lazily by the pool and stay warm between searches
+        self.pool = browser_pool or get_browser_pool(
+            headless=headless,
+            user_agent=self.store_config.custom_headers["User-Agent"]
+        )
         
-        # Set page load timeout
-        self.driver.set_page_load_timeout(30)
+        # Per-stage latency of each search (see utils.metrics)
+        self.metrics = get_metrics()
         
-        # Initialize session with homepage visit
-        self._init_session()
+        # Stores that keep blocking the browser are skipped for a while (see utils.circuit_breaker)
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker()
 
     def _random_sleep(self, min_seconds: float = 1.0, max_seconds: float = 3.0):
         """Sleep for a random amount of time to simulate human behavior."""
         time.sleep(random.uniform(min_seconds, max_seconds))
 
-    def _human_like_scroll(self):
+    def _human_like_scroll(self, driver):
         """Perform human-like scrolling behavior."""
         # Get page height
-        page_height = self.driver.execute_script("return document.body.scrollHeight")
+        page_height = driver.execute_script("return document.body.scrollHeight")
         
         # Scroll in random increments
         current_position = 0
@@ -71,29 +62,29 @@ class SeleniumScraper:
             current_position += scroll_amount
             
             # Scroll with random speed
-            self.driver.execute_script(f"window.scrollTo(0, {current_position})")
+            driver.execute_script(f"window.scrollTo(0, {current_position})")
             self._random_sleep(0.5, 1.5)
             
             # Occasionally scroll back up slightly
             if random.random() < 0.2:
-                self.driver.execute_script(f"window.scrollTo(0, {current_position - random.randint(50, 150)})")
+                driver.execute_script(f"window.scrollTo(0, {current_position - random.randint(50, 150)})")
                 self._random_sleep(0.3, 0.8)
 
-    def _init_session(self):
+    def _init_session(self, driver):
         """Initialize session by visiting the homepage and performing human-like interactions."""
         try:
             logger.info(f"Visiting homepage: {self.store_config.base_url}")
             
             # Visit homepage
-            self.driver.get(self.store_config.base_url)
+            driver.get(self.store_config.base_url)
             self._random_sleep(2, 4)  # Initial page load
             
             # Perform human-like scrolling
-            self._human_like_scroll()
+            self._human_like_scroll(driver)
             
             # Accept cookies if present
             try:
-                cookie_button = self.driver.find_element(By.ID, "sp-cc-accept")
+                cookie_button = driver.find_element(By.ID, "sp-cc-accept")
                 if cookie_button:
                     # Move to button with random delay
                     self._random_sleep(0.5, 1.0)
@@ -106,14 +97,14 @@ class SeleniumScraper:
             for _ in range(random.randint(2, 4)):
                 try:
                     # Find random links
-                    links = self.driver.find_elements(By.TAG_NAME, "a")
+                    links = driver.find_elements(By.TAG_NAME, "a")
                     if links:
                         random_link = random.choice(links)
                         href = random_link.get_attribute('href')
                         if href and self.store_config.base_url in href:
-                            self.driver.get(href)
+                            driver.get(href)
                             self._random_sleep(1, 2)
-                            self._human_like_scroll()
+                            self._human_like_scroll(driver)
                 except:
                     continue
             
@@ -123,68 +114,87 @@ class SeleniumScraper:
             return False
 
     def extract_price(self, price_str: str) -> Optional[str]:
-        """Extract numeric price from string."""
-        if not price_str:
-            return None
-            
-        try:
-            # Remove currency symbols and spaces
-            price_str = re.sub(r'[^\d.,]', '', price_str)
-            
-            # Handle different decimal separators
-            if ',' in price_str and '.' in price_str:
-                price_str = price_str.replace('.', '').replace(',', '.')
-            elif ',' in price_str:
-                price_str = price_str.replace(',', '.')
-                
-            price = float(price_str)
-            return f"{price:.2f}"
-        except (ValueError, TypeError):
-            logger.warning(f"Failed to extract price from: {price_str}")
+        """Extract numeric price from string, in the store's number format."""
+        cents = parse_price_cents(price_str, self.store_config.price_format)
+        if cents is None:
+            if price_str:
+                logger.warning(f"Failed to extract price from: {price_str}")
             return None
+        return f"{cents // 100}.{cents % 100:02d}"
 
     def search(self, query: str) -> Optional[Dict[str, Any]]:
         """
         Search for products using Selenium browser automation with human-like behavior.
+
+        Raises:
+            CircuitOpenError: The store is skipped because its recent searches failed
         """
+        self.circuit_breaker.check(self.store_config.name)
+        try:
+            with self.metrics.trace(self.store_config.name, query), self.pool.checkout() as driver:
+                # Visit the homepage once per browser rather than once per scraper
+                if not self.pool.is_warmed(driver, self.store_config.base_url):
+                    if self._init_session(driver):
+                        self.pool.mark_warmed(driver, self.store_config.base_url)
+                return self._search(driver, query)
+        except Exception as e:
+            logger.error(f"Error during search: {str(e)}")
+            self.circuit_breaker.record_failure(self.store_config.name, type(e).__name__)
+            return None
+
+    @staticmethod
+    def _is_blocked(page_source: str) -> bool:
+        page_source = page_source.lower()
+        return 'robot' in page_source or 'captcha' in page_source
+
+    def _search(self, driver, query: str) -> Optional[Dict[str, Any]]:
+        """Run the search in a browser checked out from the pool."""
         try:
             # Construct search URL
             search_url = self.store_config.search_url.format(query=query)
             logger.info(f"Searching URL: {search_url}")
             
             # Navigate to search page
-            self.driver.get(search_url)
+            with self.metrics.timer(STAGE_DOWNLOAD, self.store_config.name):
+                driver.get(search_url)
             self._random_sleep(2, 4)
             
             # Perform human-like scrolling
-            self._human_like_scroll()
+            self._human_like_scroll(driver)
             
             # Wait for results to load with increased timeout
             try:
-                WebDriverWait(self.driver, 15).until(
+                WebDriverWait(driver, 15).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, '.s-result-item'))
                 )
             except TimeoutException:
                 logger.error("Timeout waiting for search results")
-                with open('amazon_debug.html', 'w', encoding='utf-8') as f:
-                    f.write(self.driver.page_source)
-                logger.info("Saved page source to amazon_debug.html")
+                if self._is_blocked(driver.page_source):
+                    self.circuit_breaker.record_failure(self.store_config.name, 'anti-bot page')
+                get_debug_capture().capture(
+                    self.store_config.name, search_url, driver.page_source, failed=True, reason='no search results'
+                )
                 return None
             
             # Additional wait for dynamic content
             self._random_sleep(2, 3)
             
             # Get page source and parse with BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'lxml')
+            soup = BeautifulSoup(driver.page_source, 'lxml')
             
             # Debug: Print title and check for common elements
             page_title = soup.find('title')
             logger.info(f"Page title: {page_title.text if page_title else 'No title found'}")
             
             # Check for captcha/robot check
-            if 'robot' in self.driver.page_source.lower() or 'captcha' in self.driver.page_source.lower():
+            if self._is_blocked(driver.page_source):
                 logger.error("Detected anti-bot page")
+                self.circuit_breaker.record_failure(self.store_config.name, 'anti-bot page')
+                get_debug_capture().capture(
+                    self.store_config.name, search_url, driver.page_source, failed=True, reason='anti-bot page'
+                )
                 return None
+            self.circuit_breaker.record_success(self.store_config.name)
             
             # Try different selectors with random delays
             logger.info("Trying to find product containers...")
@@ -245,9 +255,9 @@ class SeleniumScraper:
                 if not price_elem:
                     logger.warning("Price element not found")
                     return None
-                price = self.extract_price(price_elem.get_text(strip=True))
-                logger.info(f"Found price: {price}")
-                if not price:
+                price_cents = parse_price_cents(price_elem.get_text(strip=True), self.store_config.price_format)
+                logger.info(f"Found price: {price_cents} cents")
+                if not price_cents:
                     logger.warning("Failed to extract valid price")
                     return None
                 
@@ -274,13 +284,13 @@ class SeleniumScraper:
                 description = desc_elem.get_text(strip=True) if desc_elem else None
                 logger.info(f"Found description: {description}")
                 
-                result = {
-                    'title': title,
-                    'price': price,
-                    'link': link,
-                    'description': description,
-                    'store': self.store_config.name
-                }
+                result = Product(
+                    store=self.store_config.name,
+                    title=title,
+                    price_cents=price_cents,
+                    link=link,
+                    description=description
+                )
                 logger.info(f"Successfully extracted product: {result}")
                 return result
                 
@@ -291,11 +301,3 @@ class SeleniumScraper:
         except Exception as e:
             logger.error(f"Error during search: {str(e)}")
             return None
-        
-    def __del__(self):
-        """Clean up browser resources."""
-        try:
-            if hasattr(self, 'driver'):
-                self.driver.quit()
-        except Exception as e:
-            logger.error(f"Error cleaning up browser: {str(e)}") 
\ No newline at end of file
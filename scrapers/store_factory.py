@@ -1,96 +1,134 @@
-from typing import Dict, List, Optional, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, wait
 import logging
-from queue import Queue
 from threading import Lock
 
 from .base.base_scraper import BaseScraper
 from config.stores import STORE_CONFIGS, STORE_CATEGORIES
+from utils.http_client import get_http_client
+from utils.rate_limiter import RateLimiter, get_rate_limiter
+from utils.result_cache import ResultCache, get_result_cache, make_key
+from utils.session_warmer import get_session_warmer
+from utils.metrics import Metrics, STAGE_QUEUE, STAGE_RATE_LIMIT, get_metrics
+from utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from utils.product import Product, ProductBatch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_DEADLINE = 30.0  # Seconds a multi-store search waits before returning the results it has
+
 class StoreFactory:
-    def __init__(self, max_workers: int = 8):
+    def __init__(self,
+                 max_workers: int = 8,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[Metrics] = None):
         """
         Initialize the store factory with a thread pool.
         
         Args:
             max_workers: Maximum number of concurrent threads (default: 8)
+            rate_limiter: Per-host rate limiter (default: the shared limiter)
+            result_cache: Cache of parsed results (default: the shared cache)
+            metrics: Per-stage latency registry (default: the shared registry)
         """
         self.stores: Dict[str, BaseScraper] = {}
         self.max_workers = max_workers
+        
+        # Initialize rate limiting (one token bucket per store host)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        
+        # Parsed results per (store, query); hits skip fetching and parsing
+        self.result_cache = result_cache or get_result_cache()
+        
+        # Queue, rate-limit and per-request stage times of every store search
+        self.metrics = metrics or get_metrics()
+        
         self._initialize_stores()
         
         # Initialize thread pool
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         
-        # Initialize rate limiting
-        self.rate_limit_queue = Queue()
-        self.rate_limit_lock = Lock()
-        
         # Initialize result collection
         self.results_lock = Lock()
-        self.results: List[Dict[str, Any]] = []
+        self.results: List[Product] = []
 
     def _initialize_stores(self):
         """Initialize all store scrapers."""
         for store_id, config in STORE_CONFIGS.items():
-            self.stores[store_id] = BaseScraper(config)
-
-    def _rate_limit(self, store_id: str):
-        """Implement rate limiting for store requests."""
-        with self.rate_limit_lock:
-            store = self.stores[store_id]
-            if hasattr(store.store_config, 'rate_limit'):
-                time.sleep(store.store_config.rate_limit)
-            else:
-                time.sleep(0.5)  # Default rate limit
-
-    def _search_store_with_rate_limit(self, store_id: str, query: str) -> Optional[Dict[str, Any]]:
+            self.stores[store_id] = BaseScraper(config, rate_limiter=self.rate_limiter)
+
+    def _rate_limit(self, store_id: str) -> float:
+        """Wait for this store's token bucket; other stores are not blocked."""
+        store_config = self.stores[store_id].store_config
+        waited = self.rate_limiter.acquire(store_config)
+        self.metrics.observe(STAGE_RATE_LIMIT, store_config.name, waited)
+        if waited:
+            logger.debug(f"Waited {waited:.2f}s for rate limit on {store_id}")
+        return waited
+
+    def _search_store_with_rate_limit(self, store_id: str, query: str) -> Optional[Product]:
         """Search a store with rate limiting."""
         try:
             self._rate_limit(store_id)
             return self.stores[store_id].search(query)
+        except CircuitOpenError:
+            raise  # Not a result: must not be cached
         except Exception as e:
             logger.error(f"Error searching {store_id}: {str(e)}")
             return None
 
-    def search_store(self, store_id: str, query: str) -> Optional[Dict[str, Any]]:
-        """Search a specific store by ID."""
+    def search_store(self, store_id: str, query: str, submitted: Optional[float] = None) -> Optional[Product]:
+        """
+        Search a specific store by ID.
+        
+        Args:
+            store_id: Store to search
+            query: Search query
+            submitted: perf_counter() time the search was queued, to record how long it waited for a worker
+        """
         if store_id not in self.stores:
             logger.error(f"Store not found: {store_id}")
             return None
             
-        return self._search_store_with_rate_limit(store_id, query)
+        store_name = self.stores[store_id].store_config.name
+        with self.metrics.trace(store_name, query):
+            if submitted is not None:
+                self.metrics.observe(STAGE_QUEUE, store_name, time.perf_counter() - submitted)
+            return self.result_cache.get_or_compute(
+                make_key(store_id, query),
+                lambda: self._search_store_with_rate_limit(store_id, query)
+            )
 
-    def search_category(self, category: str, query: str) -> List[Dict[str, Any]]:
+    def search_category(self, category: str, query: str, deadline: float = DEFAULT_DEADLINE) -> ProductBatch:
         """Search all stores in a specific category."""
         if category not in STORE_CATEGORIES:
             logger.error(f"Category not found: {category}")
-            return []
+            return ProductBatch()
             
         store_ids = STORE_CATEGORIES[category]
-        return self._search_stores(store_ids, query)
+        return self._search_stores(store_ids, query, deadline)
 
-    def search_all(self, query: str) -> List[Dict[str, Any]]:
+    def search_all(self, query: str, deadline: float = DEFAULT_DEADLINE) -> ProductBatch:
         """Search all stores concurrently using thread pool."""
         self.results = []  # Reset results
         store_ids = list(self.stores.keys())
-        return self._search_stores(store_ids, query)
+        return self._search_stores(store_ids, query, deadline)
 
-    def _search_stores(self, store_ids: List[str], query: str) -> List[Dict[str, Any]]:
+    def _search_stores(self, store_ids: List[str], query: str, deadline: float = DEFAULT_DEADLINE) -> ProductBatch:
         """
         Search multiple stores concurrently with controlled concurrency.
         
         Args:
             store_ids: List of store IDs to search
             query: Search query
+            deadline: Seconds to wait for the slowest stores; whatever has completed by then is returned
             
         Returns:
-            List of search results
+            Best match of each store that found one
         """
         futures = []
         self.results = []
@@ -98,23 +136,55 @@ class StoreFactory:
         # Submit tasks to thread pool
         for store_id in store_ids:
             future = self.executor.submit(
-                self._search_store_with_rate_limit,
+                self.search_store,
                 store_id,
-                query
+                query,
+                time.perf_counter()
             )
             futures.append((store_id, future))
 
-        # Collect results as they complete
+        # One deadline for the whole search, so a slow store cannot hold up the others' results
+        done, _ = wait([future for _, future in futures], timeout=deadline)
         for store_id, future in futures:
+            if future not in done:
+                future.cancel()
+                logger.warning(f"{store_id} did not finish within the {deadline:.1f}s deadline")
+                continue
             try:
-                result = future.result(timeout=30)  # 30 second timeout per store
+                result = future.result()
                 if result:
                     with self.results_lock:
                         self.results.append(result)
+            except CircuitOpenError as e:
+                logger.info(f"Skipped {store_id}: {str(e)}")
             except Exception as e:
                 logger.error(f"Error getting result from {store_id}: {str(e)}")
 
-        return self.results
+        return ProductBatch(self.results)
+
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-host counters of how long requests waited for a token."""
+        return self.rate_limiter.stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters of the parsed-result cache."""
+        return self.result_cache.stats()
+
+    def get_session_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get warm-up cost and session reuse counters of stores that need a warmed session."""
+        return get_session_warmer().stats()
+
+    def get_timeout_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get each store's adaptive request timeout and how often its requests were hedged."""
+        return get_http_client().timeout_stats()
+
+    def get_health_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get each store's circuit state, consecutive failures and seconds until it is retried."""
+        return get_circuit_breaker().stats()
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Get per-store count, mean, p50 and p95 of each search stage, in seconds."""
+        return self.metrics.summary()
 
     def get_store_categories(self) -> Dict[str, List[str]]:
         """Get all store categories and their stores."""
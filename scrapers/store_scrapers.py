@@ -1,49 +1,75 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote
-import re
-from utils.price_utils import extract_price, validate_price, string_similarity
+import httpx
+from functools import partial
+from urllib.parse import quote, urlencode
+from utils.price_rules import get_price_rules
+from utils.price_parser import NO_PRICE, parse_many
+from utils.title_matcher import match_scores
+from utils.http_client import get_http_client
+from utils.extraction import build_extractor
+from utils.debug_capture import get_debug_capture
+from utils.rate_limiter import get_rate_limiter
+from utils.circuit_breaker import get_circuit_breaker, is_failure_status
+from utils.session_warmer import BLOCKED_BODY, BLOCKED_PAGE
+from utils.product import Product
+from utils.metrics import STAGE_MATCH, STAGE_PARSE, STAGE_RATE_LIMIT, STAGE_VALIDATE, get_metrics
+from config.stores import STORE_CONFIGS
 import random
-import time
 
 class StoreScrapers:
-    def __init__(self):
-        self.stores = [
-            'Bol.com', 'Amazon.nl', 'Coolblue.nl', 'MediaMarkt.nl', 'Tweakers.net',
-            'Wehkamp.nl', 'BCC.nl', 'Alternate.nl', 'Azerty.nl', 'GameMania.nl',
-            'Bart Smit', 'Intertoys', 'Playsi.nl', '4Launch.nl', 'Centralpoint.nl',
-            'Videoland.nl', 'Nedgame.nl', 'Game Mania', 'GameStop.nl',
-            'Dreamland.nl', 'Toys XL', 'ToyChamp', 'Beslist.nl'
-        ]
+    def __init__(self, http_client=None, store_configs=None, rate_limiter=None, browser_pool=None, parse_pool=None,
+                 debug_capture=None, metrics=None, circuit_breaker=None, price_rules=None):
+        """
+        Search engine for every store defined in config.stores.
+
+        Each store is data (a StoreConfig with selectors, pagination, price
+        format and whether it needs JavaScript); the fetch, parse, rank and
+        validate steps below are shared, so adding a store only takes a config
+        entry. Stores without a container selector (API-only) are left out.
+
+        With a parse_pool (utils.parse_pool.ParsePool), pages are fetched
+        undecoded and parsed in worker processes, so parsing one store's page
+        does not hold the GIL while other stores are being fetched.
+
+        Every search is traced per stage (rate limit, network, parse, match,
+        validate) in metrics (default: the shared utils.metrics registry);
+        pages parsed in the pool record parse and match together as parse.
+
+        Anti-bot pages, 403/429/5xx responses and request errors count against
+        the store's circuit breaker (default: the shared one); while it is
+        open, search() raises CircuitOpenError without sending a request.
+
+        The best match is the most similar candidate whose price is plausible
+        for the query's category and not an outlier among the other
+        candidates' prices (price_rules, default: the shared
+        utils.price_rules rules built from config.price_rules).
+        """
+        # Shared connection pool instead of a new connection per request
+        self.http = http_client or get_http_client()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._browser_pool = browser_pool
+        self.parse_pool = parse_pool
+        self.debug_capture = debug_capture or get_debug_capture()
+        self.metrics = metrics or get_metrics()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker()
+        self.price_rules = price_rules or get_price_rules()
+        configs = STORE_CONFIGS if store_configs is None else store_configs
+        # Selectors are compiled once per store and run directly on the lxml tree
+        self.extractors = {}
+        self.store_configs = {}
+        for store_id, config in configs.items():
+            extractor = build_extractor(config.selectors)
+            if extractor is not None:
+                self.extractors[store_id] = extractor
+                self.store_configs[store_id] = config
+        self.stores = [config.name for config in self.store_configs.values()]
 
     def get_store_list(self):
         return self.stores
 
     def get_search_functions(self):
         return {
-            'Bol.com': self.search_bol,
-            'Amazon.nl': self.search_amazon,
-            'Coolblue.nl': self.search_coolblue,
-            'MediaMarkt.nl': self.search_mediamarkt,
-            'Tweakers.net': self.search_tweakers,
-            'Wehkamp.nl': self.search_wehkamp,
-            'BCC.nl': self.search_bcc,
-            'Alternate.nl': self.search_alternate,
-            'Azerty.nl': self.search_azerty,
-            'GameMania.nl': self.search_gamemania,
-            'Bart Smit': self.search_bart_smit,
-            'Intertoys': self.search_intertoys,
-            'Playsi.nl': self.search_playsi,
-            '4Launch.nl': self.search_4launch,
-            'Centralpoint.nl': self.search_centralpoint,
-            'Videoland.nl': self.search_videoland,
-            'Nedgame.nl': self.search_nedgame,
-            'Game Mania': self.search_gamemania,
-            'GameStop.nl': self.search_gamestop,
-            'Dreamland.nl': self.search_dreamland,
-            'Toys XL': self.search_toys_xl,
-            'ToyChamp': self.search_toychamp,
-            'Beslist.nl': self.search_beslist
+            config.name: partial(self.search, store_id)
+            for store_id, config in self.store_configs.items()
         }
 
     def get_headers(self):
@@ -61,20 +87,6 @@ class StoreScrapers:
             'Cache-Control': 'max-age=0'
         }
 
-    def make_request(self, url, headers=None, verify=True):
-        try:
-            if headers is None:
-                headers = self.get_headers()
-            response = requests.get(url, headers=headers, verify=verify, timeout=10)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            print(f"Request error for {url}: {str(e)}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error for {url}: {str(e)}")
-            return None
-
     def get_random_user_agent(self):
         """Get a random User-Agent string to avoid detection."""
         user_agents = [
@@ -86,405 +98,232 @@ class StoreScrapers:
         ]
         return random.choice(user_agents)
 
-    def search_bol(self, product):
-        try:
-            url = f"https://www.bol.com/nl/nl/s/?searchtext={quote(product)}"
-            response = self.make_request(url)
-            if not response:
-                return None
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            products = []
-            for item in soup.find_all('li', class_='product-item--row'):
-                title_elem = item.find('a', class_='product-title')
-                price_elem = item.find('span', class_='promo-price')
-                desc_elem = item.find('p', class_='product-description')
-                
-                if title_elem and price_elem:
-                    title = title_elem.text.strip()
-                    price = price_elem.text.strip()
-                    description = desc_elem.text.strip() if desc_elem else ""
-                    link = title_elem['href'] if title_elem else None
-                    if link and not link.startswith('http'):
-                        link = 'https://www.bol.com' + link
-                    
-                    similarity = string_similarity(product, title)
-                    
-                    products.append({
-                        'title': title,
-                        'price': price,
-                        'description': description,
-                        'similarity': similarity,
-                        'link': link
-                    })
-            
-            if products:
-                products.sort(key=lambda x: x['similarity'], reverse=True)
-                best_match = products[0]
-                
-                price_value = extract_price(best_match['price'])
-                if validate_price(price_value, product):
-                    return {
-                        'store': 'Bol.com',
-                        'price': best_match['price'],
-                        'title': best_match['title'],
-                        'description': best_match['description'],
-                        'link': best_match['link']
-                    }
-                else:
-                    for product in products[1:]:
-                        price_value = extract_price(product['price'])
-                        if validate_price(price_value, product):
-                            return {
-                                'store': 'Bol.com',
-                                'price': product['price'],
-                                'title': product['title'],
-                                'description': product['description'],
-                                'link': product['link']
-                            }
-            
-            return None
-        except Exception as e:
-            print(f"Bol.com error: {str(e)}")
-            return None
+    def _page_urls(self, config, product):
+        """Search URLs of the pages to fetch, following the store's pagination."""
+        url = config.search_url.format(query=quote(product))
+        pagination = config.pagination or {}
+        start = pagination.get('start', 1)
+        for page in range(start, start + pagination.get('max_pages', 1)):
+            if page == start:
+                yield url
+            else:
+                separator = '&' if '?' in url else '?'
+                yield f"{url}{separator}{urlencode({pagination.get('param', 'page'): page})}"
 
-    def search_amazon(self, product):
-        try:
-            # Clean and normalize the search query
-            search_query = product.lower().strip()
-            url = f"https://www.amazon.nl/s?k={quote(search_query)}"
-            
-            headers = {
-                'User-Agent': self.get_random_user_agent(),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'nl-NL,nl;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-                'DNT': '1',
-                'sec-ch-ua': '"Chromium";v="122", "Not(A:Brand";v="24", "Google Chrome";v="122"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"Windows"'
-            }
-            
-            # Add random delay between 1-3 seconds
-            time.sleep(random.uniform(1, 3))
-            
-            # First try with regular request
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            # Check for CAPTCHA or other blocking
-            if 'captcha' in response.text.lower() or 'robot check' in response.text.lower():
-                print("Amazon CAPTCHA detected, trying with session...")
-                session = requests.Session()
-                response = session.get(url, headers=headers, timeout=10)
-            
-            # If we get a 503 or other error, try with session
-            if response.status_code in [503, 429, 403]:
-                print(f"Amazon returned status code {response.status_code}, retrying with session...")
-                session = requests.Session()
-                response = session.get(url, headers=headers, timeout=10)
-            
-            if not response or response.status_code != 200:
-                print(f"Amazon error: Status code {response.status_code if response else 'None'}")
-                return None
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try different product containers
-            product_containers = [
-                soup.find_all('div', class_='s-result-item'),
-                soup.find_all('div', class_='s-card-container'),
-                soup.find_all('div', {'data-component-type': 's-search-result'}),
-                soup.find_all('div', class_='s-result-item s-asin'),
-                soup.find_all('div', class_='s-result-item s-asin s-grid-view-item')
-            ]
-            
-            products = []
-            for container in product_containers:
-                for item in container:
-                    # Skip sponsored items
-                    if item.find('span', class_='a-color-secondary', string=lambda x: x and 'sponsored' in x.lower()):
-                        continue
-                    
-                    # Try different title selectors
-                    title_elem = (
-                        item.find('span', class_='a-text-normal') or
-                        item.find('h2', class_='a-size-mini') or
-                        item.find('h2', class_='a-size-base') or
-                        item.find('h2', class_='a-size-medium') or
-                        item.find('h2', class_='a-size-large') or
-                        item.find('h2', class_='a-size-small') or
-                        item.find('h2', class_='a-size-base-plus') or
-                        item.find('h2', class_='a-size-medium-plus')
-                    )
-                    
-                    # Try different link selectors
-                    link_elem = (
-                        item.find('a', class_='a-link-normal') or
-                        item.find('a', class_='a-link-normal s-no-outline') or
-                        item.find('a', class_='a-link-normal s-underline-text') or
-                        item.find('a', class_='a-link-normal s-navigation-item') or
-                        item.find('a', class_='a-link-normal s-underline-text s-underline-link-text')
-                    )
-                    
-                    if not title_elem or not link_elem:
-                        continue
-                        
-                    title = title_elem.text.strip()
-                    link = link_elem['href'] if link_elem else None
-                    if link and not link.startswith('http'):
-                        link = 'https://www.amazon.nl' + link
-                    
-                    # Try different price selectors
-                    price = None
-                    price_selectors = [
-                        ('span', 'a-price-whole'),
-                        ('span', 'a-price'),
-                        ('span', 'a-offscreen'),
-                        ('span', 'a-color-price'),
-                        ('span', 'a-price a-text-price'),
-                        ('span', 'a-price a-text-normal'),
-                        ('span', 'a-price-nowrap'),
-                        ('span', 'a-price a-text-price a-size-base'),
-                        ('span', 'a-price a-text-price a-size-medium'),
-                        ('span', 'a-price a-text-price a-size-large'),
-                        ('span', 'a-price a-text-price a-size-small'),
-                        ('span', 'a-price a-text-price a-size-medium a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-base a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-small a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-base a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-small a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-large a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-medium a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-base a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-small a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-base a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-small a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-large a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-medium a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-base a-color-secondary'),
-                        ('span', 'a-price a-text-price a-size-small a-color-secondary')
-                    ]
-                    
-                    for tag, class_name in price_selectors:
-                        price_elem = item.find(tag, class_=class_name)
-                        if price_elem:
-                            price = price_elem.text.strip()
-                            break
-                    
-                    # If no price found, try to find the lowest price from multiple sellers
-                    if not price:
-                        price_elem = item.find('div', class_='a-row a-size-base a-color-secondary')
-                        if price_elem:
-                            price = price_elem.text.strip()
-                    
-                    # If still no price, try to find the price in the product details
-                    if not price:
-                        price_elem = item.find('div', class_='a-section a-spacing-none a-spacing-top-micro')
-                        if price_elem:
-                            price = price_elem.text.strip()
-                    
-                    # Clean up price string
-                    if price:
-                        # Handle "from" prices
-                        if 'vanaf' in price.lower() or 'from' in price.lower():
-                            price = re.sub(r'vanaf|from', '', price, flags=re.IGNORECASE).strip()
-                        
-                        # Handle price ranges
-                        if '-' in price:
-                            price = price.split('-')[0].strip()
-                        
-                        # Remove currency symbols and clean up the price string
-                        price = re.sub(r'[^\d.]', '', price)
-                        if price:
-                            price = f"€{price}"
-                    
-                    # Calculate similarity with search query
-                    similarity = string_similarity(search_query, title.lower())
-                    
-                    # Boost similarity based on word matches
-                    search_words = set(search_query.split())
-                    title_words = set(title.lower().split())
-                    word_matches = len(search_words.intersection(title_words))
-                    similarity += (word_matches / len(search_words)) * 0.3
-                    
-                    # Boost similarity for exact matches
-                    if search_query in title.lower():
-                        similarity += 0.2
-                    
-                    # Only add products with valid prices
-                    if price:
-                        products.append({
-                            'title': title,
-                            'price': price,
-                            'similarity': min(1.0, similarity),  # Cap similarity at 1.0
-                            'link': link
-                        })
-            
-            # Sort by similarity and find the best match
-            if products:
-                products.sort(key=lambda x: x['similarity'], reverse=True)
-                best_match = products[0]
-                
-                # Validate price
-                price_value = extract_price(best_match['price'])
-                if validate_price(price_value, product):
-                    return {
-                        'store': 'Amazon.nl',
-                        'price': best_match['price'],
-                        'title': best_match['title'],
-                        'description': '',
-                        'link': best_match['link']
-                    }
-                else:
-                    # Try next best match if price is invalid
-                    for product in products[1:]:
-                        price_value = extract_price(product['price'])
-                        if validate_price(price_value, product):
-                            return {
-                                'store': 'Amazon.nl',
-                                'price': product['price'],
-                                'title': product['title'],
-                                'description': '',
-                                'link': product['link']
-                            }
-            
+    def _headers_for(self, config):
+        """Default browser headers, overridden by the store's custom_headers (its User-Agent included)."""
+        headers = self.get_headers()
+        if config.custom_headers:
+            headers.update(config.custom_headers)
+        return headers
+
+    def _render(self, config, url):
+        """Load a page in a pooled headless browser and return the rendered HTML."""
+        # Selenium is only needed for stores that require JavaScript
+        from utils.browser_pool import get_browser_pool
+        pool = self._browser_pool or get_browser_pool(user_agent=self._headers_for(config).get('User-Agent'))
+        with pool.checkout() as driver:
+            driver.get(url)
+            return driver.page_source
+
+    def _rate_limit(self, config):
+        self.metrics.observe(STAGE_RATE_LIMIT, config.name, self.rate_limiter.acquire(config))
+
+    def fetch_raw(self, config, url):
+        """
+        Fetch one search page without decoding it.
+
+        Returns:
+            (body, encoding) with the body as bytes (or rendered HTML and None), or None on failure
+        """
+        self._rate_limit(config)
+        if config.requires_js:
+            html = self._render(config, url)
+            self._record_health(config, 200, bool(BLOCKED_PAGE.search(html)))
+            return html, None
+
+        headers = self._headers_for(config)
+        # A half-open circuit's trial request must reach the store, and is not retried
+        trial = self.circuit_breaker.is_trial(config.name)
+        response = self.http.get(url, store_config=config, headers=headers, use_cache=not trial,
+                                 rate_limiter=self.rate_limiter)
+        body = response.content if response.status_code == 200 else b''
+        if BLOCKED_BODY.search(body) and not trial:
+            print(f"{config.name} anti-bot page detected, retrying with another User-Agent...")
+            headers['User-Agent'] = self.get_random_user_agent()
+            self._rate_limit(config)
+            response = self.http.get(url, store_config=config, headers=headers, use_cache=False,
+                                     rate_limiter=self.rate_limiter)
+            body = response.content if response.status_code == 200 else b''
+        self._record_health(config, response.status_code, bool(BLOCKED_BODY.search(body)))
+
+        if response.status_code != 200:
+            print(f"{config.name} error: Status code {response.status_code}")
             return None
-        except Exception as e:
-            print(f"Amazon error: {str(e)}")
+        return body, response.encoding
+
+    def _record_health(self, config, status_code, blocked):
+        if blocked:
+            self.circuit_breaker.record_failure(config.name, 'anti-bot page')
+        elif is_failure_status(status_code):
+            self.circuit_breaker.record_failure(config.name, f"HTTP {status_code}")
+        else:
+            self.circuit_breaker.record_success(config.name)
+
+    def fetch(self, config, url):
+        """Fetch one search page through the shared client (or a browser); None on failure."""
+        page = self.fetch_raw(config, url)
+        if page is None:
             return None
+        body, encoding = page
+        return body.decode(encoding or 'utf-8', errors='replace') if isinstance(body, bytes) else body
+
+    def _candidates(self, store_id, config, html, query):
+        """Extract the products on one page that have a title, link and parseable price."""
+        with self.metrics.timer(STAGE_PARSE, config.name):
+            candidates = page_products(self.extractors[store_id], config, html)
+        with self.metrics.timer(STAGE_MATCH, config.name):
+            return score_candidates(candidates, query)
+
+    @staticmethod
+    def score_titles(query, titles):
+        """Similarity of each title to the query, boosted for matching words and exact matches."""
+        query = query.lower().strip()
+        search_words = set(query.split())
+        scores = []
+        # All titles on the page are scored against the query in one batch
+        for title, similarity in zip(titles, match_scores(query, titles)):
+            title = title.lower()
+            if search_words:
+                similarity += len(search_words & set(title.split())) / len(search_words) * 0.3
+            if query in title:
+                similarity += 0.2
+            scores.append(min(1.0, similarity))
+        return scores
+
+    def search(self, store_id, product):
+        """
+        Return the best matching product with a plausible price from one store.
+
+        Args:
+            store_id: Key of the store in the store configs
+            product: Search query
+
+        Returns:
+            Dictionary with store, price, title, description and link, or None
+
+        Raises:
+            CircuitOpenError: The store is skipped because its recent searches failed
+        """
+        config = self.store_configs[store_id]
+        self.circuit_breaker.check(config.name)
+        with self.metrics.trace(config.name, product):
+            return self._search(store_id, config, product)
 
-    def search_mediamarkt(self, product):
+    def _search(self, store_id, config, product):
         try:
-            url = f"https://www.mediamarkt.nl/zoeken.html?query={quote(product)}"
-            headers = self.get_headers()
-            response = self.make_request(url, headers=headers)
-            if not response:
-                return None
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            products = []
-            for item in soup.find_all('div', class_='product-wrapper'):
-                title_elem = item.find('div', class_='content')
-                price_elem = item.find('div', class_='price-box')
-                link_elem = item.find('a')
-                
-                if title_elem and price_elem:
-                    title = title_elem.text.strip()
-                    price = price_elem.text.strip()
-                    link = link_elem['href'] if link_elem else None
-                    if link and not link.startswith('http'):
-                        link = 'https://www.mediamarkt.nl' + link
-                    
-                    similarity = string_similarity(product, title)
-                    
-                    products.append({
-                        'title': title,
-                        'price': price,
-                        'similarity': similarity,
-                        'link': link
-                    })
-            
-            if products:
-                products.sort(key=lambda x: x['similarity'], reverse=True)
-                best_match = products[0]
-                
-                price_value = extract_price(best_match['price'])
-                if validate_price(price_value, product):
-                    return {
-                        'store': 'MediaMarkt.nl',
-                        'price': best_match['price'],
-                        'title': best_match['title'],
-                        'description': '',
-                        'link': best_match['link']
-                    }
+            candidates = []
+            for url in self._page_urls(config, product):
+                if self.parse_pool is not None:
+                    fetched = self.fetch_raw(config, url)
+                    if not fetched or not fetched[0]:
+                        break
+                    html, encoding = fetched
+                    with self.metrics.timer(STAGE_PARSE, config.name):
+                        page = self.parse_pool.parse(parse_page, html, store_id, config, product, encoding=encoding)
                 else:
-                    for product in products[1:]:
-                        price_value = extract_price(product['price'])
-                        if validate_price(price_value, product):
-                            return {
-                                'store': 'MediaMarkt.nl',
-                                'price': product['price'],
-                                'title': product['title'],
-                                'description': '',
-                                'link': product['link']
-                            }
-            
-            return None
-        except Exception as e:
-            print(f"MediaMarkt error: {str(e)}")
-            return None
+                    html = self.fetch(config, url)
+                    if not html:
+                        break
+                    page = self._candidates(store_id, config, html, product)
+                # An empty first page is a failure; an empty later page just ends the pagination
+                self.debug_capture.capture(config.name, url, html, failed=not page and not candidates,
+                                           reason='no products')
+                if not page:
+                    break
+                candidates.extend(page)
 
-    def search_gamemania(self, product):
-        try:
-            url = f"https://www.gamemania.nl/zoeken?q={quote(product)}"
-            headers = self.get_headers()
-            response = self.make_request(url, headers=headers, verify=False)
-            if not response:
+            # Best match first; fall back to the next best when the price is implausible
+            candidates.sort(key=lambda x: x['similarity'], reverse=True)
+            with self.metrics.timer(STAGE_VALIDATE, config.name):
+                # The category ranges are in euros
+                plausible = self.price_rules.plausible([c['price_cents'] / 100 for c in candidates], product)
+                best = next((c for c, ok in zip(candidates, plausible) if ok), None)
+            if best is None:
                 return None
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            products = []
-            for item in soup.find_all('div', class_='product-item'):
-                title_elem = item.find('h3', class_='product-title')
-                price_elem = item.find('span', class_='price')
-                link_elem = item.find('a', class_='product-link')
-                
-                if title_elem and price_elem:
-                    title = title_elem.text.strip()
-                    price = price_elem.text.strip()
-                    link = link_elem['href'] if link_elem else None
-                    if link and not link.startswith('http'):
-                        link = 'https://www.gamemania.nl' + link
-                    
-                    similarity = string_similarity(product, title)
-                    
-                    products.append({
-                        'title': title,
-                        'price': price,
-                        'similarity': similarity,
-                        'link': link
-                    })
-            
-            if products:
-                products.sort(key=lambda x: x['similarity'], reverse=True)
-                best_match = products[0]
-                
-                price_value = extract_price(best_match['price'])
-                if validate_price(price_value, product):
-                    return {
-                        'store': 'Game Mania',
-                        'price': best_match['price'],
-                        'title': best_match['title'],
-                        'description': '',
-                        'link': best_match['link']
-                    }
-                else:
-                    for product in products[1:]:
-                        price_value = extract_price(product['price'])
-                        if validate_price(price_value, product):
-                            return {
-                                'store': 'Game Mania',
-                                'price': product['price'],
-                                'title': product['title'],
-                                'description': '',
-                                'link': product['link']
-                            }
-            
+            return Product(
+                store=config.name,
+                title=best['title'],
+                price_cents=best['price_cents'],
+                link=best['link'],
+                description=best['description']
+            )
+        except httpx.HTTPError as e:
+            print(f"Request error for {config.name}: {str(e)}")
+            self.circuit_breaker.record_failure(config.name, type(e).__name__)
             return None
         except Exception as e:
-            print(f"Game Mania error: {str(e)}")
+            print(f"{config.name} error: {str(e)}")
             return None
 
-    # Add all other store search methods here...
-    # (The rest of the store search methods would be added here, following the same pattern) 
\ No newline at end of file
+
+def page_candidates(extractor, config, html, query):
+    """Extract the products on one page that have a title, link and parseable price."""
+    return score_candidates(page_products(extractor, config, html), query)
+
+
+def page_products(extractor, config, html):
+    """Products on one page with a title, link and parseable price, not yet scored against the query."""
+    skip_keywords = [keyword.lower() for keyword in config.skip_keywords or []]
+    items = []
+    for item in extractor.products(html):
+        # Skip sponsored items and the like
+        if skip_keywords and any(
+            keyword in text.lower() for text in item.get('skip', []) for keyword in skip_keywords
+        ):
+            continue
+
+        if item['title'] is None or item.get('price') is None or not item.get('link'):
+            continue
+        items.append(item)
+
+    # All prices of the page in one pass
+    candidates = []
+    for item, cents in zip(items, parse_many([item['price'] for item in items], config.price_format)):
+        if cents == NO_PRICE:
+            continue
+
+        title = item['title'].strip()
+        link = item['link']
+        if not link.startswith('http'):
+            link = f"{config.base_url.rstrip('/')}/{link.lstrip('/')}"
+        description = item.get('description')
+
+        candidates.append({
+            'title': title,
+            'price_cents': cents,
+            'description': description.strip() if description is not None else '',
+            'link': link
+        })
+
+    return candidates
+
+
+def score_candidates(candidates, query):
+    """Add each candidate's similarity to the query."""
+    for candidate, similarity in zip(candidates, StoreScrapers.score_titles(query, [c['title'] for c in candidates])):
+        candidate['similarity'] = similarity
+    return candidates
+
+
+# Extractors compiled in this process, for pages parsed in parse pool workers
+_page_extractors = {}
+
+
+def parse_page(html, store_id, config, query):
+    """Parse one search page into candidates; runs in a parse pool worker, which compiles each store's selectors once."""
+    key = (store_id, repr(config.selectors))
+    extractor = _page_extractors.get(key)
+    if extractor is None:
+        extractor = _page_extractors[key] = build_extractor(config.selectors)
+    return page_candidates(extractor, config, html, query)
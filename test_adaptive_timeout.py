@@ -0,0 +1,122 @@
+import time
+import logging
+import threading
+import httpx
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.stores import StoreConfig
+from utils.adaptive_timeout import AdaptiveTimeouts
+from utils.http_client import AsyncHttpClient, SyncHttpClient
+from utils.metrics import Metrics
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class StallingHandler(BaseHTTPRequestHandler):
+    """Stalls the first request for each URL for a second; answers repeats at once."""
+    protocol_version = 'HTTP/1.1'
+    seen = set()
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            StallingHandler.requests += 1
+            stall = self.path not in StallingHandler.seen
+            StallingHandler.seen.add(self.path)
+        if stall:
+            time.sleep(1.0)
+        body = b'<html>ok</html>'
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # The client gave up on this copy
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    StallingHandler.seen.clear()
+    StallingHandler.requests = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StallingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_config(base_url, **overrides):
+    return StoreConfig(name='Shop', base_url=base_url, search_url=base_url + '/s?q={query}', selectors={},
+                       cache_ttl=0, **overrides)
+
+def primed(store, seconds=0.01, **kwargs):
+    timeouts = AdaptiveTimeouts(**kwargs)
+    for _ in range(timeouts.min_samples):
+        timeouts.record(store, seconds)
+    return timeouts
+
+def test_timeouts_follow_observed_latency():
+    timeouts = AdaptiveTimeouts(default_timeout=10.0, min_timeout=0.5, max_timeout=8.0, min_samples=5)
+    assert timeouts.timeout_for('Shop') == 10.0
+    assert timeouts.hedge_delay('Shop') is None
+
+    for seconds in (0.1, 0.2, 0.2, 0.3, 0.4):
+        timeouts.record('Shop', seconds)
+    assert abs(timeouts.timeout_for('Shop') - 1.2) < 1e-9  # 3 x p99
+    assert timeouts.hedge_delay('Shop') == 0.4
+
+    # Clamped to the bounds, and a store that slows down gets its longer timeout back
+    for _ in range(5):
+        timeouts.record('Shop', 0.01)
+    assert abs(timeouts.timeout_for('Shop') - 1.2) < 1e-9
+    fast = primed('Fast', 0.01, min_timeout=0.5)
+    assert fast.timeout_for('Fast') == 0.5
+    for _ in range(200):
+        fast.record('Fast', 30.0)
+    assert fast.timeout_for('Fast') == fast.max_timeout
+
+    stats = timeouts.stats()['Shop']
+    assert stats['samples'] == 10 and stats['hedged'] == 0
+
+def test_slow_request_is_hedged():
+    server, base_url = start_server()
+    timeouts = primed('Shop')
+    client = SyncHttpClient(AsyncHttpClient(timeouts=timeouts, metrics=Metrics()))
+    config = make_config(base_url)
+    try:
+        start = time.perf_counter()
+        assert client.get(base_url + '/s?q=ps5', store_config=config).text == '<html>ok</html>'
+        with client.stream('GET', base_url + '/s?q=xbox', store_config=config) as response:
+            assert b''.join(response.iter_bytes()) == b'<html>ok</html>'
+        elapsed = time.perf_counter() - start
+        logger.info(f"Two stalled requests answered in {elapsed:.2f}s: {client.timeout_stats()}")
+        assert elapsed < 1.0
+        assert StallingHandler.requests == 4
+        stats = client.timeout_stats()['Shop']
+        assert stats['hedged'] == 2 and stats['hedge_wins'] == 2
+
+        # Stores that opt out are never sent a duplicate
+        assert client.get(base_url + '/s?q=wii', store_config=make_config(base_url, hedge=False)).status_code == 200
+        assert StallingHandler.requests == 5
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_stuck_request_times_out_at_the_adaptive_timeout():
+    server, base_url = start_server()
+    timeouts = primed('Shop', min_timeout=0.2)
+    client = SyncHttpClient(AsyncHttpClient(timeouts=timeouts, metrics=Metrics()))
+    try:
+        start = time.perf_counter()
+        try:
+            client.get(base_url + '/s?q=ps5', store_config=make_config(base_url, hedge=False))
+            assert False, "stalled request did not time out"
+        except httpx.TimeoutException:
+            pass
+        assert time.perf_counter() - start < 0.8
+        # The timeout counts as an observation, so repeated stalls raise the store's timeout
+        assert timeouts.stats()['Shop']['p99'] == 0.2
+    finally:
+        client.close()
+        server.shutdown()
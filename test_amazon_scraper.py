@@ -53,7 +53,7 @@ def test_amazon_scraper():
             for i, result in enumerate(results, 1):
                 print(f"\nProduct {i}:")
                 print(f"Title: {result['title']}")
-                print(f"Price: €{result['price']}")
+                print(f"Price: {result['price']}")
                 print(f"Store: {result['store']}")
                 if result['rating']:
                     print(f"Rating: {result['rating']}/5 ({result['review_count']} reviews)")
@@ -0,0 +1,97 @@
+import io
+import csv
+import json
+import time
+import logging
+import threading
+from batch import BatchRunner, Checkpoint, CsvWriter, JsonLinesWriter, read_queries, main
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class Store:
+    """Fake store search that records how many calls overlap."""
+
+    def __init__(self, name, delay=0.02, fail_on=None):
+        self.name = name
+        self.delay = delay
+        self.fail_on = fail_on
+        self.queries = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, query):
+        with self.lock:
+            self.queries.append(query)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if query == self.fail_on:
+                raise ValueError('boom')
+            if 'none' in query:
+                return None
+            return {'store': self.name, 'price': '€10.00', 'title': f"{query} at {self.name}", 'link': '/p'}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def test_read_queries():
+    lines = ['ps5\n', '\n', '# nightly list\n', '  xbox series x \n', 'ps5\n']
+    assert list(read_queries(lines)) == ['ps5', 'xbox series x']
+
+def test_concurrency_limits_and_rows():
+    stores = {'a': Store('A'), 'b': Store('B', fail_on='query 3'), 'c': Store('C', delay=0.05)}
+    runner = BatchRunner(stores, concurrency=4, per_store={'a': 3, 'b': 1, 'c': 2})
+    output = io.StringIO()
+    queries = [f"query {i}" for i in range(20)] + ['none here']
+
+    counts = runner.run(queries, JsonLinesWriter(output))
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    logger.info(f"Counts: {counts}, peaks: {[(s.name, s.peak) for s in stores.values()]}")
+
+    assert counts['queries'] == 21
+    assert len(rows) == 21 * 3
+    assert stores['a'].peak <= 3 and stores['b'].peak == 1 and stores['c'].peak <= 2
+    assert sum(store.peak for store in stores.values()) > 1
+    assert {(row['query'], row['store']) for row in rows} == {(q, s) for q in queries for s in stores}
+
+    statuses = {(row['query'], row['store']): row['status'] for row in rows}
+    assert statuses[('query 3', 'b')] == 'error'
+    assert statuses[('none here', 'a')] == 'not_found'
+    assert statuses[('query 0', 'c')] == 'found'
+    # A query's rows are written together
+    assert len({row['query'] for row in rows[:3]}) == 1
+
+def test_resume_from_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'run.checkpoint'))
+    store = Store('A', delay=0)
+    runner = BatchRunner({'a': store}, concurrency=2)
+
+    runner.run(['ps5', 'xbox'], JsonLinesWriter(io.StringIO()), checkpoint)
+    checkpoint.close()
+    # A line cut off by a crash is ignored
+    with open(tmp_path / 'run.checkpoint', 'a', encoding='utf-8') as f:
+        f.write('"switch')
+
+    checkpoint = Checkpoint(str(tmp_path / 'run.checkpoint'))
+    assert 'ps5' in checkpoint and 'xbox' in checkpoint and len(checkpoint) == 2
+    counts = runner.run(['ps5', 'xbox', 'switch'], JsonLinesWriter(io.StringIO()), checkpoint)
+    assert counts['queries'] == 1 and counts['skipped'] == 2
+    assert store.queries.count('ps5') == 1 and store.queries.count('switch') == 1
+
+def test_csv_output():
+    output = io.StringIO()
+    BatchRunner({'a': Store('A', delay=0)}).run(['ps5'], CsvWriter(output))
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert len(rows) == 1
+    assert rows[0]['query'] == 'ps5' and rows[0]['status'] == 'found' and rows[0]['price'] == '€10.00'
+
+def test_cli_rejects_unknown_store():
+    try:
+        main(['-', '--stores', 'example.com'])
+        assert False, "unknown store accepted"
+    except SystemExit as e:
+        assert e.code == 2
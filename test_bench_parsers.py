@@ -0,0 +1,55 @@
+import logging
+from dataclasses import replace
+from benchmarks.bench_parsers import DEFAULT_FIXTURES, QUERY, _FakeHttp, compare, run_benchmarks
+from config.stores import STORE_CONFIGS
+from scrapers.store_scrapers import StoreScrapers
+from utils.rate_limiter import RateLimiter
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def test_fixtures_replay_through_parsers():
+    results = run_benchmarks(
+        DEFAULT_FIXTURES,
+        iterations=1,
+        only=['amazon_scraper', 'hema_scraper', 'marktplaats_scraper', 'base_parse_product', 'store_scrapers.bol']
+    )
+    assert len(results) == 5
+    for name, result in results.items():
+        assert 'error' not in result, result
+        logger.info(f"{name}: {result['products']} products, {result['ms_per_page']:.1f} ms/page")
+        assert result['products'] > 0, name
+        assert result['ms_per_page'] > 0
+        assert result['peak_kb'] > 0
+
+def test_fake_http_serves_store_scrapers():
+    # The replayed page must reach the parser, not fail inside the fetch layer
+    with open(DEFAULT_FIXTURES['bol'], encoding='utf-8') as f:
+        html = f.read()
+    configs = {'bol.com': replace(STORE_CONFIGS['bol.com'], rate_limit=0)}
+    scrapers = StoreScrapers(http_client=_FakeHttp(html), store_configs=configs, rate_limiter=RateLimiter())
+    assert scrapers.search('bol.com', QUERY) is not None
+
+def test_compare_flags_regressions():
+    baseline = {'hema_scraper': {'ms_per_page': 10.0, 'peak_kb': 1000.0, 'products': 48}}
+
+    within = {'hema_scraper': {'ms_per_page': 12.0, 'peak_kb': 1100.0, 'products': 48}}
+    assert compare(within, baseline, tolerance=0.25) == []
+
+    slower = {'hema_scraper': {'ms_per_page': 13.0, 'peak_kb': 1000.0, 'products': 48}}
+    assert len(compare(slower, baseline, tolerance=0.25)) == 1
+
+    fewer = {'hema_scraper': {'ms_per_page': 10.0, 'peak_kb': 1000.0, 'products': 40}}
+    assert len(compare(fewer, baseline, tolerance=0.25)) == 1
+
+    # A case that failed is a regression even without a baseline entry
+    assert len(compare({'new_case': {'error': 'AttributeError: content'}}, baseline)) == 1
+
+    # Cases missing from the baseline are not compared
+    assert compare({'new_case': within['hema_scraper']}, baseline) == []
+
+if __name__ == "__main__":
+    test_fixtures_replay_through_parsers()
+    test_fake_http_serves_store_scrapers()
+    test_compare_flags_regressions()
@@ -0,0 +1,90 @@
+import logging
+import threading
+import pytest
+from selenium.common.exceptions import WebDriverException
+from utils.browser_pool import BrowserPool
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class FakeDriver:
+    """Stands in for a Chrome WebDriver so the pool can be tested without a browser."""
+    started = 0
+
+    def __init__(self):
+        FakeDriver.started += 1
+        self.quit_called = False
+        self.pages = []
+
+    def get(self, url):
+        self.pages.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+def make_pool(**kwargs):
+    FakeDriver.started = 0
+    return BrowserPool(FakeDriver, **kwargs)
+
+def test_browsers_are_reused():
+    pool = make_pool(size=2)
+    for _ in range(5):
+        with pool.checkout() as driver:
+            driver.get('https://www.mediamarkt.nl/nl/search.html?query=ipad')
+
+    assert FakeDriver.started == 1
+    assert driver.pages[-1] == 'about:blank'
+    assert pool.stats()['checkouts'] == 5
+
+def test_pool_size_is_bounded():
+    pool = make_pool(size=2, checkout_timeout=5)
+    release = threading.Event()
+    alive = []
+
+    def search():
+        with pool.checkout():
+            alive.append(pool.stats()['alive'])
+            release.wait(timeout=1)
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(alive) == 4
+    assert FakeDriver.started == 2
+    assert max(alive) == 2
+
+def test_browsers_are_recycled_after_max_uses():
+    pool = make_pool(size=1, max_uses=3)
+    drivers = []
+    for _ in range(4):
+        with pool.checkout() as driver:
+            drivers.append(driver)
+
+    assert drivers[0] is drivers[2]
+    assert drivers[3] is not drivers[0]
+    assert drivers[0].quit_called
+    assert pool.stats()['recycled'] == 1
+
+def test_crashed_browsers_are_replaced():
+    pool = make_pool(size=1)
+    with pytest.raises(WebDriverException):
+        with pool.checkout() as crashed:
+            raise WebDriverException("tab crashed")
+
+    with pool.checkout() as driver:
+        assert driver is not crashed
+    assert crashed.quit_called
+    assert pool.stats()['crashed'] == 1
+
+def test_warm_state_is_per_browser():
+    pool = make_pool(size=1)
+    with pool.checkout() as driver:
+        assert not pool.is_warmed(driver, 'https://www.amazon.nl')
+        pool.mark_warmed(driver, 'https://www.amazon.nl')
+    with pool.checkout() as driver:
+        assert pool.is_warmed(driver, 'https://www.amazon.nl')
@@ -0,0 +1,178 @@
+import time
+import logging
+import tempfile
+import threading
+from dataclasses import replace
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from scrapers.search_engine import SearchEngine, STATUS_FOUND, STATUS_UNAVAILABLE
+from scrapers.store_scrapers import StoreScrapers
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+from utils.debug_capture import DebugCapture, MODE_OFF
+from utils.http_cache import HttpCache
+from utils.http_client import AsyncHttpClient, SyncHttpClient
+from utils.rate_limiter import RateLimiter
+from test_store_scrapers import make_config
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PAGE = b'<ul><li class="item"><a class="name" href="/p/1">PlayStation 5 Console</a><span class="cost">\xe2\x82\xac 449,99</span></li></ul>'
+CAPTCHA = b'<html><form action="/errors/validateCaptcha">Type the characters</form></html>'
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Serves a captcha page while blocked is set, the search page otherwise."""
+    protocol_version = 'HTTP/1.1'
+    blocked = True
+    requests = 0
+
+    def do_GET(self):
+        FlakyHandler.requests += 1
+        body = CAPTCHA if FlakyHandler.blocked else PAGE
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    FlakyHandler.blocked = True
+    FlakyHandler.requests = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_circuit_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1, max_reset_timeout=0.3)
+    states = []
+    breaker.subscribe(lambda store, state: states.append(state))
+
+    breaker.record_failure('Shop', 'HTTP 503')
+    assert breaker.allow('Shop')
+    breaker.record_failure('Shop', 'HTTP 503')
+    assert breaker.state('Shop') == STATE_OPEN
+    assert not breaker.allow('Shop')
+    try:
+        breaker.check('Shop')
+        assert False, "open circuit did not raise"
+    except CircuitOpenError as e:
+        assert e.store == 'Shop' and 0 < e.retry_in <= 0.1
+
+    # After the cool-down one trial is let through; a failed trial doubles the cool-down
+    time.sleep(0.12)
+    assert breaker.allow('Shop') and breaker.is_trial('Shop')
+    assert not breaker.allow('Shop')
+    breaker.record_failure('Shop', 'anti-bot page')
+    assert breaker.state('Shop') == STATE_OPEN and breaker.retry_in('Shop') > 0.1
+
+    time.sleep(0.22)
+    assert breaker.state('Shop') == STATE_HALF_OPEN
+    assert breaker.allow('Shop')
+    breaker.record_success('Shop')
+    assert breaker.state('Shop') == STATE_CLOSED
+    assert states == [STATE_OPEN, STATE_HALF_OPEN, STATE_OPEN, STATE_HALF_OPEN, STATE_CLOSED]
+
+    stats = breaker.stats()['Shop']
+    assert stats['opened'] == 2 and stats['skipped'] == 3 and stats['last_failure'] == 'anti-bot page'
+
+def test_blocked_store_is_skipped_without_requests():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.2)
+    scrapers = StoreScrapers(
+        http_client=client,
+        store_configs={'shop': make_config(base_url)},
+        rate_limiter=RateLimiter(),
+        circuit_breaker=breaker,
+        debug_capture=DebugCapture(mode=MODE_OFF)
+    )
+    try:
+        for _ in range(3):
+            assert scrapers.search('shop', 'PlayStation 5 Console') is None
+        # Each blocked search was retried once with another User-Agent
+        assert FlakyHandler.requests == 6
+        assert breaker.state('Local Shop') == STATE_OPEN
+
+        try:
+            scrapers.search('shop', 'PlayStation 5 Console')
+            assert False, "open circuit did not raise"
+        except CircuitOpenError:
+            pass
+        assert FlakyHandler.requests == 6
+
+        # The store recovers: a single trial request closes the circuit again
+        FlakyHandler.blocked = False
+        time.sleep(0.22)
+        assert scrapers.search('shop', 'PlayStation 5 Console')['price'] == '€449.99'
+        assert FlakyHandler.requests == 7
+        assert breaker.state('Local Shop') == STATE_CLOSED
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_trial_request_skips_the_response_cache(tmp_path):
+    server, base_url = start_server()
+    client = SyncHttpClient(AsyncHttpClient(cache=HttpCache(str(tmp_path / 'http_cache.sqlite3'))))
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    scrapers = StoreScrapers(
+        http_client=client,
+        store_configs={'shop': replace(make_config(base_url), cache_ttl=60)},
+        rate_limiter=RateLimiter(),
+        circuit_breaker=breaker,
+        debug_capture=DebugCapture(mode=MODE_OFF)
+    )
+    try:
+        # A good page is cached, then the store starts blocking every other search
+        FlakyHandler.blocked = False
+        assert scrapers.search('shop', 'PlayStation 5 Console')['price'] == '€449.99'
+        FlakyHandler.blocked = True
+        for _ in range(2):
+            assert scrapers.search('shop', 'Xbox Series X') is None
+        assert breaker.state('Local Shop') == STATE_OPEN
+        requests = FlakyHandler.requests
+
+        # The trial asks the store itself instead of replaying the cached page, so the circuit stays open
+        time.sleep(0.22)
+        assert scrapers.search('shop', 'PlayStation 5 Console') is None
+        assert FlakyHandler.requests == requests + 1
+        assert breaker.state('Local Shop') == STATE_OPEN
+
+        # Once closed again, searches use the cache as before
+        FlakyHandler.blocked = False
+        time.sleep(0.42)
+        assert scrapers.search('shop', 'PlayStation 5 Console')['price'] == '€449.99'
+        assert breaker.state('Local Shop') == STATE_CLOSED
+        assert scrapers.search('shop', 'PlayStation 5 Console')['price'] == '€449.99'
+        assert FlakyHandler.requests == requests + 2
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_engine_reports_unavailable_stores():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure('Down', 'HTTP 503')
+
+    def down(query):
+        breaker.check('Down')
+        return {'store': 'Down'}
+
+    engine = SearchEngine(max_concurrency=2)
+    statuses = {}
+    results = engine.run(
+        {'Up': lambda query: {'store': 'Up'}, 'Down': down},
+        "ps5",
+        on_result=lambda store, status, result: statuses.__setitem__(store, status)
+    )
+    assert results == {'Up': {'store': 'Up'}, 'Down': None}
+    assert statuses == {'Up': STATUS_FOUND, 'Down': STATUS_UNAVAILABLE}
+    engine.shutdown()
+
+if __name__ == "__main__":
+    test_circuit_opens_and_recovers()
+    test_blocked_store_is_skipped_without_requests()
+    test_trial_request_skips_the_response_cache(Path(tempfile.mkdtemp()))
+    test_engine_reports_unavailable_stores()
@@ -0,0 +1,127 @@
+import os
+import gzip
+import time
+import random
+import logging
+from threading import Event
+from utils.debug_capture import DebugCapture, MODE_OFF, MODE_SAMPLE, MODE_ON_FAILURE, MODE_ON
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PAGE = '<html><body>' + '<div class="product">PlayStation 5</div>' * 2000 + '</body></html>'
+
+def captures(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.html.gz'))
+
+def test_modes(tmp_path):
+    for mode, expected in [(MODE_OFF, 0), (MODE_ON_FAILURE, 1), (MODE_ON, 2)]:
+        capture = DebugCapture(mode=mode, directory=str(tmp_path / mode))
+        capture.capture('Bol.com', 'https://www.bol.com/s?q=ps5', PAGE)
+        capture.capture('Bol.com', 'https://www.bol.com/s?q=ps5', PAGE, failed=True, reason='no products')
+        capture.flush()
+        assert capture.stats()['captured'] == expected
+
+    random.seed(3)
+    sampled = DebugCapture(mode=MODE_SAMPLE, sample_rate=0.5, directory=str(tmp_path / 'sample'), queue_size=200)
+    kept = sum(sampled.capture('Bol.com', 'https://www.bol.com', 'x') for _ in range(200))
+    sampled.flush()
+    assert 50 < kept < 150
+    try:
+        DebugCapture(mode='always')
+        assert False, "unknown mode accepted"
+    except ValueError:
+        pass
+
+def test_captures_are_compressed_in_the_background(tmp_path):
+    capture = DebugCapture(mode=MODE_ON, directory=str(tmp_path))
+    start = time.perf_counter()
+    assert capture.capture('Game Mania', 'https://www.gamemania.nl/search?q=ps5', PAGE, failed=True, reason='captcha')
+    logger.info(f"capture() returned after {(time.perf_counter() - start) * 1000:.2f}ms")
+    capture.flush()
+
+    [name] = captures(tmp_path)
+    assert name.startswith('game_mania_')
+    with gzip.open(tmp_path / name, 'rt', encoding='utf-8') as f:
+        header, body = f.read().split('\n', 1)
+    assert 'https://www.gamemania.nl/search?q=ps5' in header and '(captcha)' in header
+    assert body == PAGE
+    assert os.path.getsize(tmp_path / name) < len(PAGE) / 10
+
+def test_ring_buffer_is_bounded(tmp_path):
+    capture = DebugCapture(mode=MODE_ON, directory=str(tmp_path), max_files=3)
+    for i in range(6):
+        capture.capture('shop', f"https://shop.example/{i}", PAGE + str(i))
+    capture.flush()
+    assert len(captures(tmp_path)) == 3
+    assert capture.stats()['evicted'] == 3
+    # The newest captures are kept
+    assert [name.rsplit('_', 1)[1] for name in captures(tmp_path)] == ['4.html.gz', '5.html.gz', '6.html.gz']
+
+    # Existing captures count towards the bounds after a restart, and old ones expire
+    restarted = DebugCapture(mode=MODE_ON, directory=str(tmp_path), max_bytes=10 ** 9, max_age=3600)
+    old = os.path.join(tmp_path, captures(tmp_path)[0])
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+    restarted.capture('shop', 'https://shop.example/7', PAGE)
+    restarted.flush()
+    assert len(captures(tmp_path)) == 3 and not os.path.exists(old)
+
+    by_size = DebugCapture(mode=MODE_ON, directory=str(tmp_path), max_bytes=1)
+    by_size.capture('shop', 'https://shop.example/8', PAGE)
+    by_size.flush()
+    assert captures(tmp_path) == []
+
+def test_captures_are_dropped_when_the_writer_falls_behind(tmp_path):
+    release = Event()
+
+    class SlowCapture(DebugCapture):
+        def _write(self, *args):
+            release.wait(5)
+            super()._write(*args)
+
+    capture = SlowCapture(mode=MODE_ON, directory=str(tmp_path), queue_size=1)
+    results = [capture.capture('shop', f"https://shop.example/{i}", PAGE) for i in range(5)]
+    release.set()
+    capture.flush()
+    stats = capture.stats()
+    logger.info(f"Capture stats: {stats}")
+    assert results[0] and not all(results)
+    assert stats['dropped'] == results.count(False)
+    assert stats['captured'] == results.count(True)
+
+def test_recorder_lets_go_of_pages_that_cannot_be_kept(tmp_path):
+    capture = DebugCapture(mode=MODE_ON_FAILURE, directory=str(tmp_path), max_page_bytes=150)
+    chunks = [PAGE[:100].encode(), PAGE[100:].encode()]
+
+    # Once a page has products its chunks are no longer held
+    succeeded = capture.recorder('shop', 'https://shop.example/ok')
+    stream = succeeded.tee(chunks)
+    next(stream)
+    succeeded.succeeded()
+    assert list(stream) == chunks[1:]
+    assert succeeded._chunks is None and not succeeded.finish()
+
+    # Pages over max_page_bytes are not buffered, even when they fail
+    large = capture.recorder('shop', 'https://shop.example/large')
+    assert list(large.tee(chunks)) == chunks
+    assert not large.finish(failed=True)
+    assert capture.stats()['too_large'] == 1
+
+def test_recorder_keeps_streamed_pages_only_when_needed(tmp_path):
+    capture = DebugCapture(mode=MODE_ON_FAILURE, directory=str(tmp_path))
+    chunks = [PAGE[:100].encode(), PAGE[100:].encode()]
+
+    succeeded = capture.recorder('shop', 'https://shop.example/ok')
+    assert list(succeeded.tee(chunks)) == chunks
+    assert not succeeded.finish()
+
+    failed = capture.recorder('shop', 'https://shop.example/empty')
+    list(failed.tee(chunks))
+    assert failed.finish(failed=True, reason='no products')
+    # finish() only captures once
+    assert not failed.finish(failed=True)
+    capture.flush()
+    [name] = captures(tmp_path)
+    with gzip.open(tmp_path / name, 'rt', encoding='utf-8') as f:
+        assert f.read().split('\n', 1)[1] == PAGE
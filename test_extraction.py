@@ -0,0 +1,134 @@
+import logging
+from utils.extraction import Extractor, Field, LXML_AVAILABLE
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PAGE = """
+<html><head><title>Results</title></head><body>
+<div class="result" data-asin="1">
+  <h2><a href="/dp/1"><span>PlayStation 5 <b>Slim</b></span></a></h2>
+  <span class="a-price"><span class="a-offscreen">€449,00</span></span>
+  <span class="a-color-secondary">Sponsored</span>
+  <i class="a-icon-star">4.5 out of 5 stars</i>128 ratings
+</div>
+<div class="result" data-asin="2">
+  <span class="a-text-normal">DualSense Controller</span>
+  <span class="a-price-whole">69.</span>
+  <a class="a-link-normal" href="https://www.amazon.nl/dp/2">link</a>
+  <span class="a-color-secondary">Free delivery</span>
+  <span class="a-color-secondary">In stock</span>
+</div>
+</body></html>
+"""
+
+def make_extractor(backend):
+    return Extractor(
+        containers=['div.missing', 'div.result'],
+        fields={
+            'title': ['h2 a span', '.a-text-normal'],
+            'price': ['span.a-price-whole', '.a-price .a-offscreen'],
+            'link': Field('h2 a', '.a-link-normal', attr='href'),
+            'secondary': Field('span.a-color-secondary', many=True),
+            'rating': Field('i.a-icon-star', raw=True),
+            'missing': 'span.nothing'
+        },
+        backend=backend
+    )
+
+def extract(backend):
+    extractor = make_extractor(backend)
+    root = extractor.parse(PAGE)
+    assert extractor.page_title(root) == 'Results'
+    products = [extractor.extract(c) for c in extractor.containers(root)]
+    for product in products:
+        rating = product.pop('rating')
+        product['rating_text'] = extractor.text(rating) if rating is not None else None
+        product['review_text'] = extractor.next_text(rating).strip() if rating is not None else None
+    return products
+
+def test_fallbacks_and_values():
+    for backend in ('lxml', 'soup'):
+        first, second = extract(backend)
+        assert first['title'] == 'PlayStation 5 Slim'
+        assert first['price'] == '€449,00'
+        assert first['link'] == '/dp/1'
+        assert first['secondary'] == ['Sponsored']
+        assert first['rating_text'] == '4.5 out of 5 stars'
+        assert first['review_text'] == '128 ratings'
+        assert first['missing'] is None
+
+        assert second['title'] == 'DualSense Controller'
+        assert second['price'] == '69.'
+        assert second['link'] == 'https://www.amazon.nl/dp/2'
+        assert second['secondary'] == ['Free delivery', 'In stock']
+        assert second['rating_text'] is None
+
+def test_backends_agree_on_fixture():
+    with open('amazon_response.html', encoding='utf-8') as f:
+        html = f.read()
+    spec = dict(
+        containers=['div[data-component-type="s-search-result"]', '.s-result-item'],
+        fields={
+            'title': ['h2 a span', '.a-text-normal'],
+            'price': ['span.a-price-whole', '.a-price .a-offscreen'],
+            'link': Field('h2 a', '.a-link-normal', attr='href')
+        }
+    )
+    lxml_products = Extractor(backend='lxml', **spec).products(html)
+    soup_products = Extractor(backend='soup', **spec).products(html)
+    logger.info(f"Extracted {len(lxml_products)} products")
+    assert len(lxml_products) == 60
+    assert lxml_products == soup_products
+
+def test_empty_page():
+    for backend in ('lxml', 'soup'):
+        extractor = make_extractor(backend)
+        assert extractor.products('') == []
+        assert extractor.products('<html><body><p>Geen resultaten</p></body></html>') == []
+
+def test_default_backend():
+    assert make_extractor(None).backend.name == ('lxml' if LXML_AVAILABLE else 'soup')
+
+def chunked(html, size=256):
+    data = html.encode('utf-8')
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+def test_stream_matches_products():
+    with open('amazon_response.html', encoding='utf-8') as f:
+        html = f.read()
+    extractor = Extractor(
+        containers='div[data-component-type="s-search-result"]',
+        fields={'title': ['h2 a span', '.a-text-normal'], 'link': Field('h2 a', '.a-link-normal', attr='href')}
+    )
+    assert list(extractor.stream(chunked(html, 4096))) == extractor.products(html)
+
+    # The fallback container selector runs once the whole page has been read
+    extractor = make_extractor('lxml')
+    streamed = [product['title'] for product in extractor.stream(chunked(PAGE))]
+    assert streamed == [product['title'] for product in extractor.products(PAGE)]
+    assert streamed == ['PlayStation 5 Slim', 'DualSense Controller']
+
+def test_stream_stops_reading_early():
+    chunks = chunked(PAGE, 64)
+    extractor = Extractor(containers='div.result', fields={'title': ['h2 a span', '.a-text-normal']})
+    stream = extractor.stream(chunks)
+    assert next(stream)['title'] == 'PlayStation 5 Slim'
+    stream.close()
+    # Closing the stream closes the chunk source, so nothing more is downloaded
+    assert next(chunks, None) is None
+
+def test_stream_empty_body():
+    for backend in ('lxml', 'soup'):
+        assert list(make_extractor(backend).stream(iter([]))) == []
+        assert list(make_extractor(backend).stream(chunked('<html><body></body></html>'))) == []
+
+if __name__ == "__main__":
+    test_fallbacks_and_values()
+    test_backends_agree_on_fixture()
+    test_empty_page()
+    test_default_backend()
+    test_stream_matches_products()
+    test_stream_stops_reading_early()
+    test_stream_empty_body()
@@ -51,7 +51,7 @@ def test_hema_scraper():
             for i, result in enumerate(results, 1):
                 print(f"\nProduct {i}:")
                 print(f"Title: {result['title']}")
-                print(f"Price: €{result['price']}")
+                print(f"Price: {result['price']}")
                 print(f"Article Number: {result['article_number']}")
                 print(f"Available Online: {'Yes' if result['available_online'] else 'No'}")
                 print(f"Link: {result['link']}")
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+import httpx
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.stores import StoreConfig
+from utils.http_cache import HttpCache
+from utils.http_client import AsyncHttpClient, SyncHttpClient
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class SearchPageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = []
+
+    def do_GET(self):
+        SearchPageHandler.hits.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/etag') and self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        status = 404 if self.path.startswith('/missing') else 200
+        body = f"<html>results for {self.path}</html>".encode()
+        if self.path.startswith('/captcha'):
+            body = b'<html>Robot Check: type the characters (captcha)</html>'
+        self.send_response(status)
+        if self.path.startswith('/etag'):
+            self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SearchPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_client(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http_cache.sqlite3'))
+    return SyncHttpClient(AsyncHttpClient(cache=cache)), cache
+
+def make_config(base_url, cache_ttl):
+    return StoreConfig(
+        name='Local',
+        base_url=base_url,
+        search_url=base_url + '/s?q={query}',
+        selectors={},
+        cache_ttl=cache_ttl
+    )
+
+def test_fresh_entries_skip_the_network(tmp_path):
+    server, base_url = start_server()
+    client, cache = make_client(tmp_path)
+    config = make_config(base_url, cache_ttl=60)
+    SearchPageHandler.hits.clear()
+    try:
+        first = client.get(f"{base_url}/s?q=ps5", store_config=config)
+        second = client.get(f"{base_url}/s?q=ps5", store_config=config)
+
+        assert second.text == first.text
+        assert second.extensions.get('from_cache')
+        assert len(SearchPageHandler.hits) == 1
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_stale_entries_are_revalidated(tmp_path):
+    server, base_url = start_server()
+    client, cache = make_client(tmp_path)
+    config = make_config(base_url, cache_ttl=0.1)
+    SearchPageHandler.hits.clear()
+    try:
+        first = client.get(f"{base_url}/etag?q=ps5", store_config=config)
+        time.sleep(0.2)
+        second = client.get(f"{base_url}/etag?q=ps5", store_config=config)
+
+        assert second.status_code == 200
+        assert second.text == first.text
+        assert SearchPageHandler.hits[-1] == ('/etag?q=ps5', '"v1"')
+        assert cache.stats()['revalidated'] == 1
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_errors_and_disabled_stores_are_not_cached(tmp_path):
+    server, base_url = start_server()
+    client, cache = make_client(tmp_path)
+    SearchPageHandler.hits.clear()
+    try:
+        client.get(f"{base_url}/missing", store_config=make_config(base_url, cache_ttl=60))
+        client.get(f"{base_url}/missing", store_config=make_config(base_url, cache_ttl=60))
+        client.get(f"{base_url}/live", store_config=make_config(base_url, cache_ttl=0))
+        client.get(f"{base_url}/live", store_config=make_config(base_url, cache_ttl=0))
+
+        assert len(SearchPageHandler.hits) == 4
+        assert cache.stats()['entries'] == 0
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_anti_bot_pages_are_not_cached(tmp_path):
+    server, base_url = start_server()
+    client, cache = make_client(tmp_path)
+    config = make_config(base_url, cache_ttl=60)
+    SearchPageHandler.hits.clear()
+    try:
+        # Blocked pages come back as 200 but must not be replayed once the store recovers
+        client.get(f"{base_url}/captcha?q=ps5", store_config=config)
+        with client.stream('GET', f"{base_url}/captcha?q=ps5", store_config=config) as response:
+            b''.join(response.iter_bytes())
+        assert len(SearchPageHandler.hits) == 2
+        assert cache.stats()['entries'] == 0 and cache.stats()['blocked'] == 2
+
+        # A blocked page evicts the URL's earlier entry
+        url, store = f"{base_url}/s?q=ps5", base_url.split('//')[1]
+        client.get(url, store_config=config)
+        assert cache.get(store, url) is not None
+        cache.put(store, url, httpx.Response(200, content=b'captcha', request=httpx.Request('GET', url)), 60)
+        assert cache.get(store, url) is None
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_cache_persists_across_instances(tmp_path):
+    server, base_url = start_server()
+    config = make_config(base_url, cache_ttl=60)
+    SearchPageHandler.hits.clear()
+    try:
+        client, _ = make_client(tmp_path)
+        client.get(f"{base_url}/s?q=switch", store_config=config)
+        client.close()
+
+        client, cache = make_client(tmp_path)
+        response = client.get(f"{base_url}/s?q=switch", store_config=config)
+        client.close()
+
+        assert response.extensions.get('from_cache')
+        assert len(SearchPageHandler.hits) == 1
+    finally:
+        server.shutdown()
+
+def test_streamed_pages_are_cached_only_when_read_fully(tmp_path):
+    server, base_url = start_server()
+    client, cache = make_client(tmp_path)
+    config = make_config(base_url, cache_ttl=60)
+    SearchPageHandler.hits.clear()
+    try:
+        with client.stream('GET', f"{base_url}/s?q=partial", store_config=config) as response:
+            next(response.iter_bytes())
+        assert cache.stats()['entries'] == 0
+
+        with client.stream('GET', f"{base_url}/s?q=full", store_config=config) as response:
+            body = b''.join(response.iter_bytes())
+        with client.stream('GET', f"{base_url}/s?q=full", store_config=config) as response:
+            assert response.from_cache
+            assert b''.join(response.iter_bytes()) == body
+
+        assert len(SearchPageHandler.hits) == 2
+        assert cache.stats()['entries'] == 1
+    finally:
+        client.close()
+        server.shutdown()
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.stores import StoreConfig
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.base.base_scraper import BaseScraper
+from scrapers.hema_scraper import HemaScraper
+from scrapers.marktplaats_scraper import MarktplaatsScraper
+from utils.debug_capture import DebugCapture, MODE_OFF
+from utils.http_client import AsyncHttpClient, SyncHttpClient
+from utils.rate_limiter import RateLimiter
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PAGE_BODY = b'<div class="product">item</div>' * 10000
+
+class StoreHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    client_ports = set()
+    failures_left = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            StoreHandler.client_ports.add(self.client_address[1])
+        if self.path.startswith('/slow'):
+            time.sleep(0.1)
+        if self.path.startswith('/flaky'):
+            with self.lock:
+                failing = StoreHandler.failures_left > 0
+                StoreHandler.failures_left -= 1
+            if failing:
+                return self._send(503, b'busy')
+        if self.path.startswith('/limited'):
+            return self._send(429, b'slow down', {'Retry-After': '7'})
+        if self.path.startswith('/page'):
+            return self._send(200, PAGE_BODY, {'Content-Type': 'text/html; charset=iso-8859-1'})
+        self._send(200, self.headers.get('Connection', 'none').encode())
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StoreHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_config(base_url, max_concurrency=2):
+    return StoreConfig(
+        name='Local',
+        base_url=base_url,
+        search_url=base_url + '/s?q={query}',
+        selectors={},
+        max_concurrency=max_concurrency
+    )
+
+def test_per_store_concurrency_and_keepalive():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    config = make_config(base_url, max_concurrency=2)
+    StoreHandler.client_ports.clear()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(
+                lambda i: client.get(f"{base_url}/slow/{i}", store_config=config), range(8)
+            ))
+
+        assert all(response.status_code == 200 for response in responses)
+        stats = client.stats()[config.base_url.split('//')[1]]
+        assert stats['requests'] == 8
+        assert stats['peak_in_flight'] == 2
+        # Connections are pooled rather than opened per request
+        assert len(StoreHandler.client_ports) <= 2
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_hop_by_hop_headers_are_dropped():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    try:
+        response = client.get(f"{base_url}/echo", headers={'Connection': 'close', 'Accept': 'text/html'})
+        assert response.text != 'close'
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_retries_server_errors():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    StoreHandler.failures_left = 1
+    try:
+        assert client.get(f"{base_url}/flaky").status_code == 503
+        StoreHandler.failures_left = 1
+        assert client.get(f"{base_url}/flaky", retries=1).status_code == 200
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_429_pauses_rate_limiter():
+    server, base_url = start_server()
+    limiter = RateLimiter()
+    client = SyncHttpClient(AsyncHttpClient(rate_limiter=limiter))
+    config = make_config(base_url)
+    try:
+        assert client.get(f"{base_url}/limited", store_config=config).status_code == 429
+        assert 6 < limiter.bucket_for(config).reserve() <= 7
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_429_pauses_scraper_rate_limiter():
+    # A limiter given to the scraper (as StoreFactory does) is paused, not the client's
+    server, base_url = start_server()
+    client_limiter, limiter = RateLimiter(), RateLimiter()
+    client = SyncHttpClient(AsyncHttpClient(rate_limiter=client_limiter))
+    config = make_config(base_url)
+    scraper = BaseScraper(config, http_client=client, rate_limiter=limiter)
+    try:
+        assert scraper.make_request(f"{base_url}/limited") is None
+        assert 6 < limiter.bucket_for(config).reserve() <= 7
+        assert client_limiter.bucket_for(config).reserve() == 0
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_stream_holds_store_slot_until_closed():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    config = make_config(base_url)
+    store_key = config.base_url.split('//')[1]
+    try:
+        with client.stream('GET', f"{base_url}/page", store_config=config) as response:
+            assert response.status_code == 200
+            assert response.encoding == 'iso-8859-1'
+            assert client.stats()[store_key]['in_flight'] == 1
+            chunks = list(response.iter_bytes())
+        assert b''.join(chunks) == PAGE_BODY
+        assert client.stats()[store_key]['in_flight'] == 0
+
+        # Leaving the block early drops the rest of the body
+        with client.stream('GET', f"{base_url}/page", store_config=config) as response:
+            next(response.iter_bytes())
+        assert client.stats()[store_key]['in_flight'] == 0
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_store_scrapers_stream_as_their_store():
+    # The class-based scrapers take a token and are tracked under the store's name, not the URL's host
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    config = make_config(base_url)
+    try:
+        for scraper_class in (AmazonScraper, HemaScraper, MarktplaatsScraper):
+            limiter = RateLimiter()
+            scraper = scraper_class(config, rate_limiter=limiter)
+            scraper.http = client
+            scraper.debug_capture = DebugCapture(mode=MODE_OFF)
+            assert list(scraper._stream_containers(f"{base_url}/page")) == []
+            assert limiter.bucket_for(config).stats()['requests'] == 1, scraper_class
+        assert list(client.timeout_stats()) == [config.name]
+    finally:
+        client.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_per_store_concurrency_and_keepalive()
+    test_hop_by_hop_headers_are_dropped()
+    test_retries_server_errors()
+    test_429_pauses_rate_limiter()
+    test_429_pauses_scraper_rate_limiter()
+    test_stream_holds_store_slot_until_closed()
+    test_store_scrapers_stream_as_their_store()
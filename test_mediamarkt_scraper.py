@@ -51,7 +51,7 @@ def test_mediamarkt_scraper():
             for i, result in enumerate(results, 1):
                 print(f"\nProduct {i}:")
                 print(f"Title: {result['title']}")
-                print(f"Price: €{result['price']}")
+                print(f"Price: {result['price']}")
                 print(f"Available Online: {'Yes' if result['available_online'] else 'No'}")
                 print(f"Link: {result['link']}")
                 print("-" * 50)
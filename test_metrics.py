@@ -0,0 +1,98 @@
+import json
+import logging
+import urllib.request
+from scrapers.store_scrapers import StoreScrapers
+from utils.http_client import AsyncHttpClient, SyncHttpClient
+from utils.metrics import Metrics, Histogram, STAGE_PARSE, STAGE_TOTAL
+from utils.rate_limiter import RateLimiter
+from test_store_scrapers import ShopHandler, start_server, make_config
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.5, 1.0))
+    for value in [0.05] * 50 + [0.15] * 40 + [0.7] * 10:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert abs(histogram.sum - (2.5 + 6.0 + 7.0)) < 1e-9
+    assert histogram.quantile(0.5) == 0.1
+    assert 0.1 < histogram.quantile(0.9) <= 0.2
+    assert 0.5 < histogram.quantile(0.95) <= 1.0
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_prometheus_export():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe(STAGE_PARSE, 'Bol.com', 0.05)
+    metrics.observe(STAGE_PARSE, 'Bol.com', 0.5)
+    metrics.observe(STAGE_PARSE, 'Bol.com', 5.0)
+    text = metrics.prometheus()
+    logger.info(text)
+    assert '# TYPE price_comparison_stage_seconds histogram' in text
+    assert 'price_comparison_stage_seconds_bucket{stage="parse",store="Bol.com",le="0.1"} 1' in text
+    assert 'price_comparison_stage_seconds_bucket{stage="parse",store="Bol.com",le="1.0"} 2' in text
+    assert 'price_comparison_stage_seconds_bucket{stage="parse",store="Bol.com",le="+Inf"} 3' in text
+    assert 'price_comparison_stage_seconds_count{stage="parse",store="Bol.com"} 3' in text
+
+    server = metrics.serve(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.read().decode('utf-8') == text
+    finally:
+        server.shutdown()
+
+def test_traces_nest_and_export_as_spans():
+    metrics = Metrics()
+    with metrics.trace('Bol.com', 'ps5') as outer:
+        with metrics.timer(STAGE_PARSE, 'Bol.com'):
+            pass
+        # A scraper traced inside a traced factory search adds to the same trace
+        with metrics.trace('Bol.com', 'ps5') as inner:
+            assert inner is outer
+    [trace] = metrics.traces()
+    assert set(trace.durations()) == {STAGE_PARSE, STAGE_TOTAL}
+    assert metrics.histogram(STAGE_TOTAL, 'Bol.com').count == 1
+
+    spans = metrics.spans()
+    root = spans[0]
+    assert root['name'] == 'search' and 'parentSpanId' not in root
+    assert all(span['traceId'] == root['traceId'] for span in spans)
+    assert all(span['parentSpanId'] == root['spanId'] for span in spans[1:])
+    assert {'key': 'query', 'value': {'stringValue': 'ps5'}} in root['attributes']
+    json.dumps(spans)
+
+    try:
+        with metrics.trace('Bol.com', 'broken'):
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    assert metrics.traces(query='broken')[0].status == 'error'
+
+def test_store_search_records_every_stage():
+    server, base_url = start_server()
+    metrics = Metrics()
+    config = make_config(base_url, pagination={'param': 'p', 'start': 1, 'max_pages': 3})
+    client = SyncHttpClient(AsyncHttpClient(metrics=metrics))
+    scrapers = StoreScrapers(
+        http_client=client, store_configs={'shop': config}, rate_limiter=RateLimiter(), metrics=metrics
+    )
+    ShopHandler.paths.clear()
+    try:
+        assert scrapers.search('shop', 'PlayStation 5 Console') is not None
+        assert scrapers.search('shop', 'PlayStation 5 Disc') is not None
+    finally:
+        client.close()
+        server.shutdown()
+
+    stages = metrics.summary()['Local Shop']
+    logger.info(f"Stages: {stages}")
+    # Stages that happen on the HTTP client's event loop are attributed to the caller's trace
+    first, second = metrics.traces(store='Local Shop')
+    assert set(first.durations()) == {
+        'rate_limit', 'slot', 'connect', 'ttfb', 'download', 'parse', 'match', 'validate', 'total'
+    }
+    # The second search reuses the pooled connection
+    assert 'connect' not in second.durations()
+    assert stages['connect']['count'] == 1 and stages['ttfb']['count'] == len(ShopHandler.paths)
+    assert stages['total']['count'] == 2
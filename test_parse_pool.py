@@ -0,0 +1,102 @@
+import time
+import logging
+from config.stores import StoreConfig
+from scrapers.store_scrapers import StoreScrapers, page_candidates, parse_page
+from utils.extraction import build_extractor
+from utils.http_client import SyncHttpClient
+from utils.parse_pool import ParsePool
+from utils.rate_limiter import RateLimiter
+from test_store_scrapers import ShopHandler, start_server, make_config
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CONFIG = StoreConfig(
+    name='Local Shop',
+    base_url='https://shop.example',
+    search_url='https://shop.example/zoeken?q={query}',
+    selectors={'container': 'li.item', 'title': 'a.name', 'price': 'span.cost', 'link': 'a.name'}
+)
+
+def make_page(count):
+    items = ''.join(
+        f'<li class="item"><a class="name" href="/p/{i}">PlayStation 5 Console {i}</a>'
+        f'<span class="cost">€ {400 + i % 90},99</span></li>'
+        for i in range(count)
+    )
+    return f"<html><body><ul>{items}</ul></body></html>".encode('utf-8')
+
+def slow_length(body, delay):
+    time.sleep(delay)
+    return len(body)
+
+def fail(body):
+    raise ValueError('unparseable page')
+
+def test_pages_parse_in_workers():
+    pool = ParsePool(workers=2, shm_threshold=4096)
+    try:
+        small, large = make_page(3), make_page(500)
+        expected = page_candidates(build_extractor(CONFIG.selectors), CONFIG, large.decode('utf-8'), 'playstation 5')
+
+        # Large bodies go through shared memory, small ones inline; both decode in the worker
+        parsed = pool.parse(parse_page, large, 'shop', CONFIG, 'playstation 5', encoding='utf-8')
+        # Similarities may differ in the last bits: string hashing, and so set order, differs per process
+        assert [dict(c, similarity=round(c['similarity'], 9)) for c in parsed] == \
+            [dict(c, similarity=round(c['similarity'], 9)) for c in expected]
+        assert len(pool.parse(parse_page, small, 'shop', CONFIG, 'playstation 5', encoding='utf-8')) == 3
+        assert pool.parse(slow_length, memoryview(large), 0, encoding=None) == len(large)
+        stats = pool.stats()
+        logger.info(f"Parse pool stats: {stats}")
+        assert stats['submitted'] == 3 and stats['shared'] == 2 and stats['failed'] == 0
+    finally:
+        pool.shutdown()
+
+def test_submit_blocks_when_the_pool_is_full():
+    pool = ParsePool(workers=1, max_pending=1)
+    try:
+        # Warm up the worker so that process start-up is not measured
+        pool.parse(slow_length, b'x', 0)
+        first = pool.submit(slow_length, b'first', 0.3)
+        start = time.monotonic()
+        second = pool.submit(slow_length, b'second', 0)
+        assert time.monotonic() - start > 0.2
+        assert first.done()
+        assert second.result() == 6
+    finally:
+        pool.shutdown()
+
+def test_pipeline_yields_in_completion_order():
+    pool = ParsePool(workers=2)
+    try:
+        pages = ((b'x' * size, delay) for size, delay in [(1, 0.4), (2, 0.0), (3, 0.1)])
+        results = list(pool.pipeline(slow_length, pages))
+        assert sorted(results) == [(0, 1), (1, 2), (2, 3)]
+        assert results[-1] == (0, 1)
+
+        try:
+            list(pool.pipeline(fail, [(b'<html>',)]))
+            assert False, "parse error swallowed"
+        except ValueError:
+            pass
+        assert pool.stats()['failed'] == 1
+    finally:
+        pool.shutdown()
+
+def test_store_search_with_parse_pool():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    pool = ParsePool(workers=1)
+    config = make_config(base_url, pagination={'param': 'p', 'start': 1, 'max_pages': 3})
+    scrapers = StoreScrapers(http_client=client, store_configs={'shop': config}, rate_limiter=RateLimiter(),
+                             parse_pool=pool)
+    ShopHandler.paths.clear()
+    try:
+        result = scrapers.search('shop', 'PlayStation 5 Console')
+        assert result['title'] == 'PlayStation 5 Console Disc' and result['price'] == '€449.99'
+        assert pool.stats()['submitted'] == 3
+    finally:
+        pool.shutdown()
+        client.close()
+        server.shutdown()
@@ -0,0 +1,93 @@
+import time
+import logging
+from utils.price_history import PriceHistory, product_key, HOUR, DAY
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+NOW = 1_800_000_000.0
+
+def test_observations_are_written_in_batches(tmp_path):
+    history = PriceHistory(str(tmp_path / 'history.sqlite3'), batch_size=3, flush_interval=3600)
+    history.record('Bol.com', 'ps5', 479.0, observed_at=NOW)
+    history.record('Amazon', 'ps5', 469.0, observed_at=NOW)
+    assert history.stats()['buffered'] == 2
+    assert history.stats()['observations'] == 0
+
+    history.record('MediaMarkt.nl', 'ps5', 499.0, observed_at=NOW)
+    assert history.stats() == {'buffered': 0, 'observations': 3, 'hourly': 0, 'daily': 0}
+
+    # Queries see buffered observations, and close() keeps them
+    history.record('Game Mania', 'ps5', 459.0, observed_at=NOW)
+    assert history.price_stats('ps5', now=NOW)['min'] == 459.0
+    history.record('Game Mania', 'ps5', 449.0, observed_at=NOW)
+    history.close()
+    assert PriceHistory(str(tmp_path / 'history.sqlite3')).price_stats('ps5', now=NOW)['count'] == 5
+
+def test_record_result():
+    history = PriceHistory(':memory:')
+    result = {'store': 'Bol.com', 'title': 'PlayStation® 5 Slim', 'price': '€479.00', 'available_online': True}
+    assert history.record_result(result, observed_at=NOW)
+    assert not history.record_result({'store': 'Bol.com', 'title': 'PS5', 'price': 'Niet leverbaar'})
+
+    stats = history.price_stats(product_key('playstation 5 slim'), store='Bol.com', now=NOW)
+    assert stats == {'min': 479.0, 'avg': 479.0, 'max': 479.0, 'count': 1}
+    assert history.price_stats(product_key('playstation 5 slim'), store='Amazon', now=NOW) is None
+
+    # Thousands separators are not decimal points
+    assert history.record_result({'store': 'Coolblue', 'title': 'OLED TV', 'price': '€1.299,00'}, observed_at=NOW)
+    assert history.price_stats(product_key('oled tv'), now=NOW)['max'] == 1299.0
+
+def test_compaction_keeps_min_avg_max():
+    history = PriceHistory(':memory:', raw_retention=2 * DAY, hourly_retention=10 * DAY)
+    prices = {'Amazon': [], 'Bol.com': []}
+    for i in range(40 * 24):
+        store, price = 'Amazon' if i % 2 else 'Bol.com', 400.0 + (i * 7) % 60
+        history.record(store, 'ps5', price, observed_at=NOW - i * HOUR - 60)
+        prices[store].append(price)
+    # Windows that only cover whole rollup buckets (raw data, or everything) are unaffected by compaction
+    before = {days: history.price_stats('ps5', days=days, now=NOW) for days in (1, 60)}
+
+    compacted = history.compact(now=NOW)
+    stats = history.stats()
+    logger.info(f"Compacted {compacted}, now {stats}")
+    assert compacted['observations'] > 0 and compacted['hourly'] > 0
+    assert stats['observations'] <= 3 * 24
+    assert stats['daily'] > 0
+
+    # Compacting again is a no-op
+    assert history.compact(now=NOW) == {'observations': 0, 'hourly': 0}
+    for days, expected in before.items():
+        after = history.price_stats('ps5', days=days, now=NOW)
+        assert after['count'] == expected['count']
+        assert after['min'] == expected['min'] and after['max'] == expected['max']
+        assert abs(after['avg'] - expected['avg']) < 1e-9
+    assert history.price_stats('ps5', days=60, now=NOW)['count'] == 40 * 24
+    assert history.lowest_prices('ps5', days=60, now=NOW) == {store: min(p) for store, p in prices.items()}
+
+def test_daily_series():
+    history = PriceHistory(':memory:')
+    for day in range(3):
+        for hour in range(4):
+            history.record('Bol.com', 'ps5', 450.0 + day * 10 + hour, observed_at=NOW - day * DAY - hour * HOUR)
+    series = history.series('ps5', days=7, now=NOW)
+    # NOW is 08:00 UTC, so each day's four hourly observations fall in one daily bucket
+    assert [point['count'] for point in series] == [4, 4, 4]
+    assert all(point['store'] == 'Bol.com' for point in series)
+    assert [point['bucket'] for point in series] == sorted(point['bucket'] for point in series)
+    assert min(point['min'] for point in series) == 450.0
+    assert max(point['max'] for point in series) == 473.0
+
+def test_stats_query_is_fast():
+    history = PriceHistory(':memory:', batch_size=5000)
+    for i in range(100_000):
+        history.record(f"store{i % 5}", f"product{i % 500}", 100.0 + i % 37, observed_at=NOW - i * 60)
+    history.flush()
+
+    start = time.perf_counter()
+    stats = history.price_stats('product42', days=70, now=NOW)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"price_stats over {stats['count']} observations took {elapsed:.2f}ms")
+    assert stats['count'] == 200
+    assert elapsed < 50
@@ -0,0 +1,121 @@
+import re
+import logging
+import pytest
+from utils.price_parser import NO_PRICE, parse_price_cents, parse_price, parse_many
+from utils.price_utils import extract_price
+from benchmarks.bench_parsers import DEFAULT_FIXTURES
+from config.stores import STORE_CONFIGS
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.store_scrapers import page_products
+from utils.extraction import build_extractor
+from benchmarks.bench_prices import load_price_texts, bench_size
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# (text, format, cents)
+CORPUS = [
+    ('€ 1.299,99', 'eu', 129999),
+    ('1,299.99', 'us', 129999),
+    ('129999', 'cents', 129999),
+    ('€ 593,49', 'cents', 59349),
+    ('€29.99', 'auto', 2999),
+    ('€1,299.00', 'auto', 129900),
+    ('1.299,00', 'auto', 129900),
+    ('449,', 'auto', 44900),
+    ('1.299', 'auto', 129900),
+    ('vanaf € 12,99', 'eu', 1299),
+    ('12,99 - 19,99', 'eu', 1299),
+    ('€ 12,-', 'eu', 1200),
+    ('1 299,00', 'eu', 129900),
+    ('0,5', 'eu', 50),
+    ('12.5', 'us', 1250),
+    ('€ 1.049,00', 'nl-NL', 104900),
+    ('$1,049.00', 'en', 104900),
+    ('Bieden', 'eu', None),
+    ('', 'eu', None),
+    (None, 'us', None),
+]
+
+def test_corpus():
+    for text, price_format, cents in CORPUS:
+        assert parse_price_cents(text, price_format) == cents, (text, price_format)
+    assert parse_price('€ 1.299,99') == 1299.99
+    with pytest.raises(ValueError):
+        parse_price_cents('12,99', 'fr')
+
+def test_parse_many_matches_single_parsing():
+    texts = [text for text, price_format, _ in CORPUS if price_format == 'eu'] * 3
+    cents = parse_many(texts, 'eu')
+    assert len(cents) == len(texts)
+    assert [None if value == NO_PRICE else value for value in cents] == [parse_price_cents(text, 'eu') for text in texts]
+
+def test_amazon_fixture_prices():
+    """Amazon's screen-reader price must agree with the visible whole/fraction spans."""
+    with open(DEFAULT_FIXTURES['amazon'], encoding='utf-8') as f:
+        html = f.read()
+    offscreen = re.findall(r'a-offscreen">([^<]*)<', html)
+    visible = re.findall(r'a-price-whole">(\d+)<span class="a-price-decimal">.</span></span>'
+                         r'<span class="a-price-fraction">(\d+)', html)
+    assert offscreen and visible
+    # The screen-reader texts also hold the struck-through list prices, which have no visible spans
+    parsed = {parse_price_cents(text, 'auto') for text in offscreen}
+    for whole, fraction in visible:
+        assert int(whole) * 100 + int(fraction) in parsed, (whole, fraction)
+
+def test_amazon_store_config_reads_us_prices():
+    # The generic engine must read '€539.00' as 539.00 and '1,299.' as 1299.00, not 53900 and 1.29
+    config = STORE_CONFIGS['amazon.nl']
+    with open(DEFAULT_FIXTURES['amazon'], encoding='utf-8') as f:
+        html = f.read()
+    products = page_products(build_extractor(config.selectors), config, html)
+    assert products
+    # Price texts read as the page shows them, in whole euros or in full
+    shown = {int(whole.replace(',', '')) for whole in re.findall(r'a-price-whole">([\d,]+)<', html)}
+    shown |= {int(whole.replace(',', '')) for whole in re.findall(r'€([\d,]+)\.\d\d', html)}
+    texts = [item.get('price') or '' for item in build_extractor(config.selectors).products(html)]
+    texts = [text for text in texts if '€' in text or re.fullmatch(r'\s*[\d,]+\.\s*', text)]
+    assert texts
+    for text in texts:
+        assert parse_price_cents(text, config.price_format) // 100 in shown, text
+    # Some listings put a date or brand in the price slot; none may come out above what the page shows
+    prices = [product['price_cents'] for product in products]
+    assert all(type(cents) is int for cents in prices)
+    assert 53900 in prices
+    assert max(prices) // 100 <= max(shown)
+    assert parse_price_cents('1,299.', config.price_format) == 129900
+    # The class-based scraper reads the same pages the same way
+    scraper = AmazonScraper()
+    assert scraper._extract_price('1,299.') == 1299.0 and scraper._extract_price('€539.00') == 539.0
+    assert 'language=en' in scraper._build_search_url('ps5')
+
+def test_fixture_prices():
+    for fixture, (price_format, texts) in load_price_texts().items():
+        assert texts, fixture
+        for text in texts:
+            cents = parse_price_cents(text, price_format)
+            # Marktplaats lists offers without a price ('Bieden', 'Gratis', ...)
+            assert cents is not None and cents > 0 or not re.search(r'\d', text), (fixture, text)
+        expected = [parse_price_cents(text, price_format) for text in texts]
+        assert list(parse_many(texts, price_format)) == [NO_PRICE if cents is None else cents for cents in expected]
+
+def test_thousands_are_not_read_as_decimals():
+    # The old parser turned '1.299,00' into 1.299
+    assert extract_price('1.299,00') == 1299.0
+    assert extract_price('€449.99') == 449.99
+    assert extract_price(None) is None
+
+def test_benchmark_runs():
+    corpus = [(price_format, text) for price_format, texts in load_price_texts().values() for text in texts]
+    results = bench_size(corpus, 200)
+    assert results['parse_many_ms'] > 0 and 0 <= results['legacy_wrong'] <= 1
+
+if __name__ == "__main__":
+    test_corpus()
+    test_parse_many_matches_single_parsing()
+    test_amazon_fixture_prices()
+    test_amazon_store_config_reads_us_prices()
+    test_fixture_prices()
+    test_thousands_are_not_read_as_decimals()
+    test_benchmark_runs()
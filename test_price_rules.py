@@ -0,0 +1,76 @@
+import time
+import random
+import logging
+from config.price_rules import PriceRule
+from utils.price_rules import KeywordAutomaton, PriceRules
+from utils.price_utils import validate_price
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def test_automaton_finds_the_best_ranked_keyword():
+    automaton = KeywordAutomaton({'he': 3, 'she': 1, 'his': 2, 'hers': 0})
+    assert automaton.first('ushers') == 0
+    assert automaton.first('she') == 1
+    assert automaton.first('this') == 2
+    assert automaton.first('nothing') is None
+    assert KeywordAutomaton({}).first('anything') is None
+
+    # Same answer as checking every keyword with `in`
+    random.seed(3)
+    keywords = {''.join(random.choice('abc') for _ in range(random.randint(1, 4))): rank for rank in range(30)}
+    automaton = KeywordAutomaton(keywords)
+    for _ in range(500):
+        text = ''.join(random.choice('abcd') for _ in range(random.randint(0, 20)))
+        found = [rank for keyword, rank in keywords.items() if keyword in text]
+        assert automaton.first(text) == (min(found) if found else None), text
+
+def test_categories_follow_rule_order():
+    rules = PriceRules()
+    assert rules.classify('Sony PlayStation 5 Slim').category == 'ps5'
+    assert rules.classify('PS5 game: Astro Bot').category == 'ps5'
+    assert rules.classify('Xbox Series X').category == 'xbox'
+    assert rules.classify('Nintendo Switch OLED').category == 'switch'
+    assert rules.classify('PlayStation Portal').category == 'console'
+    assert rules.classify('Bordspel').category == 'game'
+    assert rules.classify('HDMI kabel').category == 'accessory'
+
+    assert validate_price(449.99, 'PlayStation 5') and not validate_price(49.99, 'PlayStation 5')
+    assert validate_price(49.99, 'Bordspel') and not validate_price(None, 'Bordspel')
+    assert validate_price(15, 'USB-C lader')
+
+def test_custom_rules():
+    rules = PriceRules([PriceRule('tv', ['oled', 'tv'], 300, 3000)], default=PriceRule('other', [], 1, 100))
+    assert rules.validate(1299, 'LG OLED55') and not rules.validate(1299, 'Remote')
+    assert rules.stats()['keywords'] == 2
+
+def test_outliers_are_dropped():
+    rules = PriceRules()
+    prices = [449.99, 459.0, 439.0, 469.0, 449.0, 799.0, 12.99, None]
+    assert rules.plausible(prices, 'PS5') == [True, True, True, True, True, False, False, False]
+    # Too few prices to tell an outlier, or nothing to measure against
+    assert rules.plausible([449.0, 799.0], 'PS5') == [True, True]
+    assert rules.plausible([449.0] * 5 + [799.0], 'PS5') == [True] * 6
+
+def test_fast_enough_for_every_listing():
+    rules = PriceRules()
+    random.seed(5)
+    words = ['sony', 'playstation', '5', 'slim', 'digital', 'edition', 'controller', 'wit', 'bundel', 'hdmi', 'ps5',
+             'nintendo', 'switch', 'oled', 'xbox', 'series', 'x', 'game', 'spel', 'kabel', 'headset']
+    titles = [' '.join(random.choice(words) for _ in range(8)) + f" {i}" for i in range(5000)]
+    prices = [random.uniform(5, 900) for _ in titles]
+    start = time.perf_counter()
+    for title in titles:
+        rules.classify(title)
+    rules.plausible(prices, 'ps5')
+    elapsed = time.perf_counter() - start
+    logger.info(f"Classified 5000 titles and checked 5000 prices in {elapsed * 1000:.1f}ms")
+    assert elapsed < 1.0
+
+if __name__ == "__main__":
+    test_automaton_finds_the_best_ranked_keyword()
+    test_categories_follow_rule_order()
+    test_custom_rules()
+    test_outliers_are_dropped()
+    test_fast_enough_for_every_listing()
@@ -0,0 +1,66 @@
+import json
+import pickle
+import logging
+from utils.product import Product, ProductBatch, to_cents, format_cents
+from utils.product_index import ProductIndex
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def test_prices_are_whole_cents():
+    assert to_cents(449.99) == 44999
+    assert to_cents('€1049.00') == 104900
+    assert to_cents('0.1') == 10
+    assert to_cents(None) is None and to_cents('Bieden') is None
+    assert format_cents(44999) == '€449.99' and format_cents(5) == '€0.05'
+
+def test_product_reads_like_a_result_dict():
+    product = Product('Bol.com', 'PlayStation 5 Console', 44999, '/p/1', extra={'rating': 4.5})
+    assert product.price == 449.99
+    assert product == {
+        'store': 'Bol.com', 'price': '€449.99', 'title': 'PlayStation 5 Console', 'description': '',
+        'link': '/p/1', 'rating': 4.5
+    }
+    assert product.get('rating') == 4.5 and product.get('available_online') is None
+    assert 'image_url' not in product
+    assert json.loads(json.dumps(product.to_dict()))['price'] == '€449.99'
+
+    # A listing without a numeric price shows its text instead
+    offer = Product('Marktplaats', 'PS5', None, '/m/1', price_text='Bieden')
+    assert offer['price'] == 'Bieden' and offer.price is None
+
+    # Round-trips through dicts and pickle (the result cache), with the store name interned again
+    assert Product.from_dict(product.to_dict()) == product
+    copy = pickle.loads(pickle.dumps(product, protocol=pickle.HIGHEST_PROTOCOL))
+    assert copy == product and copy.store is product.store
+    assert not hasattr(product, '__dict__')
+
+def test_batch_sorts_by_price_without_parsing():
+    batch = ProductBatch([
+        Product('A', 'PS5 Slim', 47900, '/a'),
+        {'store': 'B', 'title': 'PS5', 'price': 'Bieden', 'link': '/b'},
+        {'store': 'C', 'title': 'PS5 Disc', 'price': '449.00', 'link': '/c', 'available_online': True},
+    ])
+    assert len(batch) == 3 and batch
+    batch.sort()
+    assert [product.store for product in batch] == ['C', 'A', 'B']
+    batch.sort(reverse=True)
+    assert [product.store for product in batch] == ['A', 'C', 'B']
+    batch.sort(key=lambda product: product.title)
+    assert batch[0]['price'] == 'Bieden'
+    assert batch[1].store == 'C' and batch[1].available is True
+    assert batch.to_dicts()[1]['available_online'] is True
+    assert not ProductBatch()
+
+def test_index_uses_cent_prices():
+    index = ProductIndex()
+    index.add(Product('Bol.com', 'Sony PlayStation 5 Slim Console', 47900, '/b'))
+    index.add(Product('Coolblue', 'PlayStation 5 Slim Console Sony', 46900, '/c'))
+    assert index.best_offer('PlayStation 5 Slim')['store'] == 'Coolblue'
+
+if __name__ == "__main__":
+    test_prices_are_whole_cents()
+    test_product_reads_like_a_result_dict()
+    test_batch_sorts_by_price_without_parsing()
+    test_index_uses_cent_prices()
@@ -0,0 +1,84 @@
+import logging
+import random
+from utils.product_index import ProductIndex, gtin_is_valid, listing_identifiers, model_numbers
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+LISTINGS = [
+    {'store': 'Bol.com', 'title': 'Sony PlayStation 5 Slim Console - Disc Edition', 'price': '€479.00',
+     'link': 'https://www.bol.com/nl/nl/p/1/', 'description': 'EAN 0711719577294'},
+    {'store': 'MediaMarkt.nl', 'title': 'SONY PS5 Slim Disc', 'price': '€469.00',
+     'link': 'https://www.mediamarkt.nl/p/2', 'description': 'EAN: 0711719577294'},
+    {'store': 'Game Mania', 'title': 'PlayStation 5 DualSense Wireless Controller Wit', 'price': '€64.99',
+     'link': 'https://www.gamemania.nl/product/3', 'description': ''},
+    {'store': 'Amazon', 'title': 'Sony DualSense Wireless Controller - White', 'price': '€59.99',
+     'link': 'https://www.amazon.nl/-/en/DualSense/dp/B08H99BPJN/ref=sr_1_1', 'description': ''},
+    {'store': 'Amazon', 'title': 'DualSense™ Wireless Controller', 'price': '€61.00',
+     'link': 'https://www.amazon.nl/dp/B08H99BPJN', 'description': ''},
+]
+
+def test_identifiers():
+    assert gtin_is_valid('0711719577294')
+    assert not gtin_is_valid('0711719577295')
+    assert model_numbers('PlayStation 5 Slim CFI-2016 1TB, PS5, 4K HDR') == {'CFI2016'}
+
+    identifiers = listing_identifiers(LISTINGS[3])
+    assert identifiers['asin'] == {'B08H99BPJN'}
+    assert listing_identifiers({'store': 'HEMA', 'title': 'Mok', 'article_number': '60040123'})['article'] == {
+        'HEMA:60040123'
+    }
+
+def test_listings_cluster_into_products():
+    index = ProductIndex()
+    ids = index.add_all(LISTINGS)
+    logger.info(f"Products: {ids}, {index.stats()}")
+
+    # Same GTIN despite dissimilar titles; controllers by title; the Amazon duplicate by ASIN
+    assert ids[0] == ids[1]
+    assert index.product_of(2) == index.product_of(3) == index.product_of(4)
+    assert index.product_of(0) != index.product_of(2)
+    assert len(index.products()) == 2
+    assert index.canonical_title(ids[2]) != ''
+
+def test_best_offer_stays_within_the_product():
+    index = ProductIndex()
+    index.add_all(LISTINGS)
+
+    # The controllers are cheaper, but they are not what was searched for
+    console = index.best_offer('playstation 5 slim disc')
+    assert console['store'] == 'MediaMarkt.nl'
+    controller = index.best_offer('dualsense wireless controller')
+    assert controller['price'] == '€59.99'
+    assert ProductIndex().best_offer('ps5') is None
+
+    # '€1.299,00' is not cheaper than '€479.00'
+    index.add(dict(LISTINGS[0], store='Coolblue', price='€1.299,00', link='https://www.coolblue.nl/4'))
+    assert index.best_offer('playstation 5 slim disc')['store'] == 'MediaMarkt.nl'
+
+def test_conflicting_model_numbers_are_not_merged():
+    index = ProductIndex()
+    first = index.add({'store': 'A', 'title': 'Sony WH-1000XM4 Wireless Headphones Black', 'price': '249.00'})
+    second = index.add({'store': 'B', 'title': 'Sony WH-1000XM5 Wireless Headphones Black', 'price': '329.00'})
+    third = index.add({'store': 'C', 'title': 'Sony Headphones WH1000XM5 black', 'price': '319.00'})
+    assert first != second
+    assert third == second
+
+def test_comparisons_are_bounded():
+    random.seed(7)
+    words = ['console', 'controller', 'headset', 'slim', 'digital', 'disc', 'black', 'white', 'pro', 'bundle']
+    index = ProductIndex(max_candidates=10)
+    for i in range(3000):
+        index.add({'store': f"store{i % 5}", 'title': ' '.join(random.sample(words, 4)) + f" serie {i % 400}"})
+    stats = index.stats()
+    logger.info(f"Index stats: {stats}")
+    assert stats['listings'] == 3000
+    assert stats['comparisons'] <= 3000 * 10
+
+if __name__ == "__main__":
+    test_identifiers()
+    test_listings_cluster_into_products()
+    test_best_offer_stays_within_the_product()
+    test_conflicting_model_numbers_are_not_merged()
+    test_comparisons_are_bounded()
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from config.stores import StoreConfig
+from utils.rate_limiter import RateLimiter, TokenBucket, parse_retry_after
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def make_config(name, rate_limit=0.1, burst=1):
+    return StoreConfig(
+        name=name,
+        base_url=f"https://www.{name.lower()}.nl",
+        search_url=f"https://www.{name.lower()}.nl/s?q={{query}}",
+        selectors={},
+        rate_limit=rate_limit,
+        burst=burst
+    )
+
+def test_bucket_spaces_requests():
+    bucket = TokenBucket(interval=0.1, burst=1)
+    waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits[0] == 0
+    for previous, current in zip(waits, waits[1:]):
+        assert abs((current - previous) - 0.1) < 0.02
+    assert bucket.stats()['throttled'] == 3
+
+def test_bucket_allows_burst():
+    bucket = TokenBucket(interval=1.0, burst=3)
+    waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert 0.9 < waits[3] <= 1.0
+
+def test_stores_do_not_block_each_other():
+    limiter = RateLimiter()
+    slow = make_config('Slow', rate_limit=0.5)
+    fast = make_config('Fast', rate_limit=0.0)
+
+    limiter.acquire(slow)
+    thread = threading.Thread(target=limiter.acquire, args=(slow,))
+    thread.start()
+
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire(fast)
+    assert time.monotonic() - start < 0.1
+
+    thread.join()
+    stats = limiter.stats()
+    assert stats['www.slow.nl']['throttled'] == 1
+    assert stats['www.fast.nl']['total_wait'] == 0
+
+def test_defer_honours_retry_after():
+    limiter = RateLimiter()
+    config = make_config('Busy', rate_limit=0.01, burst=5)
+
+    limiter.defer(config, 0.3)
+    first = limiter.bucket_for(config).reserve()
+    second = limiter.bucket_for(config).reserve()
+
+    assert 0.25 < first <= 0.3
+    assert second > first
+    assert limiter.stats()['www.busy.nl']['deferrals'] == 1
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+
+if __name__ == "__main__":
+    test_bucket_spaces_requests()
+    test_bucket_allows_burst()
+    test_stores_do_not_block_each_other()
+    test_defer_honours_retry_after()
+    test_parse_retry_after()
@@ -0,0 +1,77 @@
+import logging
+import time
+from utils.result_cache import ResultCache, make_key
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class CountingSearch:
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.results
+
+def test_make_key_normalizes_query():
+    assert make_key('hema.nl', '  Finger   Trainer ') == make_key('hema.nl', 'finger trainer')
+    assert make_key('hema.nl', 'ps5', sort_by='price_low_to_high', max_results=20) == \
+        make_key('hema.nl', 'ps5', max_results=20, sort_by='price_low_to_high')
+    assert make_key('hema.nl', 'ps5', max_results=5) != make_key('hema.nl', 'ps5', max_results=20)
+
+def test_hit_skips_search():
+    cache = ResultCache()
+    search = CountingSearch([{'title': 'PS5', 'price': '499.00'}])
+
+    first = cache.get_or_compute('amazon.nl|ps5', search)
+    second = cache.get_or_compute('amazon.nl|ps5', search)
+
+    assert first == second
+    assert search.calls == 1
+    assert cache.stats()['hits'] == 1
+
+def test_empty_results_are_not_cached():
+    cache = ResultCache()
+    search = CountingSearch([])
+
+    cache.get_or_compute('hema.nl|nothing', search)
+    cache.get_or_compute('hema.nl|nothing', search)
+
+    assert search.calls == 2
+
+def test_lru_bound():
+    cache = ResultCache(max_entries=2)
+    for query in ['a', 'b', 'c']:
+        cache.put(query, [query])
+
+    assert cache.get('a') is None
+    assert cache.get('b') == ['b']
+    assert cache.stats()['evictions'] == 1
+
+def test_stale_while_revalidate():
+    cache = ResultCache(ttl=0.05, stale_ttl=10)
+    cache.put('bol.com|switch', ['old'])
+    time.sleep(0.1)
+    search = CountingSearch(['new'])
+
+    # The stale value is served immediately while the refresh runs in the background
+    assert cache.get_or_compute('bol.com|switch', search) == ['old']
+    cache.close(wait=True)
+
+    assert search.calls == 1
+    assert cache.get('bol.com|switch') == ['new']
+    assert cache.stats()['refreshes'] == 1
+
+def test_persistent_backing_store(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    cache = ResultCache(path=path)
+    cache.put('marktplaats.nl|bike', [{'title': 'Bike', 'price': '50.00'}])
+    cache.close()
+
+    reopened = ResultCache(path=path)
+    search = CountingSearch([])
+    assert reopened.get_or_compute('marktplaats.nl|bike', search) == [{'title': 'Bike', 'price': '50.00'}]
+    assert search.calls == 0
+    reopened.close()
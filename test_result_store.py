@@ -0,0 +1,83 @@
+import time
+import random
+import logging
+from utils.result_store import ResultStore
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+RESULTS = [
+    {'store': 'Bol.com', 'price': '€449.99', 'title': 'PlayStation 5 Console', 'description': '', 'link': '/b/1'},
+    {'store': 'MediaMarkt', 'price': '439.00', 'title': 'playstation 5 slim', 'description': 'Disc',
+     'link': '/m/1', 'available_online': False},
+    {'store': 'HEMA', 'price': None, 'title': 'PS5 controller', 'description': '', 'link': '/h/1'},
+    {'store': 'Bol.com', 'price': 59.99, 'title': 'DualSense', 'description': '', 'link': '/b/2',
+     'available_online': True},
+]
+
+def make_store():
+    results = ResultStore()
+    assert results.add_all(RESULTS) == 4
+    return results
+
+def test_rows_are_stored_by_column():
+    results = make_store()
+    # The same listing from the same store is kept once
+    assert results.add(dict(RESULTS[0])) is None
+    assert len(results) == 4
+    assert results.index_of('MediaMarkt', '/m/1') == 1
+    assert results.row(1) == {
+        'store': 'MediaMarkt', 'price': 439.0, 'title': 'playstation 5 slim', 'description': 'Disc',
+        'link': '/m/1', 'available_online': False
+    }
+    assert results.row(2)['price'] is None and results.row(2)['available_online'] is None
+    assert results.store_names() == ['Bol.com', 'HEMA', 'MediaMarkt']
+    # Thousands separators are not decimal points
+    row = results.add({'store': 'Coolblue', 'price': '€1.299,00', 'title': 'Laptop', 'link': '/c/1'})
+    assert results.row(row)['price'] == 1299.0
+
+def test_views_sort_and_filter():
+    results = make_store()
+    assert list(results.view()) == [0, 1, 2, 3]
+    # Missing prices sort last in both directions
+    assert list(results.view(sort_by='price')) == [3, 1, 0, 2]
+    assert list(results.view(sort_by='price', descending=True)) == [0, 1, 3, 2]
+    # Text columns sort case-insensitively
+    assert list(results.view(sort_by='title')) == [3, 0, 1, 2]
+
+    assert list(results.view(stores=['Bol.com'])) == [0, 3]
+    assert list(results.view(min_price=100)) == [0, 1]
+    assert list(results.view(max_price=440, sort_by='price')) == [3, 1]
+    assert list(results.view(available_only=True)) == [0, 2, 3]
+
+def test_views_are_cached_until_a_row_is_added():
+    results = make_store()
+    view = results.view(sort_by='price')
+    assert results.view(sort_by='price') is view
+    results.add({'store': 'Coolblue', 'price': '€10.00', 'title': 'Stand', 'link': '/c/1'})
+    assert list(results.view(sort_by='price')) == [4, 3, 1, 0, 2]
+
+def test_large_result_sets_stay_fast():
+    random.seed(1)
+    results = ResultStore()
+    for i in range(10000):
+        results.add({
+            'store': f"Store {i % 23}",
+            'price': f"€{random.uniform(5, 800):.2f}",
+            'title': f"Listing {random.random()}",
+            'link': f"/p/{i}"
+        })
+    start = time.perf_counter()
+    for sort_by in ('price', 'title', 'store'):
+        assert len(results.view(sort_by=sort_by, descending=True)) == 10000
+    assert len(results.view(stores=['Store 1', 'Store 2'], min_price=100, max_price=400)) > 0
+    elapsed = time.perf_counter() - start
+    logger.info(f"Three sorts and a filter over 10k rows took {elapsed * 1000:.1f}ms")
+    assert elapsed < 1.0
+
+if __name__ == "__main__":
+    test_rows_are_stored_by_column()
+    test_views_sort_and_filter()
+    test_views_are_cached_until_a_row_is_added()
+    test_large_result_sets_stay_fast()
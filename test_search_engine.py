@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from scrapers.search_engine import (
+    SearchEngine, SearchJob, STATUS_FOUND, STATUS_NOT_FOUND, STATUS_ERROR, STATUS_TIMEOUT, STATUS_CANCELLED
+)
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def make_store(delay, result=None, error=None):
+    def search(query):
+        time.sleep(delay)
+        if error:
+            raise error
+        return result
+    return search
+
+def test_stores_run_concurrently():
+    engine = SearchEngine(max_concurrency=10)
+    search_functions = {
+        f"Store {i}": make_store(0.2, {'store': f"Store {i}", 'price': '1.00'}) for i in range(10)
+    }
+
+    start = time.monotonic()
+    results = engine.run(search_functions, "PlayStation 5")
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 10
+    assert all(results.values())
+    # Sequential would take 2 seconds
+    assert elapsed < 1.0
+    engine.shutdown()
+
+def test_results_stream_in_completion_order():
+    engine = SearchEngine(max_concurrency=4)
+    search_functions = {
+        'Slow': make_store(0.4, {'store': 'Slow'}),
+        'Fast': make_store(0.05, {'store': 'Fast'}),
+        'Empty': make_store(0.1),
+        'Broken': make_store(0.2, error=ValueError("boom")),
+    }
+    order = []
+    started = []
+
+    engine.run(
+        search_functions,
+        "ipad",
+        on_start=started.append,
+        on_result=lambda store, status, result: order.append((store, status))
+    )
+
+    assert sorted(started) == sorted(search_functions)
+    assert order == [
+        ('Fast', STATUS_FOUND),
+        ('Empty', STATUS_NOT_FOUND),
+        ('Broken', STATUS_ERROR),
+        ('Slow', STATUS_FOUND),
+    ]
+    engine.shutdown()
+
+def test_callbacks_run_on_calling_thread():
+    engine = SearchEngine(max_concurrency=4)
+    caller = threading.current_thread()
+    threads = set()
+
+    engine.run(
+        {f"Store {i}": make_store(0.01, {'store': i}) for i in range(4)},
+        "switch",
+        on_start=lambda store: threads.add(threading.current_thread()),
+        on_result=lambda store, status, result: threads.add(threading.current_thread())
+    )
+
+    assert threads == {caller}
+    engine.shutdown()
+
+def test_store_deadline():
+    engine = SearchEngine(max_concurrency=2, store_timeout=0.2, store_timeouts={'Patient': 2.0})
+    statuses = {}
+
+    start = time.monotonic()
+    engine.run(
+        {
+            'Hanging': make_store(1.0, {'store': 'Hanging'}),
+            'Patient': make_store(0.5, {'store': 'Patient'}),
+        },
+        "xbox",
+        on_result=lambda store, status, result: statuses.__setitem__(store, status)
+    )
+
+    assert statuses == {'Hanging': STATUS_TIMEOUT, 'Patient': STATUS_FOUND}
+    assert time.monotonic() - start < 0.9
+    engine.shutdown()
+
+def test_search_deadline_returns_partial_results():
+    engine = SearchEngine(max_concurrency=4)
+    statuses = {}
+
+    start = time.monotonic()
+    results = engine.run(
+        {
+            'Fast': make_store(0.05, {'store': 'Fast'}),
+            'Slow': make_store(1.0, {'store': 'Slow'}),
+            'Slower': make_store(2.0, {'store': 'Slower'}),
+        },
+        "ps5",
+        on_result=lambda store, status, result: statuses.__setitem__(store, status),
+        deadline=0.3
+    )
+
+    assert time.monotonic() - start < 0.6
+    assert results['Fast'] == {'store': 'Fast'}
+    assert statuses == {'Fast': STATUS_FOUND, 'Slow': STATUS_TIMEOUT, 'Slower': STATUS_TIMEOUT}
+    engine.shutdown()
+
+def test_cancel_stops_search():
+    engine = SearchEngine(max_concurrency=2)
+    job = SearchJob()
+    statuses = {}
+    search_functions = {f"Store {i}": make_store(0.5, {'store': i}) for i in range(6)}
+
+    threading.Timer(0.1, job.cancel).start()
+    start = time.monotonic()
+    engine.run(
+        search_functions,
+        "nintendo switch",
+        job=job,
+        on_result=lambda store, status, result: statuses.__setitem__(store, status)
+    )
+
+    assert job.done
+    assert time.monotonic() - start < 0.4
+    assert set(statuses) == set(search_functions)
+    assert set(statuses.values()) == {STATUS_CANCELLED}
+    engine.shutdown()
+
+if __name__ == "__main__":
+    test_stores_run_concurrently()
+    test_results_stream_in_completion_order()
+    test_callbacks_run_on_calling_thread()
+    test_store_deadline()
+    test_search_deadline_returns_partial_results()
+    test_cancel_stops_search()
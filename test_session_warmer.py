@@ -0,0 +1,122 @@
+import time
+import logging
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.stores import StoreConfig
+from scrapers.base.base_scraper import BaseScraper
+from utils.http_client import AsyncHttpClient, SyncHttpClient
+from utils.session_warmer import SessionWarmer, is_blocked
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+RESULTS = b"""<html><body>
+<div class="result"><a class="name" href="/p/1">PlayStation 5 Console</a><span class="cost">449,99</span></div>
+</body></html>"""
+
+class AmazonLikeHandler(BaseHTTPRequestHandler):
+    """Only serves search results to clients that present a session cookie from the homepage."""
+    protocol_version = 'HTTP/1.1'
+    sessions = set()
+    homepage_visits = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path == '/':
+            with self.lock:
+                AmazonLikeHandler.homepage_visits += 1
+                session = f"s{AmazonLikeHandler.homepage_visits}"
+                AmazonLikeHandler.sessions.add(session)
+            expires = formatdate(time.time() + 3600, usegmt=True)
+            return self._send(200, b'<html>welcome</html>', {
+                'Set-Cookie': f"session-id={session}; Path=/; Expires={expires}"
+            })
+        cookie = self.headers.get('Cookie', '')
+        session = cookie.partition('session-id=')[2].split(';')[0]
+        if session not in self.sessions:
+            return self._send(503, b'<html>Enter the characters you see below (captcha)</html>')
+        self._send(200, RESULTS)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    AmazonLikeHandler.sessions.clear()
+    AmazonLikeHandler.homepage_visits = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AmazonLikeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_config(base_url):
+    return StoreConfig(
+        name='Shop',
+        base_url=base_url,
+        search_url=base_url + '/s?k={query}',
+        selectors={'container': 'div.result', 'title': 'a.name', 'price': 'span.cost', 'link': 'a.name'},
+        cache_ttl=0,
+        warm_up=True
+    )
+
+def test_warm_up_once_and_reuse_cookies(tmp_path):
+    server, base_url = start_server()
+    client = SyncHttpClient(AsyncHttpClient())
+    path = str(tmp_path / 'sessions.sqlite3')
+    try:
+        warmer = SessionWarmer(path)
+        scraper = BaseScraper(make_config(base_url), http_client=client, session_warmer=warmer)
+        for query in ('playstation 5', 'ps5 console', 'playstation'):
+            assert scraper.search(query)['title'] == 'PlayStation 5 Console'
+        assert AmazonLikeHandler.homepage_visits == 1
+        stats = warmer.stats()['Shop']
+        logger.info(f"Warmer stats: {stats}")
+        assert stats['warmups'] == 1 and stats['reuses'] == 2
+
+        # After a restart the session is loaded from disk
+        restarted = SessionWarmer(path)
+        scraper = BaseScraper(make_config(base_url), http_client=client, session_warmer=restarted)
+        assert scraper.search('playstation 5') is not None
+        assert AmazonLikeHandler.homepage_visits == 1
+        assert restarted.stats()['Shop']['loaded'] == 1
+
+        # A rejected session is warmed again and the search retried
+        AmazonLikeHandler.sessions.clear()
+        assert scraper.search('playstation 5') is not None
+        assert AmazonLikeHandler.homepage_visits == 2
+        assert restarted.stats()['Shop']['invalidations'] == 1
+        assert scraper.make_request(base_url + '/s?k=ps5').status_code == 200
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_sessions_expire():
+    warmer = SessionWarmer(None, ttl=0.2)
+    calls = []
+    warm = lambda: calls.append(1) or ({'id': str(len(calls))}, None)
+    assert warmer.cookies('Shop', 'ua', warm) == {'id': '1'}
+    assert warmer.cookies('Shop', 'ua', warm) == {'id': '1'}
+    # Sessions are kept per User-Agent
+    assert warmer.cookies('Shop', 'other ua', warm) == {'id': '2'}
+    time.sleep(0.25)
+    assert warmer.cookies('Shop', 'ua', warm) == {'id': '3'}
+
+    # Cookie expiry wins over the ttl, and failed warm-ups are not cached
+    assert SessionWarmer(None).cookies('Shop', 'ua', lambda: ({'id': 'x'}, time.time() - 1)) == {'id': 'x'}
+    failing = SessionWarmer(None)
+    assert failing.cookies('Shop', 'ua', lambda: None) == {}
+    assert failing.stats()['Shop']['failed_warmups'] == 1
+
+def test_is_blocked():
+    assert is_blocked(503)
+    assert is_blocked(200, b'<title>Robot Check</title>')
+    assert not is_blocked(200, b'<html>results</html>')
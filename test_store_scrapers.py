@@ -0,0 +1,154 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from config.stores import StoreConfig, STORE_CONFIGS
+from scrapers.store_scrapers import StoreScrapers
+from utils.http_client import SyncHttpClient
+from utils.rate_limiter import RateLimiter
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PAGES = {
+    '1': """
+<ul>
+  <li class="item"><a class="name" href="/p/1">PlayStation 5 Slim</a><span class="cost">€ 1.049,00</span>
+    <span class="badge">Gesponsord</span></li>
+  <li class="item"><a class="name" href="/p/2">PlayStation 5 Console</a><span class="cost">vanaf € 12,99</span></li>
+</ul>
+""",
+    '2': """
+<ul>
+  <li class="item"><a class="name" href="/p/3">PlayStation 5 Console Disc</a><span class="cost">€ 449,99</span></li>
+</ul>
+"""
+}
+
+class ShopHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    paths = []
+    headers_seen = []
+
+    def do_GET(self):
+        ShopHandler.paths.append(self.path)
+        ShopHandler.headers_seen.append(dict(self.headers))
+        page = parse_qs(urlsplit(self.path).query).get('p', ['1'])[0]
+        body = PAGES.get(page, '<ul></ul>').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ShopHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_config(base_url, **overrides):
+    return StoreConfig(
+        name='Local Shop',
+        base_url=base_url,
+        search_url=base_url + '/zoeken?q={query}',
+        selectors={
+            'container': 'li.item',
+            'title': 'a.name',
+            'price': ['span.missing', 'span.cost'],
+            'link': 'a.name',
+            'skip': 'span.badge'
+        },
+        rate_limit=0,
+        cache_ttl=0,
+        **overrides
+    )
+
+def test_store_is_searched_from_config():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    config = make_config(
+        base_url,
+        pagination={'param': 'p', 'start': 1, 'max_pages': 3},
+        skip_keywords=['gesponsord']
+    )
+    scrapers = StoreScrapers(http_client=client, store_configs={'shop': config}, rate_limiter=RateLimiter())
+    ShopHandler.paths.clear()
+    try:
+        result = scrapers.get_search_functions()['Local Shop']('PlayStation 5 Console')
+
+        # The sponsored product is skipped and the closest title with a plausible price wins
+        assert result == {
+            'store': 'Local Shop',
+            'price': '€449.99',
+            'title': 'PlayStation 5 Console Disc',
+            'description': '',
+            'link': base_url + '/p/3'
+        }
+        # Page 3 is empty, which ends the pagination
+        assert ShopHandler.paths == [
+            '/zoeken?q=PlayStation%205%20Console',
+            '/zoeken?q=PlayStation%205%20Console&p=2',
+            '/zoeken?q=PlayStation%205%20Console&p=3'
+        ]
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_implausible_prices_are_rejected():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    scrapers = StoreScrapers(
+        http_client=client,
+        store_configs={'shop': make_config(base_url)},
+        rate_limiter=RateLimiter()
+    )
+    try:
+        # €1049 and €12.99 are both outside the PS5 range, and there is no second page
+        assert scrapers.search('shop', 'PlayStation 5') is None
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_api_credentials_are_not_sent_as_headers():
+    server, base_url = start_server()
+    client = SyncHttpClient()
+    amazon = STORE_CONFIGS['amazon.nl']
+    config = make_config(
+        base_url,
+        custom_headers=amazon.custom_headers,
+        api_credentials={key: 'secret-' + key for key in amazon.api_credentials}
+    )
+    scrapers = StoreScrapers(http_client=client, store_configs={'shop': config}, rate_limiter=RateLimiter())
+    ShopHandler.headers_seen.clear()
+    try:
+        scrapers.search('shop', 'PlayStation 5')
+        assert ShopHandler.headers_seen
+        for headers in ShopHandler.headers_seen:
+            # The store's own User-Agent is a real header and is sent
+            assert headers['User-Agent'] == amazon.custom_headers['User-Agent']
+            assert not any(key.upper() in amazon.api_credentials for key in headers), headers
+            assert not any('secret-' in value for value in headers.values()), headers
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_every_configured_store_has_a_search_function():
+    scrapers = StoreScrapers(http_client=SyncHttpClient())
+    try:
+        functions = scrapers.get_search_functions()
+        assert list(functions) == scrapers.get_store_list()
+        assert set(functions) == {
+            config.name for config in STORE_CONFIGS.values() if config.selectors.get('container')
+        }
+    finally:
+        scrapers.http.close()
+
+if __name__ == "__main__":
+    test_store_is_searched_from_config()
+    test_implausible_prices_are_rejected()
+    test_api_credentials_are_not_sent_as_headers()
+    test_every_configured_store_has_a_search_function()
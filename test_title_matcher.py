@@ -0,0 +1,58 @@
+import logging
+from utils.title_matcher import TitleMatcher, match_scores, RAPIDFUZZ_AVAILABLE, DEFAULT_BACKEND
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+TITLES = [
+    'DualSense Wireless Controller - Midnight Black',
+    'PlayStation 5 Console Disc Edition',
+    'PlayStation 5 Digital Edition Slim',
+    'Nintendo Switch OLED Model White',
+    'PlayStation 5 Console Disc Edition',
+    'Xbox Series X 1TB Console'
+]
+
+def test_best_match_per_backend():
+    for backend in ('tfidf', 'difflib'):
+        matcher = TitleMatcher(TITLES, backend=backend)
+        scores = matcher.scores('playstation 5 console')
+        logger.info(f"{backend}: {[round(score, 2) for score in scores]}")
+
+        assert len(scores) == len(TITLES)
+        assert all(0.0 <= score <= 1.0 for score in scores)
+        assert max(range(len(TITLES)), key=scores.__getitem__) == 1
+        # Identical titles get identical scores
+        assert scores[1] == scores[4]
+
+def test_exact_title_scores_one():
+    scores = match_scores('Xbox  series x 1TB console', TITLES, backend='tfidf')
+    assert abs(scores[5] - 1.0) < 1e-9
+
+def test_top_k():
+    matcher = TitleMatcher(TITLES, backend='tfidf')
+    top = matcher.top_k('playstation 5 edition', k=3)
+    assert len(top) == 3
+    assert {index for index, _ in top} == {1, 2, 4}
+    assert [score for _, score in top] == sorted((score for _, score in top), reverse=True)
+    # Ties keep title order
+    assert [index for index, _ in top if index in (1, 4)] == [1, 4]
+
+    assert matcher.top_k('playstation 5', k=10, min_score=0.99) == []
+    assert TitleMatcher([], backend='tfidf').top_k('ps5') == []
+
+def test_backends():
+    assert DEFAULT_BACKEND == ('rapidfuzz' if RAPIDFUZZ_AVAILABLE else 'tfidf')
+    assert TitleMatcher(TITLES, backend='rapidfuzz').backend == ('rapidfuzz' if RAPIDFUZZ_AVAILABLE else 'tfidf')
+    try:
+        TitleMatcher(TITLES, backend='soundex')
+        assert False, "unknown backend accepted"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_best_match_per_backend()
+    test_exact_title_scores_one()
+    test_top_k()
+    test_backends()
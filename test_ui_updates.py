@@ -0,0 +1,83 @@
+import logging
+import threading
+from utils.ui_updates import UiUpdateQueue
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class FakeRoot:
+    """Stands in for Tk's root.after: callbacks run only when tick() is called."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def tick(self):
+        callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback()
+
+def test_updates_wait_for_the_ui_thread_and_coalesce():
+    root = FakeRoot()
+    applied = []
+    flushes = []
+    queue = UiUpdateQueue(root.after, on_flush=lambda: flushes.append(len(applied)))
+    queue.start()
+
+    queue.post(applied.append, 'status: 0/3', key='status')
+    queue.post(applied.append, 'row 1')
+    queue.post(applied.append, 'status: 1/3', key='status')
+    queue.post(applied.append, 'row 2')
+    queue.post(applied.append, 'status: 2/3', key='status')
+    assert applied == []
+
+    # One tick applies the burst in order, with only the latest status, and flushes once
+    root.tick()
+    assert applied == ['row 1', 'row 2', 'status: 2/3']
+    assert flushes == [3]
+
+    # Nothing pending: no flush, but the tick keeps running
+    root.tick()
+    assert flushes == [3]
+    assert len(root.scheduled) == 1
+
+    stats = queue.stats()
+    assert stats['posted'] == 5 and stats['coalesced'] == 2 and stats['applied'] == 3 and stats['pending'] == 0
+
+def test_posts_from_many_threads():
+    root = FakeRoot()
+    applied = []
+    queue = UiUpdateQueue(root.after)
+
+    def worker(n):
+        for i in range(500):
+            queue.post(applied.append, (n, i))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert queue.drain() == 2000
+    assert len(applied) == 2000
+    # Each thread's updates keep their order
+    for n in range(4):
+        assert [i for m, i in applied if m == n] == list(range(500))
+
+def test_failing_update_does_not_stop_the_batch():
+    root = FakeRoot()
+    applied = []
+    queue = UiUpdateQueue(root.after)
+    queue.post(lambda: 1 / 0)
+    queue.post(applied.append, 'after')
+    assert queue.drain() == 2
+    assert applied == ['after']
+
+if __name__ == "__main__":
+    test_updates_wait_for_the_ui_thread_and_coalesce()
+    test_posts_from_many_threads()
+    test_failing_update_does_not_stop_the_batch()
@@ -1,17 +1,26 @@
 import tkinter as tk
 from tkinter import ttk
 import customtkinter as ctk
+import math
 import threading
-import time
 import webbrowser
 from difflib import SequenceMatcher
-import re
 
 from scrapers.store_scrapers import StoreScrapers
+from scrapers.search_engine import (
+    SearchEngine, SearchJob, STATUS_FOUND, STATUS_NOT_FOUND, STATUS_TIMEOUT, STATUS_CANCELLED, STATUS_UNAVAILABLE
+)
 from utils.price_utils import extract_price, validate_price, string_similarity
+from utils.product_index import ProductIndex
+from utils.price_history import get_price_history
+from utils.circuit_breaker import STATE_OPEN, get_circuit_breaker
+from utils.ui_updates import UiUpdateQueue
+from utils.result_store import ResultStore
+
+ALL_STORES = "All stores"
 
 class PriceComparisonApp:
-    def __init__(self, root):
+    def __init__(self, root, max_concurrency=8, store_timeout=20.0):
         self.root = root
         self.root.title("Price Comparison Tool")
         self.root.geometry("1200x800")
@@ -23,6 +32,23 @@ class PriceComparisonApp:
         # Initialize store scrapers
         self.store_scrapers = StoreScrapers()
         
+        # Groups the results of the current search into products across stores
+        self.product_index = ProductIndex()
+        self.search_query = ''
+        
+        # Every observed price is appended to the local price history
+        self.price_history = get_price_history()
+        
+        # Concurrent search engine; every store is searched at once within the budget
+        self.search_engine = SearchEngine(
+            max_concurrency=max_concurrency,
+            store_timeout=store_timeout
+        )
+        
+        # Widgets are only touched on the Tk thread: search threads post their updates here,
+        # and each tick applies a whole burst of them before retagging the best price once
+        self.ui_updates = UiUpdateQueue(self.root.after, on_flush=self.refresh_results)
+        
         # Create main container with gradient background
         main_container = ctk.CTkFrame(root, fg_color="#1A1A2E")
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -149,6 +175,11 @@ class PriceComparisonApp:
             label.grid(row=row, column=col, padx=5, pady=2, sticky='w')
             self.store_status_labels[store] = label
         
+        # Show stores going unhealthy or recovering as it happens; the breaker calls from scraper threads
+        get_circuit_breaker().subscribe(
+            lambda store, state: self.ui_updates.post(self.show_store_health, store, key=('health', store))
+        )
+        
         # Loading animation
         self.loading_dots = 0
         self.loading_label = ctk.CTkLabel(
@@ -168,8 +199,41 @@ class PriceComparisonApp:
             border_color="#3A3A6A"
         )
         results_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 20))
+        
+        # Filters, applied to the result store rather than the tree
+        filter_frame = ctk.CTkFrame(results_frame, fg_color="transparent")
+        filter_frame.pack(side=tk.TOP, fill=tk.X, padx=15, pady=(15, 0))
+        
+        self.store_filter = ctk.CTkOptionMenu(
+            filter_frame,
+            values=[ALL_STORES] + list(self.store_scrapers.get_store_list()),
+            command=lambda choice: self.apply_filters(),
+            fg_color="#3A3A6A",
+            width=200
+        )
+        self.store_filter.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.min_price_entry = ctk.CTkEntry(filter_frame, width=100, placeholder_text="Min €", fg_color="#3A3A6A")
+        self.min_price_entry.pack(side=tk.LEFT, padx=(0, 10))
+        self.max_price_entry = ctk.CTkEntry(filter_frame, width=100, placeholder_text="Max €", fg_color="#3A3A6A")
+        self.max_price_entry.pack(side=tk.LEFT, padx=(0, 10))
+        for entry in (self.min_price_entry, self.max_price_entry):
+            entry.bind('<Return>', lambda event: self.apply_filters())
+            entry.bind('<FocusOut>', lambda event: self.apply_filters())
+        
+        # Only listings a store reported as out of stock are hidden; most stores do not report stock
+        self.available_only = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            filter_frame,
+            text="Hide out of stock",
+            variable=self.available_only,
+            command=self.apply_filters
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.result_count_label = ctk.CTkLabel(filter_frame, text="", font=('Helvetica', 12), text_color='#888888')
+        self.result_count_label.pack(side=tk.RIGHT)
 
-        # Create Treeview for results
+        # Create Treeview for results; it only ever holds the rows on screen (see render_results)
         self.tree = ttk.Treeview(
             results_frame,
             columns=('Store', 'Price', 'Title', 'Description', 'Link'),
@@ -178,11 +242,9 @@ class PriceComparisonApp:
             style='Custom.Treeview'
         )
 
-        # Configure columns
-        self.tree.heading('Store', text='Store', anchor='w')
-        self.tree.heading('Price', text='Price', anchor='w')
-        self.tree.heading('Title', text='Title', anchor='w')
-        self.tree.heading('Description', text='Description', anchor='w')
+        # Configure columns; clicking a heading sorts by it
+        for column in ('Store', 'Price', 'Title', 'Description'):
+            self.tree.heading(column, text=column, anchor='w', command=lambda c=column: self.sort_results(c.lower()))
         self.tree.heading('Link', text='Link', anchor='w')
 
         # Set column widths
@@ -192,23 +254,42 @@ class PriceComparisonApp:
         self.tree.column('Description', width=300, anchor='w')
         self.tree.column('Link', width=0, stretch=False)
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Add scrollbar; it scrolls the view of the result store, not the tree
+        self.scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.scroll_results)
 
         # Pack the tree and scrollbar
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=15, pady=15)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=15)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=15)
+        
+        # Mouse wheel (Windows/macOS, then X11) and resizing move the window of visible rows
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_results('scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_results('scroll', -1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_results('scroll', 1, 'units'))
+        self.tree.bind('<Configure>', lambda event: self.render_results())
 
         # Bind double-click event to open link
         self.tree.bind('<Double-1>', self.open_link)
+        self.tree.tag_configure('best_price', foreground='#4A90E2')
+        
+        # Every result of the current search, the rows shown (filtered and sorted), and the
+        # first of them on screen; the best price row is a row of the result store
+        self.results = ResultStore()
+        self.result_view = self.results.view()
+        self.view_offset = 0
+        self.sort_by = None
+        self.sort_descending = False
+        self.best_row = None
+        self.results_stale = False
         
         # Configure styles
         self.configure_styles()
         
         # Search thread
         self.search_thread = None
+        self.search_job = None
         self.is_searching = False
+        
+        self.ui_updates.start()
 
     def configure_styles(self):
         style = ttk.Style()
@@ -257,30 +338,13 @@ class PriceComparisonApp:
         style.configure("Custom.Treeview.Heading", background="#2A2A4A")
 
     def open_link(self, event):
-        item = self.tree.selection()[0]
-        link = self.tree.item(item)['values'][4]
+        selection = self.tree.selection()
+        if not selection:
+            return
+        link = self.tree.item(selection[0])['values'][4]
         if link:
             webbrowser.open(link)
 
-    def find_best_price(self, results):
-        if not results:
-            return None
-            
-        best_price = float('inf')
-        best_result = None
-        
-        for result in results:
-            if result and result.get('price'):
-                try:
-                    price = float(re.sub(r'[^\d.]', '', result['price']))
-                    if price < best_price:
-                        best_price = price
-                        best_result = result
-                except (ValueError, TypeError):
-                    continue
-                    
-        return best_result
-
     def update_status(self, message, progress=None):
         self.status_label.configure(
             text=message,
@@ -298,9 +362,6 @@ class PriceComparisonApp:
                 self.progress_bar.configure(progress_color="#FFA500")
             else:
                 self.progress_bar.configure(progress_color="#4A90E2")
-        
-        self.root.update_idletasks()
-        self.root.update()
 
     def update_loading_animation(self):
         if self.is_searching:
@@ -308,6 +369,14 @@ class PriceComparisonApp:
             self.loading_label.configure(text="." * self.loading_dots)
             self.root.after(500, self.update_loading_animation)
 
+    def show_store_health(self, store):
+        """Show a store whose circuit is open as unavailable, with the time until it is retried."""
+        breaker = get_circuit_breaker()
+        if breaker.state(store) == STATE_OPEN:
+            self.update_store_status(store, f"Unavailable (retry in {breaker.retry_in(store):.0f}s)", '#FFA500')
+        elif self.store_status_labels.get(store) is not None and not self.is_searching:
+            self.update_store_status(store, "Waiting")
+
     def update_store_status(self, store, status, color='#888888'):
         if store in self.store_status_labels:
             self.store_status_labels[store].configure(
@@ -336,9 +405,6 @@ class PriceComparisonApp:
                     fg_color="transparent",
                     text_color="#888888"
                 )
-            
-            self.root.update_idletasks()
-            self.root.update()
 
     def toggle_search(self):
         if self.is_searching:
@@ -348,6 +414,8 @@ class PriceComparisonApp:
 
     def stop_search(self):
         self.is_searching = False
+        if self.search_job:
+            self.search_job.cancel()
         self.search_button.configure(
             text="Search",
             fg_color="#4A90E2",
@@ -371,67 +439,89 @@ class PriceComparisonApp:
         self.update_loading_animation()
         
         # Clear previous results
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.results = ResultStore()
+        self.best_row = None
+        self.view_offset = 0
+        self.apply_filters()
+        self.product_index = ProductIndex()
+        self.search_query = self.product_entry.get()
             
         # Start search in a separate thread
+        self.search_job = SearchJob()
         self.search_thread = threading.Thread(target=self.search_prices)
         self.search_thread.daemon = True
         self.search_thread.start()
 
     def search_prices(self):
+        # Runs on the search thread: every widget update goes through self.ui_updates
+        job = self.search_job
+        post = self.ui_updates.post
         try:
-            product = self.product_entry.get()
+            product = self.search_query
             if not product:
-                self.finish_search()
+                post(self.finish_search)
                 return
                 
-            # Reset store statuses
+            # Reset store statuses; stores being skipped say so up front
             for store in self.store_status_labels:
-                self.update_store_status(store, "Waiting")
+                post(self.update_store_status, store, "Waiting", key=('store', store))
+                post(self.show_store_health, store, key=('health', store))
                 
-            # Search on all websites
-            results = []
-            total_stores = len(self.store_status_labels)
-            current_store = 0
-            
             # Get search functions from store scrapers
             search_functions = self.store_scrapers.get_search_functions()
+            total_stores = len(search_functions)
+            completed = 0
             
-            # Search each store
-            for store, search_func in search_functions.items():
-                if not self.is_searching:
-                    break
-                    
-                progress = current_store / total_stores
-                self.update_status(f"Searching {store}...", progress)
-                self.update_store_status(store, "Searching...", '#4A90E2')
-                
-                try:
-                    result = search_func(product)
-                    if result and result.get('link'):
-                        results.append(result)
-                        self.update_store_status(store, "Found", '#4A90E2')
-                        self.insert_result(result)
-                    else:
-                        self.update_store_status(store, "Not found", '#FF6B6B')
-                except Exception as e:
-                    print(f"{store} error: {str(e)}")
-                    self.update_store_status(store, "Error", '#FF6B6B')
+            post(self.update_status, f"Searching {total_stores} stores...", 0, key='status')
+            
+            def on_start(store):
+                post(self.update_store_status, store, "Searching...", '#4A90E2', key=('store', store))
+            
+            def on_result(store, status, result):
+                nonlocal completed
+                completed += 1
+                key = ('store', store)
                 
-                current_store += 1
+                if status == STATUS_FOUND and result.get('link'):
+                    post(self.update_store_status, store, "Found", '#4A90E2', key=key)
+                    # Every observed price is recorded here, off the Tk thread
+                    self.price_history.record_result(result)
+                    post(self.insert_result, result, job)
+                elif status in (STATUS_FOUND, STATUS_NOT_FOUND):
+                    post(self.update_store_status, store, "Not found", '#FF6B6B', key=key)
+                elif status == STATUS_TIMEOUT:
+                    post(self.update_store_status, store, "Timed out", '#FF6B6B', key=key)
+                elif status == STATUS_UNAVAILABLE:
+                    post(self.update_store_status, store, "Unavailable", '#FFA500', key=key)
+                    post(self.show_store_health, store, key=('health', store))
+                elif status == STATUS_CANCELLED:
+                    post(self.update_store_status, store, "Cancelled", key=key)
+                else:
+                    post(self.update_store_status, store, "Error", '#FF6B6B', key=key)
                 
-                self.root.update_idletasks()
-                self.root.update()
-                time.sleep(0.1)
+                if not job.cancelled:
+                    post(
+                        self.update_status,
+                        f"Searched {completed}/{total_stores} stores...",
+                        completed / total_stores,
+                        key='status'
+                    )
             
-            if self.is_searching:
-                self.finish_search()
-            else:
-                self.finish_search()
+            # Search all stores concurrently, streaming results as they arrive
+            self.search_engine.run(
+                search_functions,
+                product,
+                job=job,
+                on_start=on_start,
+                on_result=on_result
+            )
+            
+            # stop_search already reset the controls when the job was cancelled
+            if not job.cancelled:
+                post(self.finish_search)
         except Exception as e:
             print(f"Search error: {str(e)}")
-            self.finish_search()
+            post(self.finish_search)
 
     def finish_search(self):
         try:
@@ -454,39 +544,101 @@ class PriceComparisonApp:
             )
             self.update_status("Search completed", 1)
 
-    def insert_result(self, result):
-        current_items = self.tree.get_children()
-        current_results = []
-        
-        for item in current_items:
-            values = self.tree.item(item)['values']
-            current_results.append({
-                'store': values[0],
-                'price': values[1],
-                'title': values[2],
-                'description': values[3],
-                'link': values[4]
-            })
-        
-        current_results.append(result)
-        best_result = self.find_best_price(current_results)
-        
-        for item in current_items:
-            self.tree.delete(item)
-            
-        for res in current_results:
-            tags = ('best_price',) if res == best_result else ()
-            self.tree.insert(
-                '',
-                tk.END,
-                values=(
-                    res['store'],
-                    res['price'],
-                    res['title'],
-                    res['description'][:100] + '...' if res['description'] else '',
-                    res['link']
-                ),
-                tags=tags
+    def insert_result(self, result, job=None):
+        """Add one result to the result store (on the Tk thread); the view is refreshed once per batch."""
+        if job is not None and job is not self.search_job:
+            return  # Arrived after a new search cleared the results
+        if self.results.add(result) is None:
+            return
+        # The index is updated incrementally as each store's result arrives
+        self.product_index.add(result)
+        self.results_stale = True
+
+    def refresh_results(self):
+        """Re-filter, re-sort and redraw after a batch of results, finding the best price once."""
+        if not self.results_stale:
+            return
+        self.results_stale = False
+        best_result = self.product_index.best_offer(self.search_query)
+        self.best_row = None
+        if best_result is not None:
+            self.best_row = self.results.index_of(best_result['store'], best_result['link'])
+        self.apply_filters(keep_offset=True)
+
+    def read_price(self, entry):
+        try:
+            return float(entry.get().replace(',', '.')) if entry.get().strip() else None
+        except ValueError:
+            return None
+
+    def apply_filters(self, keep_offset=False):
+        """Recompute which rows are shown from the filter controls and the current sort."""
+        store = self.store_filter.get()
+        self.result_view = self.results.view(
+            sort_by=self.sort_by,
+            descending=self.sort_descending,
+            stores=None if store == ALL_STORES else [store],
+            min_price=self.read_price(self.min_price_entry),
+            max_price=self.read_price(self.max_price_entry),
+            available_only=self.available_only.get()
+        )
+        if not keep_offset:
+            self.view_offset = 0
+        self.result_count_label.configure(text=f"{len(self.result_view)} of {len(self.results)} results")
+        self.render_results()
+
+    def sort_results(self, column):
+        """Sort by a column; clicking the same heading again reverses the order."""
+        if self.sort_by == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_by, self.sort_descending = column, False
+        self.apply_filters()
+
+    def visible_row_count(self):
+        rowheight = ttk.Style().lookup('Custom.Treeview', 'rowheight') or 50
+        height = self.tree.winfo_height()
+        if height <= 1:  # Not laid out yet
+            return int(self.tree.cget('height'))
+        # The heading takes about one row
+        return max(1, height // int(rowheight) - 1)
+
+    def scroll_results(self, action, amount, unit=None):
+        """Scrollbar and mouse wheel handler: ('moveto', fraction) or ('scroll', n, 'units'|'pages')."""
+        visible = self.visible_row_count()
+        if action == 'moveto':
+            self.view_offset = int(float(amount) * len(self.result_view))
+        elif action == 'scroll':
+            self.view_offset += int(amount) * (visible if unit == 'pages' else 1)
+        self.render_results()
+
+    def render_results(self):
+        """Show only the rows of the view that fit on screen, reusing the tree's items."""
+        visible = self.visible_row_count()
+        total = len(self.result_view)
+        self.view_offset = max(0, min(self.view_offset, total - visible))
+        rows = self.result_view[self.view_offset:self.view_offset + visible]
+
+        items = self.tree.get_children()
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for position, row in enumerate(rows):
+            price = self.results.prices[row]
+            description = self.results.descriptions[row]
+            values = (
+                self.results.stores[row],
+                '' if math.isnan(price) else f"€{price:.2f}",
+                self.results.titles[row],
+                description[:100] + '...' if description else '',
+                self.results.links[row]
             )
-        
-        self.tree.tag_configure('best_price', foreground='#4A90E2') 
\ No newline at end of file
+            tags = ('best_price',) if row == self.best_row else ()
+            if position < len(items):
+                self.tree.item(items[position], values=values, tags=tags)
+            else:
+                self.tree.insert('', tk.END, values=values, tags=tags)
+
+        if total:
+            self.scrollbar.set(self.view_offset / total, (self.view_offset + len(rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
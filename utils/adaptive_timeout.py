@@ -0,0 +1,121 @@
+import math
+import logging
+from collections import deque
+from threading import Lock
+from typing import Dict, Optional, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0  # Used until a store has min_samples observations
+DEFAULT_MIN_TIMEOUT = 2.0
+DEFAULT_MAX_TIMEOUT = 10.0
+DEFAULT_MULTIPLIER = 3.0  # Timeout is this multiple of the p99
+DEFAULT_WINDOW = 200  # Most recent observations kept per store
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_HEDGE_QUANTILE = 0.95
+
+
+def _quantile(ordered, q: float) -> float:
+    """Nearest-rank quantile of a sorted, non-empty sequence."""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class AdaptiveTimeouts:
+    def __init__(self,
+                 default_timeout: float = DEFAULT_TIMEOUT,
+                 min_timeout: float = DEFAULT_MIN_TIMEOUT,
+                 max_timeout: float = DEFAULT_MAX_TIMEOUT,
+                 multiplier: float = DEFAULT_MULTIPLIER,
+                 window: int = DEFAULT_WINDOW,
+                 min_samples: int = DEFAULT_MIN_SAMPLES,
+                 hedge_quantile: float = DEFAULT_HEDGE_QUANTILE):
+        """
+        Per-store request timeouts and hedge delays derived from observed latency.
+
+        Every response's time to first byte is recorded per store in a
+        sliding window. A store's timeout is multiplier x its p99, clamped to
+        [min_timeout, max_timeout], so a fast store gives up on a stuck
+        request long before a slow one would; requests that time out are
+        recorded at the timeout they hit, so a store that gets slower raises
+        its own timeout again. The hedge delay is the hedge_quantile latency:
+        a request still waiting by then is likely in the tail, and a second
+        copy usually finishes sooner. Until a store has min_samples
+        observations, default_timeout applies and nothing is hedged.
+
+        Args:
+            default_timeout: Timeout for stores without enough observations
+            min_timeout: Lower bound of an adaptive timeout
+            max_timeout: Upper bound of an adaptive timeout
+            multiplier: Timeout as a multiple of the p99 latency
+            window: Most recent observations kept per store
+            min_samples: Observations needed before timeouts adapt
+            hedge_quantile: Latency quantile after which a request is hedged
+        """
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.window = window
+        self.min_samples = min_samples
+        self.hedge_quantile = hedge_quantile
+
+        self._samples: Dict[str, deque] = {}
+        self._hedges: Dict[str, Dict[str, int]] = {}
+        self._lock = Lock()
+
+    def record(self, store: str, seconds: float):
+        """Record the time one request to the store took to start responding."""
+        with self._lock:
+            samples = self._samples.get(store)
+            if samples is None:
+                samples = self._samples[store] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def _sorted(self, store: str):
+        with self._lock:
+            samples = self._samples.get(store)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            return sorted(samples)
+
+    def timeout_for(self, store: str) -> float:
+        """Timeout in seconds for the next request to the store."""
+        ordered = self._sorted(store)
+        if ordered is None:
+            return self.default_timeout
+        return min(self.max_timeout, max(self.min_timeout, _quantile(ordered, 0.99) * self.multiplier))
+
+    def hedge_delay(self, store: str) -> Optional[float]:
+        """Seconds after which a still-unanswered request is hedged, or None while there is too little data."""
+        ordered = self._sorted(store)
+        if ordered is None:
+            return None
+        return _quantile(ordered, self.hedge_quantile)
+
+    def record_hedge(self, store: str, won: Optional[bool] = None):
+        """Count a hedged request (won=None) or whether the hedge answered first."""
+        with self._lock:
+            counts = self._hedges.setdefault(store, {'hedged': 0, 'hedge_wins': 0})
+            if won is None:
+                counts['hedged'] += 1
+            elif won:
+                counts['hedge_wins'] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per store: samples, p50/p95/p99 latency, current timeout and hedge counters."""
+        with self._lock:
+            stores = set(self._samples) | set(self._hedges)
+            snapshot = {store: sorted(self._samples.get(store, ())) for store in stores}
+            hedges = {store: dict(counts) for store, counts in self._hedges.items()}
+        result = {}
+        for store, ordered in snapshot.items():
+            row: Dict[str, Any] = {'samples': len(ordered), 'timeout': self.timeout_for(store)}
+            if ordered:
+                for q in (0.5, 0.95, 0.99):
+                    row[f"p{int(q * 100)}"] = _quantile(ordered, q)
+            row.update(hedges.get(store, {'hedged': 0, 'hedge_wins': 0}))
+            result[store] = row
+        return result
+
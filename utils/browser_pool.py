@@ -0,0 +1,222 @@
+import atexit
+import logging
+from contextlib import contextmanager
+from queue import Queue, Empty
+from threading import Lock
+from typing import Callable, Dict, Optional, Any, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_USES = 25
+
+_driver_path: Optional[str] = None
+_driver_path_lock = Lock()
+
+
+def _chromedriver_path() -> str:
+    """Resolve chromedriver once per process instead of once per browser."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def chrome_factory(headless: bool = True, user_agent: Optional[str] = None) -> Callable[[], Any]:
+    """Return a function that launches a Chrome instance with the scrapers' options."""
+    def create():
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-infobars')
+        options.add_argument('--disable-notifications')
+        options.add_argument('--disable-popup-blocking')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        if user_agent:
+            options.add_argument(f'user-agent={user_agent}')
+
+        driver = webdriver.Chrome(service=Service(_chromedriver_path()), options=options)
+        driver.set_page_load_timeout(30)
+        return driver
+    return create
+
+
+class BrowserPool:
+    def __init__(self,
+                 driver_factory: Callable[[], Any],
+                 size: int = DEFAULT_POOL_SIZE,
+                 max_uses: int = DEFAULT_MAX_USES,
+                 checkout_timeout: Optional[float] = 120.0):
+        """
+        Keep up to `size` warm browsers and lend them out one search at a time.
+
+        Browsers are started lazily on first demand and reused afterwards,
+        so only the first searches pay Chrome's start-up cost. A browser is
+        replaced after max_uses checkouts, or as soon as a WebDriverException
+        escapes a checkout (crashed tab, dead session). A WebDriver session
+        has a single focused window, so each checkout gets a whole browser
+        rather than a tab.
+
+        Args:
+            driver_factory: Zero-argument function that starts a new browser
+            size: Maximum number of browsers alive at once
+            max_uses: Checkouts after which a browser is recycled
+            checkout_timeout: Seconds to wait for a free browser (None waits forever)
+        """
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: Queue = Queue()
+        self._lock = Lock()
+        self._alive = 0
+        self._closed = False
+        self._meta: Dict[int, Dict[str, Any]] = {}
+        self._stats = {'created': 0, 'checkouts': 0, 'recycled': 0, 'crashed': 0}
+
+    def _create(self):
+        driver = self.driver_factory()
+        with self._lock:
+            self._meta[id(driver)] = {'uses': 0, 'warmed': set()}
+            self._stats['created'] += 1
+        logger.info(f"Started pooled browser ({self._alive}/{self.size})")
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._meta.pop(id(driver), None)
+            self._alive -= 1
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting browser: {str(e)}")
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            can_start = self._alive < self.size
+            if can_start:
+                self._alive += 1
+        if can_start:
+            try:
+                return self._create()
+            except Exception:
+                with self._lock:
+                    self._alive -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except Empty:
+            raise TimeoutError(f"No browser became free within {self.checkout_timeout}s")
+
+    def _release(self, driver, healthy: bool):
+        with self._lock:
+            meta = self._meta.get(id(driver))
+            meta['uses'] += 1
+            worn_out = meta['uses'] >= self.max_uses
+            if not healthy:
+                self._stats['crashed'] += 1
+            elif worn_out or self._closed:
+                self._stats['recycled'] += 1
+        if not healthy or worn_out or self._closed:
+            self._discard(driver)
+            return
+        try:
+            driver.get('about:blank')
+        except WebDriverException:
+            with self._lock:
+                self._stats['crashed'] += 1
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a browser for the duration of a with-block."""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        driver = self._acquire()
+        with self._lock:
+            self._stats['checkouts'] += 1
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self._release(driver, healthy)
+
+    def is_warmed(self, driver, key: str) -> bool:
+        """Whether `key` (e.g. a store's homepage visit) was already done in this browser."""
+        with self._lock:
+            meta = self._meta.get(id(driver))
+            return bool(meta) and key in meta['warmed']
+
+    def mark_warmed(self, driver, key: str):
+        with self._lock:
+            meta = self._meta.get(id(driver))
+            if meta is not None:
+                meta['warmed'].add(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['alive'] = self._alive
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+    def close(self):
+        """Quit every idle browser; busy ones are quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                return
+            self._discard(driver)
+
+
+_pools: Dict[Tuple[bool, Optional[str]], BrowserPool] = {}
+_pools_lock = Lock()
+
+
+def get_browser_pool(headless: bool = True,
+                     user_agent: Optional[str] = None,
+                     size: int = DEFAULT_POOL_SIZE,
+                     max_uses: int = DEFAULT_MAX_USES) -> BrowserPool:
+    """Return the shared pool for a browser profile (headless flag + user agent)."""
+    key = (headless, user_agent)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = BrowserPool(chrome_factory(headless, user_agent), size=size, max_uses=max_uses)
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def close_browser_pools():
+    """Quit all pooled browsers."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
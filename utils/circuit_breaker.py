@@ -0,0 +1,231 @@
+import time
+import logging
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Circuit states
+STATE_CLOSED = 'closed'  # Healthy: searches go through
+STATE_OPEN = 'open'  # Unhealthy: searches are skipped until the cool-down has passed
+STATE_HALF_OPEN = 'half_open'  # Cool-down passed: one trial search decides whether to close again
+
+DEFAULT_FAILURE_THRESHOLD = 3  # Consecutive failed searches that open the circuit
+DEFAULT_RESET_TIMEOUT = 60.0  # Seconds the circuit stays open the first time
+DEFAULT_MAX_RESET_TIMEOUT = 15 * 60.0  # The cool-down doubles each time a trial fails, up to this
+
+# Responses that count as a failed search: blocked, rate limited or the store is down
+FAILURE_STATUSES = {401, 403, 429, 500, 502, 503, 504}
+
+
+def is_failure_status(status_code: int) -> bool:
+    return status_code in FAILURE_STATUSES
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of searching a store whose circuit is open."""
+
+    def __init__(self, store: str, retry_in: float):
+        super().__init__(f"{store} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.store = store
+        self.retry_in = retry_in
+
+
+class StoreHealth:
+    """Circuit state and counters of one store."""
+
+    def __init__(self, reset_timeout: float):
+        self.state = STATE_CLOSED
+        self.failures = 0  # Consecutive
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self.trial_started: Optional[float] = None  # Set while a half-open trial search is running
+        self.last_failure: Optional[str] = None
+        self.counts = {'successes': 0, 'failures': 0, 'skipped': 0, 'opened': 0}
+
+
+class CircuitBreaker:
+    def __init__(self,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 max_reset_timeout: float = DEFAULT_MAX_RESET_TIMEOUT):
+        """
+        Per-store circuit breakers shared by every scraper in the process.
+
+        A store whose searches fail failure_threshold times in a row (anti-bot
+        pages, 403/5xx responses, connection errors or timeouts) is opened:
+        its searches are skipped without a request for reset_timeout seconds.
+        The first search after that is a single trial (half-open, sent without
+        retries); if it succeeds the circuit closes, if it fails the circuit
+        opens again for twice as long, up to max_reset_timeout. A search that
+        fetched a real page counts as a success even if nothing matched.
+
+        Args:
+            failure_threshold: Consecutive failures that open a store's circuit
+            reset_timeout: Seconds a circuit first stays open
+            max_reset_timeout: Longest cool-down after repeated failed trials
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._stores: Dict[str, StoreHealth] = {}
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._lock = Lock()
+
+    def _health(self, store: str) -> StoreHealth:
+        health = self._stores.get(store)
+        if health is None:
+            health = self._stores[store] = StoreHealth(self.reset_timeout)
+        return health
+
+    @staticmethod
+    def _set_state(health: StoreHealth, state: str) -> Optional[str]:
+        if health.state == state:
+            return None
+        health.state = state
+        return state
+
+    def _notify(self, store: str, state: Optional[str]):
+        if state is None:
+            return
+        logger.info(f"Circuit for {store} is now {state}")
+        for listener in list(self._listeners):
+            try:
+                listener(store, state)
+            except Exception as e:
+                logger.error(f"Circuit listener failed: {str(e)}")
+
+    def allow(self, store: str) -> bool:
+        """
+        Whether a search of the store may go ahead.
+
+        Once an open circuit's cool-down has passed this admits exactly one
+        caller as the half-open trial; everyone else is refused until the
+        trial has reported its outcome (or, if it never does, until another
+        cool-down has passed).
+        """
+        with self._lock:
+            health = self._health(store)
+            changed = None
+            if health.state == STATE_OPEN and time.monotonic() - health.opened_at >= health.reset_timeout:
+                changed = self._set_state(health, STATE_HALF_OPEN)
+            if health.state == STATE_CLOSED:
+                allowed = True
+            elif health.state == STATE_HALF_OPEN and (
+                health.trial_started is None or time.monotonic() - health.trial_started >= health.reset_timeout
+            ):
+                health.trial_started = time.monotonic()
+                allowed = True
+            else:
+                health.counts['skipped'] += 1
+                allowed = False
+        self._notify(store, changed)
+        return allowed
+
+    def check(self, store: str):
+        """Like allow(), but raise CircuitOpenError when the store must be skipped."""
+        if not self.allow(store):
+            raise CircuitOpenError(store, self.retry_in(store))
+
+    def is_trial(self, store: str) -> bool:
+        """Whether the store's next request is a half-open trial (which should not be retried)."""
+        with self._lock:
+            return self._health(store).state == STATE_HALF_OPEN
+
+    def record_success(self, store: str):
+        with self._lock:
+            health = self._health(store)
+            health.counts['successes'] += 1
+            health.failures = 0
+            health.trial_started = None
+            health.reset_timeout = self.reset_timeout
+            changed = self._set_state(health, STATE_CLOSED)
+        self._notify(store, changed)
+
+    def record_failure(self, store: str, reason: str = ''):
+        with self._lock:
+            health = self._health(store)
+            health.counts['failures'] += 1
+            health.failures += 1
+            health.last_failure = reason or None
+            changed = None
+            if health.state == STATE_HALF_OPEN:
+                # The trial failed: stay away twice as long
+                health.reset_timeout = min(self.max_reset_timeout, health.reset_timeout * 2)
+                changed = STATE_OPEN
+            elif health.state == STATE_CLOSED and health.failures >= self.failure_threshold:
+                changed = STATE_OPEN
+            if changed:
+                health.trial_started = None
+                health.opened_at = time.monotonic()
+                health.counts['opened'] += 1
+                self._set_state(health, STATE_OPEN)
+        if changed:
+            logger.warning(f"Opening circuit for {store} for {health.reset_timeout:.0f}s after: {reason or 'failure'}")
+        self._notify(store, changed)
+
+    def state(self, store: str) -> str:
+        """Current state; an open circuit whose cool-down has passed reports half-open."""
+        with self._lock:
+            health = self._stores.get(store)
+            if health is None:
+                return STATE_CLOSED
+            if health.state == STATE_OPEN and time.monotonic() - health.opened_at >= health.reset_timeout:
+                return STATE_HALF_OPEN
+            return health.state
+
+    def retry_in(self, store: str) -> float:
+        """Seconds until an open circuit admits a trial search (0 when it is not open)."""
+        with self._lock:
+            health = self._stores.get(store)
+            if health is None or health.state != STATE_OPEN:
+                return 0.0
+            return max(0.0, health.opened_at + health.reset_timeout - time.monotonic())
+
+    def subscribe(self, listener: Callable[[str, str], None]):
+        """Call listener(store, new_state) on every state change, from the thread that caused it."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, str], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def reset(self, store: Optional[str] = None):
+        """Close one store's circuit (or all of them) and forget its failures."""
+        with self._lock:
+            stores = [store] if store is not None else list(self._stores)
+            for name in stores:
+                self._stores.pop(name, None)
+        for name in stores:
+            self._notify(name, STATE_CLOSED)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per store: state, consecutive failures, last failure reason, seconds until a retry and counters."""
+        with self._lock:
+            stores = list(self._stores)
+        result = {}
+        for store in stores:
+            with self._lock:
+                health = self._stores.get(store)
+                if health is None:
+                    continue
+                row = dict(health.counts, consecutive_failures=health.failures, last_failure=health.last_failure)
+            row['state'] = self.state(store)
+            row['retry_in'] = self.retry_in(store)
+            result[store] = row
+        return result
+
+
+_shared_breaker: Optional[CircuitBreaker] = None
+_shared_lock = Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the process-wide circuit breaker."""
+    global _shared_breaker
+    with _shared_lock:
+        if _shared_breaker is None:
+            _shared_breaker = CircuitBreaker()
+        return _shared_breaker
@@ -0,0 +1,259 @@
+import os
+import re
+import gzip
+import time
+import random
+import logging
+from queue import Queue, Full
+from threading import Lock, Thread
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Which fetched pages are kept for debugging
+MODE_OFF = 'off'
+MODE_SAMPLE = 'sample'  # A random sample_rate fraction of pages, plus every failed one
+MODE_ON_FAILURE = 'on_failure'  # Only pages that yielded no products or an anti-bot page
+MODE_ON = 'on'  # Every page
+MODES = (MODE_OFF, MODE_SAMPLE, MODE_ON_FAILURE, MODE_ON)
+
+DEFAULT_MODE = MODE_ON_FAILURE
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_CAPTURE_DIR = 'debug'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # Compressed bytes kept on disk
+DEFAULT_MAX_FILES = 500
+DEFAULT_MAX_AGE = 7 * 86400.0
+DEFAULT_MAX_PAGE_BYTES = 4 * 1024 * 1024  # Larger streamed pages are not buffered for capture
+DEFAULT_QUEUE_SIZE = 32  # Captures waiting for the writer; more are dropped rather than blocking a search
+
+# Environment variables read by get_debug_capture()
+ENV_MODE = 'PRICE_COMPARISON_CAPTURE'
+ENV_SAMPLE_RATE = 'PRICE_COMPARISON_CAPTURE_SAMPLE_RATE'
+ENV_DIR = 'PRICE_COMPARISON_CAPTURE_DIR'
+
+CAPTURE_SUFFIX = '.html.gz'
+_UNSAFE = re.compile(r'[^a-z0-9]+')
+
+
+class CaptureRecorder:
+    """
+    Keeps the chunks of one streamed page until it is known whether the page should be captured.
+
+    Only pages that can still be kept are buffered: once a scraper reports
+    products (succeeded()), an unsampled page is let go, and a page larger
+    than the capture's max_page_bytes is never kept.
+    """
+
+    def __init__(self, capture: 'DebugCapture', store: str, url: str, sampled: bool):
+        self.capture = capture
+        self.store = store
+        self.url = url
+        self.sampled = sampled
+        self._chunks: Optional[List[bytes]] = [] if capture.mode != MODE_OFF else None
+        self._size = 0
+
+    def tee(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass chunks through, keeping a reference to each (no copy) while the page may be captured."""
+        for chunk in chunks:
+            if self._chunks is not None:
+                self._size += len(chunk)
+                if self._size > self.capture.max_page_bytes:
+                    self._chunks = None
+                    self.capture._count('too_large')
+                else:
+                    self._chunks.append(chunk)
+            yield chunk
+
+    def succeeded(self):
+        """The page has products, so it is no longer kept as a failure; stop buffering it unless it was sampled."""
+        if not self.sampled:
+            self._chunks = None
+
+    def finish(self, failed: bool = False, reason: str = '') -> bool:
+        """Hand the page to the capture if it should be kept; returns whether it was."""
+        chunks, self._chunks = self._chunks, None
+        if not chunks or not (failed or self.sampled):
+            return False
+        return self.capture._enqueue(self.store, self.url, b''.join(chunks), reason)
+
+
+class DebugCapture:
+    def __init__(self,
+                 mode: str = DEFAULT_MODE,
+                 sample_rate: float = DEFAULT_SAMPLE_RATE,
+                 directory: str = DEFAULT_CAPTURE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_files: int = DEFAULT_MAX_FILES,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES):
+        """
+        Saves fetched pages for debugging without blocking the searches.
+
+        Which pages are kept depends on the mode: none, a random sample
+        (plus failures), only failures, or all. Kept pages are handed to a
+        background thread that gzips them into `directory` as
+        <store>_<timestamp>_<n>.html.gz. The directory is a ring buffer: after
+        each write the oldest captures are deleted until it is within
+        max_bytes, max_files and max_age. When the writer falls behind by
+        queue_size pages, further captures are dropped (and counted).
+
+        Args:
+            mode: One of MODES
+            sample_rate: Fraction of pages kept in 'sample' mode
+            directory: Where captures are written
+            max_bytes: Compressed bytes kept in the directory
+            max_files: Captures kept in the directory
+            max_age: Seconds a capture is kept
+            queue_size: Captures waiting to be written before new ones are dropped
+            max_page_bytes: Streamed pages larger than this are not buffered (or captured)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown capture mode: {mode} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_age = max_age
+        self.max_page_bytes = max_page_bytes
+
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._lock = Lock()
+        self._writer: Optional[Thread] = None
+        self._files: Optional[List[Tuple[float, int, str]]] = None  # (mtime, size, path), oldest first
+        self._sequence = 0
+        self._stats = {'captured': 0, 'dropped': 0, 'evicted': 0, 'bytes_written': 0, 'errors': 0, 'too_large': 0}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _sampled(self) -> bool:
+        if self.mode == MODE_ON:
+            return True
+        return self.mode == MODE_SAMPLE and random.random() < self.sample_rate
+
+    def recorder(self, store: str, url: str) -> CaptureRecorder:
+        """Recorder for a page that is streamed; call finish() once it is known whether the page failed."""
+        return CaptureRecorder(self, store, url, self._sampled())
+
+    def capture(self, store: str, url: str, body: Union[str, bytes], failed: bool = False, reason: str = '') -> bool:
+        """
+        Keep a fetched page if the mode asks for it; never blocks on disk I/O.
+
+        Returns:
+            Whether the page was queued for writing
+        """
+        if self.mode == MODE_OFF or not body or not (failed or self._sampled()):
+            return False
+        return self._enqueue(store, url, body, reason)
+
+    def _enqueue(self, store: str, url: str, body: Union[str, bytes], reason: str) -> bool:
+        with self._lock:
+            if self._writer is None:
+                self._writer = Thread(target=self._write_loop, name='debug-capture', daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((store, url, body, reason, time.time()))
+        except Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            return False
+        return True
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Could not write debug capture: {str(e)}")
+                with self._lock:
+                    self._stats['errors'] += 1
+            finally:
+                self._queue.task_done()
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """Captures already on disk, oldest first."""
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(CAPTURE_SUFFIX):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        return files
+
+    def _write(self, store: str, url: str, body: Union[str, bytes], reason: str, captured_at: float):
+        if self._files is None:
+            self._files = self._scan()
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        header = f"<!-- {url} captured {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(captured_at))}"
+        header += f" ({reason}) -->\n" if reason else " -->\n"
+        data = gzip.compress(header.encode('utf-8') + body, compresslevel=6)
+
+        self._sequence += 1
+        timestamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(captured_at))
+        name = f"{_UNSAFE.sub('_', store.lower()).strip('_') or 'page'}_{timestamp}_{self._sequence}{CAPTURE_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+        self._files.append((time.time(), len(data), path))
+        evicted = self._evict()
+        logger.debug(f"Captured {url} to {path} ({len(body)} -> {len(data)} bytes)")
+        with self._lock:
+            self._stats['captured'] += 1
+            self._stats['bytes_written'] += len(data)
+            self._stats['evicted'] += evicted
+
+    def _evict(self) -> int:
+        """Delete the oldest captures until the directory is within its bounds."""
+        files = self._files
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - self.max_age
+        evicted = 0
+        while files and (total > self.max_bytes or len(files) > self.max_files or files[0][0] < cutoff):
+            _, size, path = files.pop(0)
+            total -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            evicted += 1
+        return evicted
+
+    def flush(self):
+        """Wait until every queued capture has been written."""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, mode=self.mode, queued=self._queue.qsize())
+
+
+def capture_from_env() -> DebugCapture:
+    """DebugCapture configured by the PRICE_COMPARISON_CAPTURE* environment variables."""
+    return DebugCapture(
+        mode=os.getenv(ENV_MODE, DEFAULT_MODE),
+        sample_rate=float(os.getenv(ENV_SAMPLE_RATE, DEFAULT_SAMPLE_RATE)),
+        directory=os.getenv(ENV_DIR, DEFAULT_CAPTURE_DIR)
+    )
+
+
+_shared_capture: Optional[DebugCapture] = None
+_shared_lock = Lock()
+
+
+def get_debug_capture() -> DebugCapture:
+    """Return the process-wide debug capture, configured from the environment."""
+    global _shared_capture
+    with _shared_lock:
+        if _shared_capture is None:
+            _shared_capture = capture_from_env()
+        return _shared_capture
@@ -0,0 +1,409 @@
+import logging
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Union, Sequence
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator, parse as parse_css
+    from cssselect.parser import CombinedSelector
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'lxml' if LXML_AVAILABLE else 'soup'
+DEFAULT_ENCODING = 'utf-8'
+
+# Store selector keys that read an attribute of the matched element instead of its text
+SELECTOR_ATTRS = {'link': 'href', 'image': 'src'}
+
+
+class LxmlBackend:
+    """Runs selectors as precompiled XPath expressions on an lxml.html tree."""
+    name = 'lxml'
+
+    def __init__(self):
+        self._translator = HTMLTranslator()
+
+    def parse(self, html: Union[str, bytes]):
+        if not html:
+            return None
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            if isinstance(html, str):
+                return lxml.html.document_fromstring(html.encode('utf-8'))
+            raise
+        except etree.ParserError as e:
+            logger.warning(f"Could not parse HTML: {str(e)}")
+            return None
+
+    def compile(self, css: str, first: bool = False):
+        xpath = self._translator.css_to_xpath(css, prefix='descendant::')
+        if first:
+            xpath = f"({xpath})[1]"
+        return etree.XPath(xpath)
+
+    def compile_matcher(self, css: str):
+        """
+        Compile a selector that tests an element itself, for streaming.
+
+        Only compound selectors (and groups of them) can be tested before
+        the rest of the document is known; returns None for selectors with
+        combinators.
+
+        Returns:
+            (tag names or None for any tag, compiled self:: XPath) or None
+        """
+        tags = set()
+        for selector in parse_css(css):
+            if isinstance(selector.parsed_tree, CombinedSelector):
+                return None
+            element = self._element_name(selector.parsed_tree)
+            if element is None:
+                tags = None
+            elif tags is not None:
+                tags.add(element)
+        return tags, etree.XPath(self._translator.css_to_xpath(css, prefix='self::'))
+
+    @staticmethod
+    def _element_name(tree) -> Optional[str]:
+        # Walk down Class/Attrib/Hash/Pseudo wrappers to the Element selector
+        while not hasattr(tree, 'element'):
+            tree = tree.selector
+        return tree.element.lower() if tree.element else None
+
+    def select(self, node, compiled) -> List[Any]:
+        return compiled(node)
+
+    def select_one(self, node, compiled):
+        matches = compiled(node)
+        return matches[0] if matches else None
+
+    def text(self, node) -> str:
+        return ''.join(node.itertext())
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def next_text(self, node) -> Optional[str]:
+        # Text between siblings is stored as the preceding element's tail
+        if node.tail:
+            return node.tail
+        for sibling in node.itersiblings():
+            if sibling.tail:
+                return sibling.tail
+        return None
+
+    def page_title(self, root) -> Optional[str]:
+        titles = root.xpath('//title')
+        return titles[0].text if titles else None
+
+
+class SoupBackend:
+    """BeautifulSoup fallback; selectors are precompiled with soupsieve."""
+    name = 'soup'
+
+    def __init__(self, parser: Optional[str] = None):
+        self.parser = parser or ('lxml' if LXML_AVAILABLE else 'html.parser')
+
+    def parse(self, html: Union[str, bytes]):
+        if not html:
+            return None
+        return BeautifulSoup(html, self.parser)
+
+    def compile(self, css: str, first: bool = False):
+        return soupsieve.compile(css)
+
+    def select(self, node, compiled) -> List[Any]:
+        return compiled.select(node)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def text(self, node) -> str:
+        return node.text
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def next_text(self, node) -> Optional[str]:
+        return node.find_next_sibling(string=True)
+
+    def page_title(self, root) -> Optional[str]:
+        return root.title.string if root.title else None
+
+
+_BACKENDS = {'lxml': LxmlBackend, 'soup': SoupBackend}
+
+
+def get_backend(name: Optional[str] = None):
+    """Instantiate an extraction backend by name ('lxml' or 'soup')."""
+    name = name or DEFAULT_BACKEND
+    if name == 'lxml' and not LXML_AVAILABLE:
+        logger.warning("lxml/cssselect not installed, falling back to BeautifulSoup")
+        name = 'soup'
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown extraction backend: {name}")
+    return _BACKENDS[name]()
+
+
+class Field:
+    def __init__(self, *selectors: str, attr: Optional[str] = None, raw: bool = False, many: bool = False):
+        """
+        One value to extract from a product container.
+
+        Selectors are fallbacks tried in order, like `select_one(a) or
+        select_one(b)`: the first selector that matches an element wins.
+
+        Args:
+            *selectors: CSS selectors relative to the container
+            attr: Return this attribute instead of the element's text
+            raw: Return the matched element itself
+            many: Return a list with the value of every match of the first matching selector
+        """
+        if not selectors:
+            raise ValueError("Field needs at least one selector")
+        self.selectors = selectors
+        self.attr = attr
+        self.raw = raw
+        self.many = many
+
+
+FieldSpec = Union[str, Sequence[str], Field]
+
+
+def _as_field(spec: FieldSpec) -> Field:
+    if isinstance(spec, Field):
+        return spec
+    if isinstance(spec, str):
+        return Field(spec)
+    return Field(*spec)
+
+
+class Extractor:
+    def __init__(self,
+                 containers: Union[str, Sequence[str]],
+                 fields: Dict[str, FieldSpec],
+                 backend: Optional[str] = None):
+        """
+        A store's product selectors, compiled once and reused for every page.
+
+        With the lxml backend the CSS selectors are translated to XPath and
+        compiled up front, so extraction runs directly on the lxml tree
+        without building a soup. The soup backend keeps BeautifulSoup
+        available for markup lxml cannot cope with.
+
+        Args:
+            containers: Product container selector(s); the first one with matches is used
+            fields: Field name -> selector, list of fallback selectors or Field
+            backend: 'lxml' or 'soup' (default: lxml when installed)
+        """
+        self.backend = get_backend(backend)
+        if isinstance(containers, str):
+            containers = [containers]
+        self._containers = [self.backend.compile(css) for css in containers]
+        self._matcher = None
+        if self.backend.name == 'lxml':
+            self._matcher = self.backend.compile_matcher(containers[0])
+        self.fields = {name: _as_field(spec) for name, spec in fields.items()}
+        self._compiled = {
+            name: [self.backend.compile(css, first=not field.many) for css in field.selectors]
+            for name, field in self.fields.items()
+        }
+
+    def parse(self, html: Union[str, bytes]):
+        """Parse a page into the backend's document tree (None when empty)."""
+        return self.backend.parse(html)
+
+    def containers(self, root) -> List[Any]:
+        """Return the product containers on a parsed page."""
+        if root is None:
+            return []
+        for compiled in self._containers:
+            matches = self.backend.select(root, compiled)
+            if matches:
+                return matches
+        return []
+
+    def _value(self, field: Field, node):
+        if field.raw:
+            return node
+        if field.attr:
+            return self.backend.attr(node, field.attr)
+        return self.backend.text(node)
+
+    def extract(self, container) -> Dict[str, Any]:
+        """
+        Extract every field from one container.
+
+        Returns:
+            Field name -> text, attribute value or element; None when no selector matched
+            (an empty list for `many` fields)
+        """
+        backend = self.backend
+        values = {}
+        for name, field in self.fields.items():
+            value = [] if field.many else None
+            for compiled in self._compiled[name]:
+                if field.many:
+                    matches = backend.select(container, compiled)
+                    if matches:
+                        value = [self._value(field, node) for node in matches]
+                        break
+                else:
+                    node = backend.select_one(container, compiled)
+                    if node is not None:
+                        value = self._value(field, node)
+                        break
+            values[name] = value
+        return values
+
+    def products(self, html: Union[str, bytes]) -> List[Dict[str, Any]]:
+        """Parse a page and extract the fields of every product container."""
+        return [self.extract(container) for container in self.containers(self.parse(html))]
+
+    def iter_containers(self, chunks: Iterable[Union[str, bytes]], encoding: Optional[str] = None) -> Iterator[Any]:
+        """
+        Yield product containers while the page is still being fed in.
+
+        Chunks go through an incremental lxml parser and each container is
+        yielded, in document order, as soon as its end tag has been seen. A
+        caller that stops iterating stops the parse, and closing the
+        generator also closes `chunks` when it supports close(), so nothing
+        more is read from the network. A yielded container is only valid
+        until the next one is requested; it is cleared afterwards to keep
+        memory flat.
+
+        Only the first container selector is matched while streaming. If it
+        never matches, the fallback selectors run on the complete document,
+        exactly as containers() does. The soup backend, and container
+        selectors with combinators, read the whole input and parse it in one go.
+
+        Args:
+            chunks: Iterable of HTML chunks (bytes from the socket, or str)
+            encoding: Charset for byte chunks (default utf-8)
+        """
+        try:
+            if self._matcher is None:
+                data = [chunk for chunk in chunks]
+                html = b''.join(data) if data and isinstance(data[0], bytes) else ''.join(data)
+                yield from self.containers(self.parse(html))
+                return
+            yield from self._stream_containers(chunks, encoding)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def _closed(element) -> bool:
+        # Once the parser has started a following sibling of the element or of
+        # one of its ancestors, the element's end tag has been seen
+        while element is not None:
+            if element.getnext() is not None:
+                return True
+            element = element.getparent()
+        return False
+
+    def _stream_containers(self, chunks, encoding) -> Iterator[Any]:
+        tags, matches = self._matcher
+        # Start events carry the attributes needed for matching; end events would double the callbacks
+        parser = etree.HTMLPullParser(
+            events=('start',),
+            tag=sorted(tags) if tags else None,
+            encoding=encoding or DEFAULT_ENCODING
+        )
+        pending = deque()  # Matched containers in document order
+        found = 0
+
+        def ready(at_end: bool = False):
+            # Hand out complete containers without overtaking earlier ones
+            while pending and (at_end or self._closed(pending[0])):
+                container = pending.popleft()
+                yield container
+                if not any(container in other.iterancestors() for other in pending):
+                    container.clear(keep_tail=True)
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if matches(element):
+                    pending.append(element)
+            for container in ready():
+                found += 1
+                yield container
+
+        try:
+            root = parser.close()
+        except etree.LxmlError as e:
+            # Raised for an empty or unparseable body
+            logger.warning(f"Could not parse HTML: {str(e)}")
+            root = None
+        for _, element in parser.read_events():
+            if matches(element):
+                pending.append(element)
+        for container in ready(at_end=True):
+            found += 1
+            yield container
+
+        if not found and len(self._containers) > 1 and root is not None:
+            for compiled in self._containers[1:]:
+                fallback = self.backend.select(root, compiled)
+                if fallback:
+                    yield from fallback
+                    return
+
+    def stream(self, chunks: Iterable[Union[str, bytes]], encoding: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Like products(), but extracts each container as soon as it has been parsed."""
+        for container in self.iter_containers(chunks, encoding):
+            yield self.extract(container)
+
+    def text(self, node) -> str:
+        return self.backend.text(node)
+
+    def next_text(self, node) -> Optional[str]:
+        """First text following an element among its siblings."""
+        return self.backend.next_text(node)
+
+    def page_title(self, root) -> Optional[str]:
+        return self.backend.page_title(root) if root is not None else None
+
+
+def build_extractor(selectors: Dict[str, Union[str, Sequence[str]]],
+                    many: Sequence[str] = ('skip',),
+                    backend: Optional[str] = None) -> Optional[Extractor]:
+    """
+    Compile a store's declarative selectors (StoreConfig.selectors).
+
+    'container' selects the product containers and every other key becomes
+    a field of the same name. A value is one selector or a list of
+    fallbacks; 'link' and 'image' return the href/src attribute.
+
+    Args:
+        selectors: Selector mapping from the store's config
+        many: Keys whose field returns every match (by default 'skip')
+        backend: 'lxml' or 'soup' (default: lxml when installed)
+
+    Returns:
+        The compiled Extractor, or None when there is no container selector
+    """
+    if not selectors or 'container' not in selectors:
+        return None
+    fields = {}
+    for name, spec in selectors.items():
+        if name == 'container':
+            continue
+        fallbacks = [spec] if isinstance(spec, str) else list(spec)
+        fields[name] = Field(*fallbacks, attr=SELECTOR_ATTRS.get(name), many=name in many)
+    return Extractor(containers=selectors['container'], fields=fields, backend=backend)
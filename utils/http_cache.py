@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Any
+
+import httpx
+
+from utils.session_warmer import BLOCKED_BODY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'http_cache.sqlite3')
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_AGE = 24 * 3600.0  # Entries unused for this long are pruned
+
+# Bodies are stored decoded, so transfer framing headers no longer apply
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    store TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class CachedResponse:
+    store: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self, method: str = 'GET') -> httpx.Response:
+        """Rebuild an httpx.Response; extensions['from_cache'] marks it as cached."""
+        return httpx.Response(
+            self.status,
+            headers=self.headers,
+            content=self.body,
+            request=httpx.Request(method, self.url),
+            extensions={'from_cache': True}
+        )
+
+
+class HttpCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_age: float = DEFAULT_MAX_AGE):
+        """
+        On-disk response cache keyed on store + URL, backed by SQLite.
+
+        Freshness is decided by the store's TTL (StoreConfig.cache_ttl), not
+        by the store's Cache-Control headers, which forbid caching almost
+        every search page. Expired entries are kept so they can be
+        revalidated with If-None-Match / If-Modified-Since.
+
+        Args:
+            path: SQLite database file (':memory:' for a throwaway cache)
+            max_age: Seconds after which an entry that was never refreshed is pruned
+        """
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.prune()
+
+    @staticmethod
+    def _key(store: str, url: str) -> str:
+        return hashlib.sha256(f"{store}\n{url}".encode('utf-8')).hexdigest()
+
+    def _count(self, store: str, counter: str):
+        counters = self._stats.setdefault(store, {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'blocked': 0})
+        counters[counter] += 1
+
+    def get(self, store: str, url: str) -> Optional[CachedResponse]:
+        """Look up an entry, fresh or not."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, headers, body, etag, last_modified, fetched_at, expires_at '
+                'FROM responses WHERE key = ?',
+                (self._key(store, url),)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, last_modified, fetched_at, expires_at = row
+        return CachedResponse(store, url, status, json.loads(headers), body,
+                              etag, last_modified, fetched_at, expires_at)
+
+    def put(self, store: str, url: str, response: httpx.Response, ttl: float):
+        """
+        Store a successful response for `ttl` seconds.
+
+        Anti-bot pages also come back as 200; they are never stored, and
+        evict the URL's entry, so the next search asks the store again.
+        """
+        if BLOCKED_BODY.search(response.content):
+            logger.debug(f"Not caching anti-bot page from {store}: {url}")
+            with self._lock:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (self._key(store, url),))
+                self._conn.commit()
+                self._count(store, 'blocked')
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self._key(store, url), store, url, response.status_code, json.dumps(headers),
+                 response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 now, now + ttl)
+            )
+            self._conn.commit()
+            self._count(store, 'stores')
+
+    def refresh(self, entry: CachedResponse, ttl: float, response: Optional[httpx.Response] = None):
+        """Extend an entry after the store answered 304 Not Modified."""
+        now = time.time()
+        etag = entry.etag
+        last_modified = entry.last_modified
+        if response is not None:
+            etag = response.headers.get('ETag', etag)
+            last_modified = response.headers.get('Last-Modified', last_modified)
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET fetched_at = ?, expires_at = ?, etag = ?, last_modified = ? WHERE key = ?',
+                (now, now + ttl, etag, last_modified, self._key(entry.store, entry.url))
+            )
+            self._conn.commit()
+        entry.fetched_at, entry.expires_at = now, now + ttl
+        entry.etag, entry.last_modified = etag, last_modified
+
+    def record_hit(self, store: str):
+        with self._lock:
+            self._count(store, 'hits')
+
+    def record_miss(self, store: str):
+        with self._lock:
+            self._count(store, 'misses')
+
+    def record_revalidated(self, store: str):
+        with self._lock:
+            self._count(store, 'revalidated')
+
+    def prune(self) -> int:
+        """Delete entries that have not been refreshed within max_age; returns how many."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM responses WHERE fetched_at < ?', (time.time() - self.max_age,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters overall and per store."""
+        with self._lock:
+            per_store = {store: dict(counters) for store, counters in self._stats.items()}
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        totals = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'blocked': 0}
+        for counters in per_store.values():
+            for name, value in counters.items():
+                totals[name] += value
+        lookups = totals['hits'] + totals['misses'] + totals['revalidated']
+        totals['hit_rate'] = (totals['hits'] + totals['revalidated']) / lookups if lookups else 0.0
+        totals['entries'] = entries
+        totals['per_store'] = per_store
+        return totals
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,657 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Any, Awaitable, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.rate_limiter import RateLimiter, get_rate_limiter, parse_retry_after
+from utils.http_cache import HttpCache, DEFAULT_TTL
+from utils.adaptive_timeout import AdaptiveTimeouts, DEFAULT_MAX_TIMEOUT
+from utils.metrics import Metrics, STAGE_CONNECT, STAGE_DOWNLOAD, STAGE_SLOT, STAGE_TTFB, get_metrics
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 10  # Per host
+DEFAULT_MAX_CONCURRENCY = 4  # In-flight requests per store
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Hop-by-hop headers are managed by the connection pool (and are illegal over HTTP/2)
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class AsyncStream:
+    def __init__(self, response: httpx.Response, on_close=None, on_complete=None):
+        """
+        A response whose body is read chunk by chunk.
+
+        Args:
+            response: Response opened with stream=True (or a cached, fully read one)
+            on_close: Called once when the stream is closed (releases the store's slot)
+            on_complete: Awaited with the whole body if it was read to the end
+        """
+        self.response = response
+        self._on_close = on_close
+        self._on_complete = on_complete
+        self._chunks = None
+        self._body = [] if on_complete is not None else None
+        self._closed = False
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.response.headers
+
+    @property
+    def encoding(self) -> str:
+        """Charset from Content-Type, utf-8 when the server does not say."""
+        return self.response.charset_encoding or 'utf-8'
+
+    def raise_for_status(self):
+        self.response.raise_for_status()
+
+    async def next_chunk(self) -> Optional[bytes]:
+        """Return the next decoded body chunk, or None at the end of the body."""
+        if self._chunks is None:
+            self._chunks = self.response.aiter_bytes()
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            if self._body is not None:
+                body, self._body = b''.join(self._body), None
+                await self._on_complete(body)
+            return None
+        if self._body is not None:
+            self._body.append(chunk)
+        return chunk
+
+    async def aclose(self):
+        """Stop reading; an unread remainder is discarded with the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self.response.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+
+
+class AsyncHttpClient:
+    def __init__(self,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+                 http2: bool = HTTP2_AVAILABLE,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[HttpCache] = None,
+                 cache_ttl: float = DEFAULT_TTL,
+                 metrics: Optional[Metrics] = None,
+                 timeouts: Optional[AdaptiveTimeouts] = None):
+        """
+        Shared asyncio HTTP client with one bounded keep-alive pool per host.
+
+        Per-host pool size and per-store concurrency come from the request's
+        StoreConfig (max_connections / max_concurrency) when one is given, and
+        from the defaults here otherwise. An instance must only be used from
+        a single event loop.
+
+        Requests without an explicit timeout get one adapted to the store's
+        observed latency, and GETs to stores with StoreConfig.hedge are sent
+        a second time once they are slower than the store's p95 (see
+        utils.adaptive_timeout); whichever copy answers first is used.
+
+        Args:
+            timeout: Request timeout in seconds until a store's latency is known
+            max_connections: Default connection pool size per host
+            max_concurrency: Default number of in-flight requests per store
+            keepalive_expiry: Seconds an idle pooled connection is kept open
+            http2: Negotiate HTTP/2 when the server supports it (needs h2)
+            rate_limiter: Limiter paused on 429 responses (default: the shared limiter)
+            cache: Response cache for GET requests (None disables caching)
+            cache_ttl: Default TTL for stores without StoreConfig.cache_ttl
+            metrics: Registry for slot, connect, TTFB and download times (default: the shared registry)
+            timeouts: Latency tracker for adaptive timeouts and hedging (default: one starting at `timeout`)
+        """
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.metrics = metrics or get_metrics()
+        self.timeouts = timeouts or AdaptiveTimeouts(
+            default_timeout=timeout, max_timeout=max(timeout, DEFAULT_MAX_TIMEOUT)
+        )
+
+        self._clients: Dict[Tuple[str, bool], httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._peak_in_flight: Dict[str, int] = {}
+        self._requests: Dict[str, int] = {}
+
+    def _store_key(self, url: str, store_config) -> str:
+        if store_config is not None:
+            return _host(store_config.base_url) or store_config.name
+        return _host(url)
+
+    def _client_for(self, url: str, store_config, verify: bool) -> httpx.AsyncClient:
+        key = (_host(url), verify)
+        client = self._clients.get(key)
+        if client is None:
+            max_connections = getattr(store_config, 'max_connections', self.max_connections)
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=self.keepalive_expiry
+            )
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                transport=httpx.AsyncHTTPTransport(
+                    http2=self.http2,
+                    verify=verify,
+                    limits=limits,
+                    retries=1  # Reconnect once if a pooled connection was dropped
+                )
+            )
+            self._clients[key] = client
+        return client
+
+    def _semaphore_for(self, store_key: str, store_config) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(store_key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(getattr(store_config, 'max_concurrency', self.max_concurrency))
+            self._semaphores[store_key] = semaphore
+        return semaphore
+
+    def _store_label(self, store_key: str, store_config) -> str:
+        return getattr(store_config, 'name', None) or store_key
+
+    async def _acquire_slot(self, semaphore: asyncio.Semaphore, store: str):
+        """Wait for one of the store's in-flight slots, timing the wait."""
+        start, started = time.time(), time.perf_counter()
+        await semaphore.acquire()
+        self.metrics.observe(STAGE_SLOT, store, time.perf_counter() - started, start)
+
+    def _timing_trace(self, store: str, body: bool):
+        """
+        httpcore trace hook recording connect, TTFB and (optionally) body download times.
+
+        TTFB is also what adaptive timeouts and hedge delays are derived from.
+
+        A new connection's DNS lookup, TCP connect and TLS handshake are
+        recorded together as one connect time, up to the first request sent
+        on it; reused connections record none. Streamed bodies are timed by
+        the caller instead (see metrics.ChunkTimer), since their reads
+        interleave with parsing.
+        """
+        metrics, timeouts = self.metrics, self.timeouts
+        marks: Dict[str, Tuple[float, float]] = {}
+
+        def mark(name: str):
+            marks[name] = (time.time(), time.perf_counter())
+
+        def observe(stage: str, name: str) -> Optional[float]:
+            if name not in marks:
+                return None
+            start, started = marks.pop(name)
+            seconds = time.perf_counter() - started
+            metrics.observe(stage, store, seconds, start)
+            return seconds
+
+        async def trace(event: str, info: Dict[str, Any]):
+            # Events are named <module>.<step>.<started|complete|failed>, e.g. http11.send_request_headers.started
+            step, _, phase = event.partition('.')[2].rpartition('.')
+            if step == 'connect_tcp' and phase == 'started':
+                mark('connect')
+            elif step == 'send_request_headers' and phase == 'started':
+                observe(STAGE_CONNECT, 'connect')
+                mark('ttfb')
+            elif step == 'receive_response_headers' and phase == 'complete':
+                seconds = observe(STAGE_TTFB, 'ttfb')
+                if seconds is not None:
+                    timeouts.record(store, seconds)
+            elif step == 'receive_response_body' and body:
+                if phase == 'started':
+                    mark('download')
+                elif phase == 'complete':
+                    observe(STAGE_DOWNLOAD, 'download')
+
+        return trace
+
+    async def request(self,
+                      method: str,
+                      url: str,
+                      store_config=None,
+                      headers: Optional[Dict[str, str]] = None,
+                      verify: Optional[bool] = None,
+                      timeout: Optional[float] = None,
+                      retries: int = 0,
+                      use_cache: bool = True,
+                      hedge: Optional[bool] = None,
+                      rate_limiter: Optional[RateLimiter] = None,
+                      **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared pool for the URL's host.
+
+        GET responses are served from the cache while fresh; stale entries
+        with an ETag or Last-Modified are revalidated with a conditional
+        request and reused on 304.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            store_config: StoreConfig the request belongs to, if any
+            headers: Request headers (hop-by-hop headers are dropped)
+            verify: Verify TLS certificates (default: StoreConfig.requires_ssl_verify or True)
+            timeout: Request timeout in seconds (default: adapted to the store's latency)
+            retries: Extra attempts on 5xx responses, with exponential backoff
+            use_cache: Set to False to bypass the response cache
+            hedge: Hedge a slow GET (default: StoreConfig.hedge, True without a config)
+            rate_limiter: Limiter paused on a 429 response (default: the client's)
+            **kwargs: Passed through to httpx
+
+        Returns:
+            The response; raise_for_status() is left to the caller
+        """
+        if verify is None:
+            verify = getattr(store_config, 'requires_ssl_verify', True)
+        headers = {
+            k: v for k, v in (headers or {}).items()
+            if v is not None and k.lower() not in HOP_BY_HOP_HEADERS
+        }
+        store_key = self._store_key(url, store_config)
+
+        ttl = getattr(store_config, 'cache_ttl', self.cache_ttl)
+        cacheable = self.cache is not None and use_cache and method.upper() == 'GET' and ttl > 0
+        entry = None
+        if cacheable:
+            entry = await asyncio.to_thread(self.cache.get, store_key, url)
+            if entry is not None and entry.is_fresh:
+                self.cache.record_hit(store_key)
+                return entry.to_response(method)
+            if entry is not None and entry.can_revalidate:
+                headers.update(entry.validators())
+
+        store = self._store_label(store_key, store_config)
+        send = lambda: self._send(method, url, store_config, store_key, headers, verify, timeout, retries,
+                                  rate_limiter or self.rate_limiter, **kwargs)
+        if self._hedged_for(method, store_config, hedge):
+            response = await self._hedge(store, send, lambda response: response.aclose())
+        else:
+            response = await send()
+
+        if cacheable:
+            if response.status_code == 304 and entry is not None:
+                self.cache.record_revalidated(store_key)
+                await asyncio.to_thread(self.cache.refresh, entry, ttl, response)
+                return entry.to_response(method)
+            self.cache.record_miss(store_key)
+            if response.status_code == 200:
+                await asyncio.to_thread(self.cache.put, store_key, url, response, ttl)
+        return response
+
+    async def open_stream(self,
+                          method: str,
+                          url: str,
+                          store_config=None,
+                          headers: Optional[Dict[str, str]] = None,
+                          verify: Optional[bool] = None,
+                          timeout: Optional[float] = None,
+                          retries: int = 0,
+                          use_cache: bool = True,
+                          hedge: Optional[bool] = None,
+                          rate_limiter: Optional[RateLimiter] = None,
+                          **kwargs) -> AsyncStream:
+        """
+        Like request(), but return as soon as the headers have arrived.
+
+        The body is then read with AsyncStream.next_chunk(), so a caller can
+        stop downloading once it has what it needs. The request keeps its
+        slot in the store's concurrency limit until the stream is closed.
+        Fresh cache entries are replayed as a stream. A body that is read to
+        the end is cached; a partially read one is not.
+
+        Returns:
+            An open AsyncStream; the caller must aclose() it
+        """
+        if verify is None:
+            verify = getattr(store_config, 'requires_ssl_verify', True)
+        headers = {
+            k: v for k, v in (headers or {}).items()
+            if v is not None and k.lower() not in HOP_BY_HOP_HEADERS
+        }
+        store_key = self._store_key(url, store_config)
+
+        ttl = getattr(store_config, 'cache_ttl', self.cache_ttl)
+        cacheable = self.cache is not None and use_cache and method.upper() == 'GET' and ttl > 0
+        entry = None
+        if cacheable:
+            entry = await asyncio.to_thread(self.cache.get, store_key, url)
+            if entry is not None and entry.is_fresh:
+                self.cache.record_hit(store_key)
+                return AsyncStream(entry.to_response(method))
+            if entry is not None and entry.can_revalidate:
+                headers.update(entry.validators())
+
+        store = self._store_label(store_key, store_config)
+        open_ = lambda: self._open(method, url, store_config, store_key, headers, verify, timeout, retries,
+                                   rate_limiter or self.rate_limiter, **kwargs)
+        if self._hedged_for(method, store_config, hedge):
+            response, release = await self._hedge(store, open_, self._discard_stream)
+        else:
+            response, release = await open_()
+
+        if cacheable:
+            if response.status_code == 304 and entry is not None:
+                await response.aclose()
+                release()
+                self.cache.record_revalidated(store_key)
+                await asyncio.to_thread(self.cache.refresh, entry, ttl, response)
+                return AsyncStream(entry.to_response(method))
+            self.cache.record_miss(store_key)
+            if response.status_code == 200:
+                async def cache_body(body: bytes):
+                    complete = httpx.Response(
+                        response.status_code, headers=response.headers, content=body, request=response.request
+                    )
+                    await asyncio.to_thread(self.cache.put, store_key, url, complete, ttl)
+                return AsyncStream(response, on_close=release, on_complete=cache_body)
+        return AsyncStream(response, on_close=release)
+
+    async def _open(self, method, url, store_config, store_key, headers, verify, timeout, retries, rate_limiter,
+                    **kwargs):
+        """Send a request and return (response with unread body, release of its concurrency slot)."""
+        client = self._client_for(url, store_config, verify)
+        semaphore = self._semaphore_for(store_key, store_config)
+        store = self._store_label(store_key, store_config)
+        extensions = dict(kwargs.pop('extensions', None) or {}, trace=self._timing_trace(store, body=False))
+
+        attempt = 0
+        while True:
+            await self._acquire_slot(semaphore, store)
+            self._enter(store_key)
+
+            def release():
+                self._in_flight[store_key] -= 1
+                semaphore.release()
+
+            seconds = self._timeout_for(store, timeout)
+            try:
+                request = client.build_request(
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=seconds,
+                    extensions=extensions,
+                    **kwargs
+                )
+                response = await client.send(request, stream=True)
+            except BaseException as e:
+                release()
+                if isinstance(e, httpx.TimeoutException):
+                    self.timeouts.record(store, seconds)
+                raise
+
+            if response.status_code == 429 and store_config is not None:
+                rate_limiter.defer(store_config, parse_retry_after(response.headers.get('Retry-After')))
+
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                await response.aclose()
+                release()
+                logger.warning(f"{url} returned {response.status_code}, retrying ({attempt + 1}/{retries})")
+                await asyncio.sleep(2 ** attempt)
+                attempt += 1
+                continue
+            return response, release
+
+    @staticmethod
+    async def _discard_stream(opened):
+        response, release = opened
+        try:
+            await response.aclose()
+        finally:
+            release()
+
+    def _timeout_for(self, store: str, timeout: Optional[float]) -> float:
+        return self.timeouts.timeout_for(store) if timeout is None else timeout
+
+    def _hedged_for(self, method: str, store_config, hedge: Optional[bool]) -> bool:
+        if method.upper() != 'GET':
+            return False
+        return getattr(store_config, 'hedge', True) if hedge is None else hedge
+
+    async def _hedge(self, store: str, send, discard):
+        """
+        Run send(); if it has not finished after the store's hedge delay, run it again and use whichever finishes first.
+
+        The slower copy is cancelled, or discarded when it finished too. A
+        copy that fails is ignored as long as the other one may still succeed.
+        """
+        delay = self.timeouts.hedge_delay(store)
+        first = asyncio.ensure_future(send())
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.timeouts.record_hedge(store)
+        logger.debug(f"Hedging request to {store} after {delay:.2f}s")
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and winner is None:
+                        winner = task
+                    elif task.exception() is None:
+                        await discard(task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+            for task in pending:
+                try:
+                    await discard(await task)
+                except BaseException:
+                    pass
+        if winner is None:
+            return first.result()  # Both failed: raise the original request's error
+        self.timeouts.record_hedge(store, won=winner is second)
+        return winner.result()
+
+    def _enter(self, store_key: str):
+        self._in_flight[store_key] = self._in_flight.get(store_key, 0) + 1
+        self._peak_in_flight[store_key] = max(self._peak_in_flight.get(store_key, 0), self._in_flight[store_key])
+        self._requests[store_key] = self._requests.get(store_key, 0) + 1
+
+    async def _send(self, method, url, store_config, store_key, headers, verify, timeout, retries, rate_limiter,
+                    **kwargs) -> httpx.Response:
+        client = self._client_for(url, store_config, verify)
+        semaphore = self._semaphore_for(store_key, store_config)
+        store = self._store_label(store_key, store_config)
+        extensions = dict(kwargs.pop('extensions', None) or {}, trace=self._timing_trace(store, body=True))
+
+        attempt = 0
+        while True:
+            await self._acquire_slot(semaphore, store)
+            self._enter(store_key)
+            seconds = self._timeout_for(store, timeout)
+            try:
+                response = await client.request(
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=seconds,
+                    extensions=extensions,
+                    **kwargs
+                )
+            except httpx.TimeoutException:
+                self.timeouts.record(store, seconds)
+                raise
+            finally:
+                self._in_flight[store_key] -= 1
+                semaphore.release()
+
+            if response.status_code == 429 and store_config is not None:
+                rate_limiter.defer(store_config, parse_retry_after(response.headers.get('Retry-After')))
+
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                logger.warning(f"{url} returned {response.status_code}, retrying ({attempt + 1}/{retries})")
+                await asyncio.sleep(2 ** attempt)
+                attempt += 1
+                continue
+            return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return request counters per store."""
+        return {
+            store_key: {
+                'requests': count,
+                'in_flight': self._in_flight.get(store_key, 0),
+                'peak_in_flight': self._peak_in_flight.get(store_key, 0)
+            }
+            for store_key, count in self._requests.items()
+        }
+
+    async def aclose(self):
+        """Close every pooled connection."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+class SyncHttpClient:
+    def __init__(self, async_client: Optional[AsyncHttpClient] = None):
+        """
+        Blocking adapter that runs an AsyncHttpClient on a background event loop.
+
+        Any number of threads can call it at once; their requests share the
+        async client's connection pools and per-store limits.
+        """
+        self.async_client = async_client or AsyncHttpClient()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='http-client', daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the client's event loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Blocking version of AsyncHttpClient.request."""
+        return self.submit(self.async_client.request(method, url, **kwargs)).result()
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('GET', url, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs) -> Iterator['SyncStream']:
+        """Blocking version of AsyncHttpClient.open_stream, closed when the with-block ends."""
+        stream = self.submit(self.async_client.open_stream(method, url, **kwargs)).result()
+        try:
+            yield SyncStream(self, stream)
+        finally:
+            self.submit(stream.aclose()).result()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.submit(self._stats()).result()
+
+    async def _stats(self):
+        return self.async_client.stats()
+
+    def timeout_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-store latency percentiles, current adaptive timeout and hedge counters."""
+        return self.async_client.timeouts.stats()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return response cache hit/miss counters (empty when caching is off)."""
+        cache = self.async_client.cache
+        return cache.stats() if cache is not None else {}
+
+    def close(self):
+        """Close pooled connections and stop the event loop."""
+        if not self.loop.is_running():
+            return
+        self.submit(self.async_client.aclose()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+class SyncStream:
+    """Blocking view of an AsyncStream; each chunk is fetched on the client's event loop."""
+
+    def __init__(self, client: SyncHttpClient, stream: AsyncStream):
+        self._client = client
+        self._stream = stream
+
+    @property
+    def status_code(self) -> int:
+        return self._stream.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self._stream.headers
+
+    @property
+    def encoding(self) -> str:
+        return self._stream.encoding
+
+    @property
+    def from_cache(self) -> bool:
+        return bool(self._stream.response.extensions.get('from_cache'))
+
+    def raise_for_status(self):
+        self._stream.raise_for_status()
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yield body chunks as they arrive."""
+        while True:
+            chunk = self._client.submit(self._stream.next_chunk()).result()
+            if chunk is None:
+                return
+            yield chunk
+
+
+_shared_client: Optional[SyncHttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> SyncHttpClient:
+    """Return the process-wide HTTP client shared by all scrapers."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = SyncHttpClient(AsyncHttpClient(cache=HttpCache()))
+        return _shared_client
@@ -0,0 +1,338 @@
+import os
+import time
+import bisect
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stages of a store search, in the order they happen
+STAGE_QUEUE = 'queue'  # Waiting for a worker thread
+STAGE_RATE_LIMIT = 'rate_limit'  # Waiting for the store's token bucket
+STAGE_SLOT = 'slot'  # Waiting for one of the store's in-flight request slots
+STAGE_CONNECT = 'connect'  # DNS, TCP and TLS of a new connection (httpcore reports them as one step)
+STAGE_TTFB = 'ttfb'  # Request sent until response headers received
+STAGE_DOWNLOAD = 'download'  # Reading the response body
+STAGE_PARSE = 'parse'  # HTML to product fields
+STAGE_MATCH = 'match'  # Scoring titles against the query
+STAGE_VALIDATE = 'validate'  # Price plausibility checks
+STAGE_TOTAL = 'total'  # Whole store search
+STAGES = (
+    STAGE_QUEUE, STAGE_RATE_LIMIT, STAGE_SLOT, STAGE_CONNECT, STAGE_TTFB, STAGE_DOWNLOAD,
+    STAGE_PARSE, STAGE_MATCH, STAGE_VALIDATE, STAGE_TOTAL
+)
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_MAX_TRACES = 1000
+METRIC_NAME = 'price_comparison_stage_seconds'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus model."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Trace:
+    """Spans of one store search for one query."""
+
+    def __init__(self, store: str, query: str):
+        self.trace_id = os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.store = store
+        self.query = query
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = 'ok'
+        self.spans: List[Tuple[str, float, float]] = []  # (stage, start, end) in epoch seconds
+        self._lock = Lock()
+
+    def add(self, stage: str, start: float, end: float):
+        with self._lock:
+            self.spans.append((stage, start, end))
+
+    def durations(self) -> Dict[str, float]:
+        """Seconds spent per stage."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for stage, start, end in self.spans:
+                totals[stage] = totals.get(stage, 0.0) + end - start
+        return totals
+
+    def to_spans(self) -> List[Dict[str, Any]]:
+        """The trace as OpenTelemetry-compatible span dictionaries (OTLP JSON field names)."""
+        attributes = [
+            {'key': 'store', 'value': {'stringValue': self.store}},
+            {'key': 'query', 'value': {'stringValue': self.query}}
+        ]
+        root = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': 'search',
+            'startTimeUnixNano': int(self.start * 1e9),
+            'endTimeUnixNano': int((self.end or time.time()) * 1e9),
+            'attributes': attributes,
+            'status': {'code': 'STATUS_CODE_OK' if self.status == 'ok' else 'STATUS_CODE_ERROR'}
+        }
+        with self._lock:
+            spans = list(self.spans)
+        return [root] + [
+            {
+                'traceId': self.trace_id,
+                'spanId': os.urandom(8).hex(),
+                'parentSpanId': self.span_id,
+                'name': stage,
+                'startTimeUnixNano': int(start * 1e9),
+                'endTimeUnixNano': int(end * 1e9),
+                'attributes': attributes
+            }
+            for stage, start, end in spans
+        ]
+
+
+class ChunkTimer:
+    """
+    Splits the time spent on a page that is parsed while it streams in.
+
+    Time spent waiting for the next chunk is download; the rest of the time
+    between creating the timer and finish() is parsing.
+    """
+
+    def __init__(self, metrics: 'Metrics', store: str):
+        self.metrics = metrics
+        self.store = store
+        self.waited = 0.0
+        self._start = time.time()
+        self._started = time.perf_counter()
+        self._finished = False
+
+    def wrap(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass chunks through, timing the wait for each one."""
+        iterator = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            chunk = next(iterator, None)
+            self.waited += time.perf_counter() - started
+            if chunk is None:
+                return
+            yield chunk
+
+    def finish(self):
+        """Record the download and parse times; only the first call counts."""
+        if self._finished:
+            return
+        self._finished = True
+        elapsed = time.perf_counter() - self._started
+        self.metrics.observe(STAGE_DOWNLOAD, self.store, self.waited, self._start)
+        self.metrics.observe(STAGE_PARSE, self.store, elapsed - self.waited, self._start + self.waited)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('current_trace', default=None)
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_traces: int = DEFAULT_MAX_TRACES):
+        """
+        Per-stage, per-store latency histograms plus per-query traces.
+
+        Every observation goes into the (stage, store) histogram and, when a
+        trace is active in the current context (see trace()), into that trace
+        as a span. The active trace follows the search into the shared HTTP
+        client's event loop, because coroutines submitted from a thread run
+        in a copy of its context. Histograms are exported in the Prometheus
+        text format; finished traces as OpenTelemetry-compatible spans.
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+            max_traces: Finished traces kept for export
+        """
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._traces: deque = deque(maxlen=max_traces)
+        self._lock = Lock()
+
+    def observe(self, stage: str, store: str, seconds: float, start: Optional[float] = None):
+        """
+        Record the duration of one stage.
+
+        Args:
+            stage: One of STAGES
+            store: Store the work was done for
+            seconds: Duration
+            start: Epoch time the stage started (default: `seconds` ago)
+        """
+        seconds = max(0.0, seconds)
+        with self._lock:
+            histogram = self._histograms.get((stage, store))
+            if histogram is None:
+                histogram = self._histograms[(stage, store)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            end = time.time() if start is None else start + seconds
+            trace.add(stage, end - seconds, end)
+
+    @contextmanager
+    def timer(self, stage: str, store: str) -> Iterator[None]:
+        """Time the enclosed block as one stage."""
+        start, started = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, store, time.perf_counter() - started, start)
+
+    @contextmanager
+    def trace(self, store: str, query: str) -> Iterator[Trace]:
+        """
+        Collect the stages of one store search into a trace, also timed as STAGE_TOTAL.
+
+        Nested calls (a scraper traced by a factory that already traces the
+        search) reuse the outer trace.
+        """
+        outer = _current_trace.get()
+        if outer is not None:
+            yield outer
+            return
+        trace = Trace(store, query)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            yield trace
+        except BaseException:
+            trace.status = 'error'
+            raise
+        finally:
+            _current_trace.reset(token)
+            self.observe(STAGE_TOTAL, store, time.perf_counter() - started, trace.start)
+            trace.end = time.time()
+            trace.add(STAGE_TOTAL, trace.start, trace.end)
+            with self._lock:
+                self._traces.append(trace)
+
+    def stream_timer(self, store: str) -> 'ChunkTimer':
+        """Timer splitting a streamed page into download and parse time (see ChunkTimer)."""
+        return ChunkTimer(self, store)
+
+    def histogram(self, stage: str, store: str) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get((stage, store))
+
+    def summary(self, quantiles: Tuple[float, ...] = (0.5, 0.95)) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Store -> stage -> count, mean and quantiles (seconds), to tell network-bound from parse-bound stores."""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        with self._lock:
+            for (stage, store), histogram in self._histograms.items():
+                row = {'count': histogram.count, 'mean': histogram.sum / histogram.count if histogram.count else 0.0}
+                for q in quantiles:
+                    row[f"p{int(q * 100)}"] = histogram.quantile(q)
+                result.setdefault(store, {})[stage] = row
+        return result
+
+    def prometheus(self) -> str:
+        """All histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent per stage of a store search.",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for (stage, store), histogram in items:
+                labels = f'stage="{_label(stage)}",store="{_label(store)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram.sum!r}")
+                lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def traces(self, store: Optional[str] = None, query: Optional[str] = None) -> List[Trace]:
+        """Finished traces, oldest first, optionally for one store and/or query."""
+        with self._lock:
+            traces = list(self._traces)
+        return [
+            trace for trace in traces
+            if (store is None or trace.store == store) and (query is None or trace.query == query)
+        ]
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Finished traces as OpenTelemetry-compatible span dictionaries."""
+        return [span for trace in self.traces() for span in trace.to_spans()]
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._traces.clear()
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Expose prometheus() on http://host:port/metrics from a background thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+_shared_metrics: Optional[Metrics] = None
+_shared_lock = Lock()
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics registry."""
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = Metrics()
+        return _shared_metrics
@@ -0,0 +1,203 @@
+import os
+import time
+import atexit
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from queue import Queue
+from threading import BoundedSemaphore, Lock, Thread
+from typing import Callable, Dict, Iterable, Iterator, Optional, Any, Tuple, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHM_THRESHOLD = 64 * 1024  # Bodies at least this large are handed over through shared memory
+DEFAULT_START_METHOD = 'spawn'  # Forking a process that runs the HTTP client's event loop thread is unsafe
+
+Body = Union[bytes, bytearray, memoryview, str]
+
+
+def _run_job(func: Callable, payload: Tuple, encoding: Optional[str], args: Tuple) -> Any:
+    """Runs in a worker process: rebuild the page from the payload and parse it."""
+    kind = payload[0]
+    if kind == 'shm':
+        shm = SharedMemory(name=payload[1])
+        try:
+            view = shm.buf[:payload[2]]
+            try:
+                body = bytes(view)
+            finally:
+                # A view that is still exported keeps the segment from being closed
+                view.release()
+        finally:
+            shm.close()
+    else:
+        body = payload[1]
+    if encoding and isinstance(body, bytes):
+        body = body.decode(encoding, errors='replace')
+    return func(body, *args)
+
+
+class ParsePool:
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 max_pending: Optional[int] = None,
+                 shm_threshold: int = DEFAULT_SHM_THRESHOLD,
+                 start_method: str = DEFAULT_START_METHOD):
+        """
+        Process pool that parses fetched pages off the fetching threads.
+
+        Parsing is CPU-bound and holds the GIL, so with fetching and parsing
+        in the same threads a parse-heavy page stalls every other store's
+        I/O. Fetchers hand the raw response body to submit() and wait on the
+        returned future (releasing the GIL) while a worker process decodes,
+        parses and normalizes the page.
+
+        Large bodies are copied once into a shared memory segment and only
+        its name is sent to the worker, instead of pickling the body through
+        the pool's pipe; small bodies are sent inline. At most max_pending
+        pages are queued or being parsed: submit() blocks beyond that, which
+        pushes back on the fetchers rather than buffering bodies without bound.
+
+        Args:
+            workers: Parser processes (default: one per CPU)
+            max_pending: Pages queued or in progress before submit() blocks (default: 2 x workers)
+            shm_threshold: Body size in bytes from which shared memory is used
+            start_method: multiprocessing start method of the workers
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self.shm_threshold = shm_threshold
+        self._slots = BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context(start_method))
+        self._lock = Lock()
+
+        # Counters
+        self.submitted = 0
+        self.shared = 0
+        self.failed = 0
+        self.total_wait = 0.0  # Seconds submit() blocked on back-pressure
+
+    def submit(self, func: Callable, body: Body, *args, encoding: Optional[str] = None) -> Future:
+        """
+        Parse a page in a worker process.
+
+        Args:
+            func: Module-level function called as func(page, *args) in the worker
+            body: Raw response body (or already decoded HTML)
+            *args: Further picklable arguments for func
+            encoding: Charset used to decode a bytes body in the worker; None passes bytes through
+
+        Returns:
+            Future resolving to func's return value
+        """
+        start = time.monotonic()
+        self._slots.acquire()
+        waited = time.monotonic() - start
+
+        shm = None
+        try:
+            if isinstance(body, str):
+                payload = ('inline', body)
+            elif len(body) >= self.shm_threshold:
+                size = len(body)
+                shm = SharedMemory(create=True, size=size)
+                shm.buf[:size] = body
+                payload = ('shm', shm.name, size)
+            else:
+                payload = ('inline', bytes(body))
+            future = self._executor.submit(_run_job, func, payload, encoding, args)
+        except BaseException:
+            self._release(shm)
+            raise
+
+        with self._lock:
+            self.submitted += 1
+            self.shared += shm is not None
+            self.total_wait += waited
+        future.add_done_callback(lambda f: self._done(f, shm))
+        return future
+
+    def _release(self, shm: Optional[SharedMemory]):
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        self._slots.release()
+
+    def _done(self, future: Future, shm: Optional[SharedMemory]):
+        self._release(shm)
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                self.failed += 1
+
+    def parse(self, func: Callable, body: Body, *args, encoding: Optional[str] = None) -> Any:
+        """Parse a page in a worker process and wait for the result."""
+        return self.submit(func, body, *args, encoding=encoding).result()
+
+    def pipeline(self, func: Callable, pages: Iterable[Tuple]) -> Iterator[Tuple[int, Any]]:
+        """
+        Parse a stream of pages, yielding results as workers finish them.
+
+        A feeder thread takes (body, *args) tuples from `pages` (typically a
+        generator that fetches them) and submits them, blocking on
+        back-pressure; finished pages arrive on a result queue in completion
+        order.
+
+        Yields:
+            (index of the page in `pages`, func's return value); a failed page re-raises its error
+        """
+        results: Queue = Queue()
+        done = object()
+
+        def feed():
+            count = 0
+            try:
+                for index, (body, *args) in enumerate(pages):
+                    future = self.submit(func, body, *args)
+                    future.add_done_callback(lambda f, index=index: results.put((index, f)))
+                    count += 1
+            except BaseException as e:
+                results.put((None, e))
+            results.put((done, count))
+
+        Thread(target=feed, name='parse-feeder', daemon=True).start()
+        received, expected = 0, None
+        while expected is None or received < expected:
+            index, item = results.get()
+            if index is done:
+                expected = item
+            elif index is None:
+                raise item
+            else:
+                received += 1
+                yield index, item.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'submitted': self.submitted,
+                'shared': self.shared,
+                'failed': self.failed,
+                'total_wait': round(self.total_wait, 3)
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_shared_pool: Optional[ParsePool] = None
+_shared_lock = Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    """Return the process-wide parse pool, started on first use."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ParsePool()
+            atexit.register(_shared_pool.shutdown)
+        return _shared_pool
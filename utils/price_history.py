@@ -0,0 +1,320 @@
+import os
+import time
+import atexit
+import sqlite3
+import logging
+from threading import Lock
+from typing import Dict, List, Optional, Any, Tuple
+
+from utils.title_matcher import normalize_title
+from utils.product import Product
+from utils.price_parser import FORMAT_AUTO, parse_price
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join('cache', 'price_history.sqlite3')
+DEFAULT_BATCH_SIZE = 200  # Buffered observations written in one transaction
+DEFAULT_FLUSH_INTERVAL = 5.0  # Seconds an observation may wait in the buffer
+DEFAULT_RAW_RETENTION = 2 * 86400.0  # Raw observations older than this are rolled up per hour
+DEFAULT_HOURLY_RETENTION = 30 * 86400.0  # Hourly rollups older than this are rolled up per day
+
+HOUR = 3600
+DAY = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    product TEXT NOT NULL,
+    store TEXT NOT NULL,
+    title TEXT,
+    price REAL NOT NULL,
+    available INTEGER,
+    observed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_product_time ON observations (product, observed_at);
+CREATE INDEX IF NOT EXISTS observations_time ON observations (observed_at);
+CREATE TABLE IF NOT EXISTS rollups (
+    product TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    store TEXT NOT NULL,
+    min_price REAL NOT NULL,
+    max_price REAL NOT NULL,
+    total REAL NOT NULL,
+    n INTEGER NOT NULL,
+    available INTEGER,
+    PRIMARY KEY (product, resolution, bucket, store)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollups_resolution_bucket ON rollups (resolution, bucket);
+"""
+
+# Merges a rolled-up group into an existing bucket (a bucket can be compacted in several passes)
+_UPSERT = """
+ON CONFLICT (product, resolution, bucket, store) DO UPDATE SET
+    min_price = MIN(min_price, excluded.min_price),
+    max_price = MAX(max_price, excluded.max_price),
+    total = total + excluded.total,
+    n = n + excluded.n,
+    available = MAX(IFNULL(available, excluded.available), IFNULL(excluded.available, available))
+"""
+
+
+def product_key(title: str) -> str:
+    """Key under which a product's observations are stored (its normalized title)."""
+    return normalize_title(title)
+
+
+def _price_value(price: Any) -> Optional[float]:
+    if isinstance(price, (int, float)):
+        return float(price)
+    return parse_price(price, FORMAT_AUTO)
+
+
+class PriceHistory:
+    def __init__(self,
+                 path: str = DEFAULT_HISTORY_PATH,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 raw_retention: float = DEFAULT_RAW_RETENTION,
+                 hourly_retention: float = DEFAULT_HOURLY_RETENTION):
+        """
+        Embedded time series of every price observed, backed by SQLite in WAL mode.
+
+        Observations are buffered and written in batches of batch_size (or
+        after flush_interval seconds), so recording a search result costs a
+        list append rather than a transaction. Queries flush first.
+
+        compact() downsamples old data: raw observations older than
+        raw_retention become hourly min/max/sum/count rollups, and hourly
+        rollups older than hourly_retention become daily ones. Rollups keep
+        sums and counts, so min/avg/max over any period stay exact after
+        compaction; only the time resolution is lost. Queries read raw rows
+        and rollups through (product, time) indexes.
+
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+            batch_size: Observations written per transaction
+            flush_interval: Seconds after which a partial batch is written anyway
+            raw_retention: Seconds raw observations are kept before hourly rollup
+            hourly_retention: Seconds hourly rollups are kept before daily rollup
+        """
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        self._buffer: List[Tuple[str, str, Optional[str], float, Optional[int], float]] = []
+        self._last_flush = time.monotonic()
+        self.compact()
+
+    def record(self,
+               store: str,
+               product: str,
+               price: float,
+               available: Optional[bool] = None,
+               observed_at: Optional[float] = None,
+               title: Optional[str] = None):
+        """Buffer one observation (written with the next batch)."""
+        row = (
+            product, store, title, float(price),
+            None if available is None else int(bool(available)),
+            time.time() if observed_at is None else observed_at
+        )
+        with self._lock:
+            self._buffer.append(row)
+            due = (len(self._buffer) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def record_result(self, result: Dict[str, Any], observed_at: Optional[float] = None) -> bool:
+        """
+        Record a scraper result dict (store, title, price and optionally available_online).
+
+        Returns:
+            False when the result has no usable price
+        """
+        price = result.price if isinstance(result, Product) else _price_value(result.get('price'))
+        if price is None or not result.get('title'):
+            return False
+        self.record(
+            result.get('store', ''),
+            product_key(result['title']),
+            price,
+            available=result.get('available_online'),
+            observed_at=observed_at,
+            title=result['title']
+        )
+        return True
+
+    def _flush_locked(self):
+        if self._buffer:
+            with self._conn:
+                self._conn.executemany('INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?)', self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Write buffered observations now."""
+        with self._lock:
+            self._flush_locked()
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Roll raw observations up into hours, and old hours up into days.
+
+        Only complete hours/days are rolled up.
+
+        Returns:
+            Number of raw rows and hourly rollups that were folded away
+        """
+        now = time.time() if now is None else now
+        hour_cutoff = int(now - self.raw_retention) // HOUR * HOUR
+        day_cutoff = int(now - self.hourly_retention) // DAY * DAY
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.execute(f"""
+                    INSERT INTO rollups
+                    SELECT product, {HOUR}, CAST(observed_at / {HOUR} AS INTEGER) * {HOUR}, store,
+                           MIN(price), MAX(price), SUM(price), COUNT(*), MAX(available)
+                    FROM observations WHERE observed_at < ?
+                    GROUP BY product, store, CAST(observed_at / {HOUR} AS INTEGER)
+                    {_UPSERT}
+                """, (hour_cutoff,))
+                raw = self._conn.execute('DELETE FROM observations WHERE observed_at < ?', (hour_cutoff,)).rowcount
+
+                self._conn.execute(f"""
+                    INSERT INTO rollups
+                    SELECT product, {DAY}, bucket / {DAY} * {DAY}, store,
+                           MIN(min_price), MAX(max_price), SUM(total), SUM(n), MAX(available)
+                    FROM rollups WHERE resolution = {HOUR} AND bucket < ?
+                    GROUP BY product, store, bucket / {DAY}
+                    {_UPSERT}
+                """, (day_cutoff,))
+                hourly = self._conn.execute(
+                    f'DELETE FROM rollups WHERE resolution = {HOUR} AND bucket < ?', (day_cutoff,)
+                ).rowcount
+        if raw or hourly:
+            logger.info(f"Compacted price history: {raw} observations, {hourly} hourly rollups")
+        return {'observations': raw, 'hourly': hourly}
+
+    def _query(self, sql: str, params: Tuple) -> List[Tuple]:
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _store_filter(store: Optional[str]) -> Tuple[str, Tuple]:
+        return (' AND store = ?', (store,)) if store else ('', ())
+
+    def price_stats(self, product: str, days: float = 30, store: Optional[str] = None,
+                    now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Min, average and max price of a product over the last `days` days.
+
+        Compacted periods count by bucket start, so the edge of a window
+        that falls inside an hourly or daily rollup is rounded to it.
+
+        Returns:
+            Dictionary with min, avg, max and count, or None without observations
+        """
+        since = (time.time() if now is None else now) - days * DAY
+        where, params = self._store_filter(store)
+        row = self._query(f"""
+            SELECT MIN(low), SUM(total) / SUM(n), MAX(high), SUM(n) FROM (
+                SELECT MIN(price) AS low, SUM(price) AS total, COUNT(*) AS n, MAX(price) AS high
+                FROM observations WHERE product = ? AND observed_at >= ?{where}
+                UNION ALL
+                SELECT MIN(min_price), SUM(total), SUM(n), MAX(max_price)
+                FROM rollups WHERE product = ? AND resolution IN ({HOUR}, {DAY}) AND bucket >= ?{where}
+            )
+        """, (product, since) + params + (product, since) + params)[0]
+        if not row[3]:
+            return None
+        return {'min': row[0], 'avg': row[1], 'max': row[2], 'count': row[3]}
+
+    def lowest_prices(self, product: str, days: float = 30, now: Optional[float] = None) -> Dict[str, float]:
+        """Lowest price per store over the last `days` days (for alerts)."""
+        since = (time.time() if now is None else now) - days * DAY
+        rows = self._query(f"""
+            SELECT store, MIN(low) FROM (
+                SELECT store, MIN(price) AS low FROM observations
+                WHERE product = ? AND observed_at >= ? GROUP BY store
+                UNION ALL
+                SELECT store, MIN(min_price) FROM rollups
+                WHERE product = ? AND resolution IN ({HOUR}, {DAY}) AND bucket >= ? GROUP BY store
+            ) GROUP BY store
+        """, (product, since, product, since))
+        return {store: low for store, low in rows}
+
+    def series(self, product: str, days: float = 30, resolution: int = DAY, store: Optional[str] = None,
+               now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Per-store min/avg/max per time bucket, oldest first (for charts).
+
+        Args:
+            resolution: Bucket width in seconds (HOUR or DAY); rollups coarser than this keep their own width
+        """
+        since = (time.time() if now is None else now) - days * DAY
+        where, params = self._store_filter(store)
+        rows = self._query(f"""
+            SELECT bucket, store, MIN(low), SUM(total) / SUM(n), MAX(high), SUM(n) FROM (
+                SELECT CAST(observed_at / ? AS INTEGER) * ? AS bucket, store,
+                       MIN(price) AS low, SUM(price) AS total, COUNT(*) AS n, MAX(price) AS high
+                FROM observations WHERE product = ? AND observed_at >= ?{where}
+                GROUP BY store, CAST(observed_at / ? AS INTEGER)
+                UNION ALL
+                SELECT bucket / ? * ?, store, MIN(min_price), SUM(total), SUM(n), MAX(max_price)
+                FROM rollups WHERE product = ? AND resolution IN ({HOUR}, {DAY}) AND bucket >= ?{where}
+                GROUP BY store, bucket / ?
+            ) GROUP BY bucket, store ORDER BY bucket, store
+        """, (resolution, resolution, product, since) + params + (resolution,)
+             + (resolution, resolution, product, since) + params + (resolution,))
+        return [
+            {'bucket': bucket, 'store': store, 'min': low, 'avg': avg, 'max': high, 'count': n}
+            for bucket, store, low, avg, high, n in rows
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            buffered = len(self._buffer)
+            observations = self._conn.execute('SELECT COUNT(*) FROM observations').fetchone()[0]
+            counts = dict(self._conn.execute('SELECT resolution, COUNT(*) FROM rollups GROUP BY resolution').fetchall())
+        return {
+            'buffered': buffered,
+            'observations': observations,
+            'hourly': counts.get(HOUR, 0),
+            'daily': counts.get(DAY, 0)
+        }
+
+    def close(self):
+        """Write buffered observations and close the database."""
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+
+_shared_history: Optional[PriceHistory] = None
+_shared_lock = Lock()
+
+
+def get_price_history() -> PriceHistory:
+    """Return the process-wide price history, flushed at exit."""
+    global _shared_history
+    with _shared_lock:
+        if _shared_history is None:
+            _shared_history = PriceHistory()
+            atexit.register(_shared_history.flush)
+        return _shared_history
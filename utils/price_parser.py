@@ -0,0 +1,134 @@
+"""
+Price parsing shared by every scraper.
+
+Prices are parsed into whole cents with integer arithmetic, so '1.299,99'
+is exactly 129999 and never 1.299 or 1299.9899999. The number format is
+explicit per store:
+
+    'eu' / 'nl-NL'   1.299,99   (dot groups thousands, comma is the decimal)
+    'us' / 'en'      1,299.99   (comma groups thousands, dot is the decimal)
+    'cents'          129999     (all digits are cents)
+    'auto'           decided per number: the last separator is the decimal
+                     one unless exactly three digits follow it
+
+Only the first amount in a text is read ('vanaf € 1.299,99' and
+'12,99 - 19,99' both work); texts without one ('Bieden', 'Gratis',
+'n.o.t.k.') give None.
+"""
+import re
+import logging
+from array import array
+from typing import Dict, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NO_PRICE = -1  # parse_many() value for texts without a price
+
+FORMAT_EU = 'eu'
+FORMAT_US = 'us'
+FORMAT_CENTS = 'cents'
+FORMAT_AUTO = 'auto'
+
+# Locale names accepted for the formats above
+_ALIASES = {'nl-NL': FORMAT_EU, 'nl': FORMAT_EU, 'de-DE': FORMAT_EU, 'en': FORMAT_US, 'en-US': FORMAT_US,
+            'en-GB': FORMAT_US}
+
+# First number in a price text: digits, optionally grouped by thousands, optionally with up to two decimals
+_NUMBER = re.compile(r'\d+(?:[.,\s  ]\d{3}(?!\d))*(?:[.,]\d{0,2})?')
+_GROUPING = re.compile(r'[\s  ]')
+
+
+def _normalize_format(price_format: str) -> str:
+    price_format = _ALIASES.get(price_format, price_format)
+    if price_format not in (FORMAT_EU, FORMAT_US, FORMAT_CENTS, FORMAT_AUTO):
+        raise ValueError(f"Unknown price format: {price_format}")
+    return price_format
+
+
+def _decimal_separator(number: str) -> Optional[str]:
+    """Guess which separator of a number is the decimal one (for 'auto')."""
+    last = max(number.rfind('.'), number.rfind(','))
+    if last < 0:
+        return None
+    separator = number[last]
+    if ('.' in number and ',' in number) or number.count(separator) == 1 and len(number) - last - 1 != 3:
+        return separator
+    return None  # 1.299 or 1,299,000: grouping only
+
+
+def _number_cents(number: str, price_format: str) -> Optional[int]:
+    if number.isdigit():  # No separators: the common case of whole euros (or cents)
+        return int(number) if price_format == FORMAT_CENTS else int(number) * 100
+    number = _GROUPING.sub('', number)
+    if price_format == FORMAT_CENTS:
+        digits = number.replace('.', '').replace(',', '')
+        return int(digits) if digits else None
+
+    if price_format == FORMAT_EU:
+        decimal = ','
+    elif price_format == FORMAT_US:
+        decimal = '.'
+    else:
+        decimal = _decimal_separator(number)
+
+    if decimal is not None and decimal in number:
+        whole, _, fraction = number.rpartition(decimal)
+    else:
+        whole, fraction = number, ''
+    whole = whole.replace('.', '').replace(',', '')
+    if not whole and not fraction:
+        return None
+    return int(whole or '0') * 100 + int((fraction + '00')[:2])
+
+
+def parse_price_cents(text: Optional[str], price_format: str = FORMAT_EU) -> Optional[int]:
+    """
+    Parse the first amount in a price text into whole cents.
+
+    Args:
+        text: Price text as shown by the store ('€ 1.299,99', 'vanaf 12,-', 'Bieden')
+        price_format: 'eu', 'us', 'cents', 'auto' or a locale name such as 'nl-NL'
+
+    Returns:
+        The price in cents, or None when the text holds no number
+    """
+    if not text:
+        return None
+    match = _NUMBER.search(text)
+    if not match:
+        return None
+    return _number_cents(match.group(), _normalize_format(price_format))
+
+
+def parse_price(text: Optional[str], price_format: str = FORMAT_EU) -> Optional[float]:
+    """Like parse_price_cents(), in euros."""
+    cents = parse_price_cents(text, price_format)
+    return None if cents is None else cents / 100
+
+
+def parse_many(texts: Iterable[Optional[str]], price_format: str = FORMAT_EU) -> array:
+    """
+    Parse every price text of a page at once.
+
+    The format is resolved once and each distinct text is parsed once (a
+    results page repeats the same few prices), so this costs one regex
+    search per distinct price.
+
+    Returns:
+        array('q') of cents, NO_PRICE where a text holds no number
+    """
+    price_format = _normalize_format(price_format)
+    search = _NUMBER.search
+    seen: Dict[Optional[str], int] = {}
+    result = array('q')
+    append = result.append
+    for text in texts:
+        cents = seen.get(text)
+        if cents is None:
+            match = search(text) if text else None
+            parsed = _number_cents(match.group(), price_format) if match else None
+            cents = seen[text] = NO_PRICE if parsed is None else parsed
+        append(cents)
+    return result
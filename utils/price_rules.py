@@ -0,0 +1,184 @@
+import logging
+from statistics import median
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+from config.price_rules import (DEFAULT_PRICE_RULE, OUTLIER_MIN_PRICES, OUTLIER_THRESHOLD, PRICE_RULES,
+                                PriceRule)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# MAD times this estimates the standard deviation of normally distributed prices
+MAD_SCALE = 1.4826
+
+# Classified texts kept per rule set; queries and listing titles repeat across pages
+DEFAULT_CACHE_SIZE = 4096
+
+
+class KeywordAutomaton:
+    def __init__(self, keywords: Dict[str, int]):
+        """
+        Aho-Corasick automaton over lowercase keywords, each with a rank.
+
+        Built once; first() then finds the lowest-ranked keyword anywhere in a
+        text in a single pass over its characters, however many keywords
+        there are.
+
+        Args:
+            keywords: Keyword -> rank (lower wins)
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._rank: List[Optional[int]] = [None]
+        for keyword, rank in keywords.items():
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._rank.append(None)
+                node = next_node
+            if self._rank[node] is None or rank < self._rank[node]:
+                self._rank[node] = rank
+
+        # Breadth-first failure links; each node also takes the best rank of its
+        # suffixes, so a match never has to follow them at search time
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                suffix_rank = self._rank[self._fail[child]]
+                if suffix_rank is not None and (self._rank[child] is None or suffix_rank < self._rank[child]):
+                    self._rank[child] = suffix_rank
+                queue.append(child)
+
+    def first(self, text: str) -> Optional[int]:
+        """Lowest rank of the keywords found in text (which must be lowercase), or None."""
+        goto, fail, ranks = self._goto, self._fail, self._rank
+        best = None
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            rank = ranks[node]
+            if rank is not None and (best is None or rank < best):
+                if rank == 0:
+                    return 0
+                best = rank
+        return best
+
+
+class PriceRules:
+    def __init__(self,
+                 rules: Optional[Sequence[PriceRule]] = None,
+                 default: Optional[PriceRule] = None,
+                 outlier_threshold: float = OUTLIER_THRESHOLD,
+                 min_prices: int = OUTLIER_MIN_PRICES,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Plausible price checks per product category (see config.price_rules).
+
+        A title or query is put in a category by the first rule with one of its
+        keywords in the text; validate() checks a price against that range, and
+        plausible() also drops prices that are outliers among the plausible
+        prices of one result set (by median absolute deviation, so a handful of
+        bait listings cannot shift the reference the way they would a mean).
+
+        Args:
+            rules: Rules in priority order (default: config.price_rules.PRICE_RULES)
+            default: Rule for texts without any keyword
+            outlier_threshold: Modified z-score above which a price is an outlier
+            min_prices: Fewer plausible prices than this are not checked for outliers
+            cache_size: Classified texts remembered
+        """
+        self.rules = list(PRICE_RULES if rules is None else rules)
+        self.default = default or DEFAULT_PRICE_RULE
+        self.outlier_threshold = outlier_threshold
+        self.min_prices = min_prices
+        self.cache_size = cache_size
+        keywords = {}
+        for rank, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                keywords.setdefault(keyword.lower(), rank)
+        self._automaton = KeywordAutomaton(keywords)
+        self._categories: Dict[str, PriceRule] = {}
+        self._lock = Lock()
+
+    def classify(self, text: str) -> PriceRule:
+        """The rule for a product title or search query."""
+        rule = self._categories.get(text)
+        if rule is None:
+            rank = self._automaton.first(text.lower())
+            rule = self.default if rank is None else self.rules[rank]
+            with self._lock:
+                if len(self._categories) >= self.cache_size:
+                    self._categories.clear()
+                self._categories[text] = rule
+        return rule
+
+    def validate(self, price: Optional[float], product: str) -> bool:
+        """Whether a price is within the range of the product's category."""
+        if price is None:
+            return False
+        rule = self.classify(product)
+        try:
+            return rule.min_price <= price <= rule.max_price
+        except TypeError:
+            return False
+
+    def plausible(self, prices: Sequence[Optional[float]], product: str) -> List[bool]:
+        """
+        Check every price of one result set for a product.
+
+        Args:
+            prices: Prices in euros (None when a listing has none)
+            product: Title or query the listings were found for
+
+        Returns:
+            Per price, whether it is in the category's range and not an outlier
+        """
+        rule = self.classify(product)
+        low, high = rule.min_price, rule.max_price
+        valid = [price is not None and low <= price <= high for price in prices]
+        in_range = [price for price, ok in zip(prices, valid) if ok]
+        if len(in_range) < self.min_prices:
+            return valid
+
+        center = median(in_range)
+        spread = MAD_SCALE * median([abs(price - center) for price in in_range])
+        if not spread:
+            return valid  # Most listings share one price; nothing to measure against
+        limit = self.outlier_threshold * spread
+        result = [ok and abs(price - center) <= limit for price, ok in zip(prices, valid)]
+        dropped = sum(valid) - sum(result)
+        if dropped:
+            logger.debug(f"Dropped {dropped} outlier price(s) for {product!r} (median {center:.2f})")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'rules': len(self.rules),
+            'keywords': sum(len(rule.keywords) for rule in self.rules),
+            'automaton_states': len(self._automaton._goto),
+            'cached_texts': len(self._categories)
+        }
+
+
+_shared_rules: Optional[PriceRules] = None
+_shared_lock = Lock()
+
+
+def get_price_rules() -> PriceRules:
+    """Return the process-wide price rules, built from config.price_rules."""
+    global _shared_rules
+    with _shared_lock:
+        if _shared_rules is None:
+            _shared_rules = PriceRules()
+        return _shared_rules
@@ -1,59 +1,17 @@
-from difflib import SequenceMatcher
-import re
+from utils.title_matcher import match_scores
+from utils.price_parser import FORMAT_AUTO, parse_price
+from utils.price_rules import get_price_rules
 
 def string_similarity(a, b):
-    """Calculate the similarity between two strings using SequenceMatcher."""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    """Calculate the similarity between two strings (use match_scores to score many titles at once)."""
+    return match_scores(a, [b])[0]
 
 def extract_price(price_str):
-    """Extract numeric price from string, handling various formats."""
-    try:
-        # Remove currency symbols and other non-numeric characters except decimal point
-        price_str = re.sub(r'[^\d.]', '', price_str)
-        
-        # Handle empty or invalid strings
-        if not price_str:
-            return None
-            
-        # Convert to float
-        price = float(price_str)
-        return price
-    except (ValueError, TypeError):
+    """Extract numeric price from string, guessing its format ('€449.99', '1.299,00'); see utils.price_parser."""
+    if not isinstance(price_str, str):
         return None
+    return parse_price(price_str, FORMAT_AUTO)
 
 def validate_price(price, product):
-    """Validate if a price is within reasonable ranges for different product types."""
-    if price is None:
-        return False
-        
-    # Define price ranges for different product types
-    price_ranges = {
-        'console': {
-            'ps5': (350, 800),  # PS5 specific range
-            'xbox': (350, 800),  # Xbox specific range
-            'switch': (250, 500),  # Nintendo Switch specific range
-            'default': (100, 1000)  # Default console range
-        },
-        'game': (10, 100),       # Video games
-        'accessory': (5, 200)    # Gaming accessories
-    }
-    
-    # Determine product type based on keywords
-    product_lower = product.lower()
-    
-    # Check for specific console types
-    if 'ps5' in product_lower or 'playstation 5' in product_lower:
-        min_price, max_price = price_ranges['console']['ps5']
-    elif 'xbox' in product_lower:
-        min_price, max_price = price_ranges['console']['xbox']
-    elif 'switch' in product_lower or 'nintendo' in product_lower:
-        min_price, max_price = price_ranges['console']['switch']
-    elif any(keyword in product_lower for keyword in ['console', 'playstation', 'nintendo']):
-        min_price, max_price = price_ranges['console']['default']
-    elif any(keyword in product_lower for keyword in ['game', 'spel', 'software']):
-        min_price, max_price = price_ranges['game']
-    else:
-        min_price, max_price = price_ranges['accessory']
-    
-    # Check if price is within the valid range for the product type
-    return min_price <= price <= max_price 
\ No newline at end of file
+    """Validate if a price is within the plausible range for the product's category (see config.price_rules)."""
+    return get_price_rules().validate(price, product)
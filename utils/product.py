@@ -0,0 +1,223 @@
+import sys
+import logging
+from array import array
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from utils.price_parser import FORMAT_AUTO, NO_PRICE, parse_price_cents
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keys every product has when read as a dictionary
+_FIELD_KEYS = ('store', 'price', 'title', 'description', 'link')
+
+
+def to_cents(price: Union[int, float, str, None]) -> Optional[int]:
+    """Price in whole cents from euros (a number or a normalized price string like '€449.99')."""
+    if price is None:
+        return None
+    if isinstance(price, str):
+        return parse_price_cents(price, FORMAT_AUTO)
+    return int(round(float(price) * 100))
+
+
+def format_cents(cents: int) -> str:
+    return f"€{cents // 100}.{cents % 100:02d}"
+
+
+class Product(Mapping):
+    """
+    One listing found in a store.
+
+    Prices are whole cents, so comparing and sorting listings never parses a
+    string; store names are interned, since every listing of a store repeats
+    the same one. Store-specific fields (ratings, article numbers, ...) go in
+    extra. Products also read as the result dictionaries they replace:
+    product['price'] is the formatted price ('€449.99', or price_text such as
+    'Bieden' when there is no numeric price), product.get('rating') looks in
+    extra, and a product equals the dictionary with the same items.
+    """
+
+    __slots__ = ('store', 'title', 'price_cents', 'link', 'description', 'image_url', 'available', 'price_text',
+                 'extra')
+
+    def __init__(self,
+                 store: str,
+                 title: str,
+                 price_cents: Optional[int],
+                 link: str,
+                 description: Optional[str] = '',
+                 image_url: Optional[str] = None,
+                 available: Optional[bool] = None,
+                 price_text: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            store: Store name
+            title: Product title
+            price_cents: Price in cents, or None when the listing has no numeric price
+            link: Product URL
+            description: Short description
+            image_url: Product image
+            available: Whether it can be ordered online (None when unknown)
+            price_text: What the listing shows instead of a price ('Bieden', 'Gratis', ...)
+            extra: Store-specific fields
+        """
+        self.store = sys.intern(store)
+        self.title = title
+        self.price_cents = price_cents
+        self.link = link
+        self.description = description
+        self.image_url = image_url
+        self.available = available
+        self.price_text = price_text
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> 'Product':
+        """Product from a result dictionary with a numeric or formatted price."""
+        if isinstance(result, Product):
+            return result
+        known = set(_FIELD_KEYS) | {'image_url', 'available_online'}
+        price = result.get('price')
+        price_cents = to_cents(price)
+        return cls(
+            store=result.get('store') or '',
+            title=result.get('title') or '',
+            price_cents=price_cents,
+            link=result.get('link') or '',
+            description=result.get('description', ''),
+            image_url=result.get('image_url'),
+            available=result.get('available_online'),
+            price_text=price if price_cents is None and isinstance(price, str) else None,
+            extra={key: value for key, value in result.items() if key not in known}
+        )
+
+    @property
+    def price(self) -> Optional[float]:
+        """Price in euros, or None."""
+        return None if self.price_cents is None else self.price_cents / 100
+
+    @property
+    def display_price(self) -> Optional[str]:
+        return format_cents(self.price_cents) if self.price_cents is not None else self.price_text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'price':
+            return self.display_price
+        if key == 'available_online':
+            if self.available is None:
+                raise KeyError(key)
+            return self.available
+        if key == 'image_url':
+            if self.image_url is None:
+                raise KeyError(key)
+            return self.image_url
+        if key in _FIELD_KEYS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from _FIELD_KEYS
+        if self.image_url is not None:
+            yield 'image_url'
+        if self.available is not None:
+            yield 'available_online'
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        # Unpickling goes through __init__, so store names are interned again
+        return (Product, (self.store, self.title, self.price_cents, self.link, self.description, self.image_url,
+                          self.available, self.price_text, self.extra))
+
+    def __repr__(self) -> str:
+        return f"Product({self.store!r}, {self.title!r}, {self.display_price!r}, {self.link!r})"
+
+
+class ProductBatch:
+    def __init__(self, products: Iterable[Union[Product, Dict[str, Any]]] = ()):
+        """
+        Products stored column by column: store, title, link and description
+        lists, and an array of prices in cents (NO_PRICE when missing), with
+        the rarely set fields kept per row only when present.
+
+        A batch reads like the list of results it replaces (len, indexing,
+        iteration, truthiness), materializing a Product per access; sort()
+        orders the columns without building any.
+        """
+        self.stores: List[str] = []
+        self.titles: List[str] = []
+        self.price_cents = array('q')
+        self.links: List[str] = []
+        self.descriptions: List[Optional[str]] = []
+        self._optional: List[Optional[tuple]] = []  # (image_url, available, price_text, extra) or None
+        self.extend(products)
+
+    def append(self, product: Union[Product, Dict[str, Any]]):
+        product = Product.from_dict(product)
+        self.stores.append(product.store)
+        self.titles.append(product.title)
+        self.price_cents.append(NO_PRICE if product.price_cents is None else product.price_cents)
+        self.links.append(product.link)
+        self.descriptions.append(product.description)
+        optional = (product.image_url, product.available, product.price_text, product.extra)
+        self._optional.append(optional if any(value is not None for value in optional) else None)
+
+    def extend(self, products: Iterable[Union[Product, Dict[str, Any]]]):
+        for product in products:
+            self.append(product)
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def __getitem__(self, index: int) -> Product:
+        cents = self.price_cents[index]
+        optional = self._optional[index] or (None, None, None, None)
+        return Product(self.stores[index], self.titles[index], None if cents == NO_PRICE else cents,
+                       self.links[index], self.descriptions[index], *optional)
+
+    def __iter__(self) -> Iterator[Product]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def _reorder(self, order: List[int]):
+        self.stores = [self.stores[i] for i in order]
+        self.titles = [self.titles[i] for i in order]
+        self.price_cents = array('q', (self.price_cents[i] for i in order))
+        self.links = [self.links[i] for i in order]
+        self.descriptions = [self.descriptions[i] for i in order]
+        self._optional = [self._optional[i] for i in order]
+
+    def sort(self, key: Optional[Callable[[Product], Any]] = None, reverse: bool = False):
+        """Sort in place, by price (listings without one last) unless a key is given."""
+        if key is None:
+            cents = self.price_cents
+            priced = [i for i in range(len(self)) if cents[i] != NO_PRICE]
+            missing = [i for i in range(len(self)) if cents[i] == NO_PRICE]
+            order = sorted(priced, key=cents.__getitem__, reverse=reverse) + missing
+        else:
+            keys = [key(product) for product in self]
+            order = sorted(range(len(self)), key=keys.__getitem__, reverse=reverse)
+        self._reorder(order)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [product.to_dict() for product in self]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ProductBatch, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ProductBatch({len(self)} products)"
@@ -0,0 +1,294 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Any, Set, Tuple
+
+from utils.title_matcher import normalize_title, trigrams
+from utils.product import Product
+from utils.price_parser import FORMAT_AUTO, parse_price
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Identifiers found in structured fields or in the text of a listing
+_GTIN = re.compile(r'(?<!\d)(\d{8}|\d{12,14})(?!\d)')
+_ASIN_IN_LINK = re.compile(r'/(?:dp|gp/product)/([A-Z0-9]{10})(?:[/?]|$)')
+_MODEL = re.compile(r'\b[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*\b')
+_UNIT = re.compile(r'^\d+(?:[KMGT]B|HZ|MHZ|GHZ|W|MM|CM|M|K|P|X|GEN)$')
+_WORD = re.compile(r'[a-z0-9]+')
+
+# Words that say nothing about which product a listing is
+STOPWORDS = frozenset({
+    'de', 'het', 'een', 'en', 'van', 'voor', 'met', 'in', 'op', 'the', 'and', 'for', 'with', 'of', 'a', 'to'
+})
+
+DEFAULT_THRESHOLD = 0.6  # Title similarity needed to merge listings without a shared identifier
+DEFAULT_MODEL_THRESHOLD = 0.3  # Lower bar when both listings carry the same model number
+DEFAULT_MAX_BLOCK_SIZE = 1000  # Tokens on more listings than this are too common to block on
+DEFAULT_MAX_CANDIDATES = 25  # Listings compared in full per added listing
+
+
+def gtin_is_valid(code: str) -> bool:
+    """Check the GS1 check digit of an EAN-8/UPC-A/EAN-13/GTIN-14 code."""
+    if not code.isdigit() or len(code) not in (8, 12, 13, 14):
+        return False
+    digits = [int(digit) for digit in code]
+    total = sum(digit * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(digits[:-1])))
+    return (10 - total % 10) % 10 == digits[-1]
+
+
+def model_numbers(text: str) -> Set[str]:
+    """Normalized model numbers (e.g. CFI-7021 -> CFI7021) mentioned in a title."""
+    models = set()
+    for token in _MODEL.findall(text or ''):
+        model = token.replace('-', '').upper()
+        digits = sum(char.isdigit() for char in model)
+        if len(model) >= 6 and 2 <= digits < len(model) and not _UNIT.match(model):
+            models.add(model)
+    return models
+
+
+def listing_identifiers(listing: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """
+    Identifiers that pin a listing to one product.
+
+    Returns:
+        Dictionary with 'gtin', 'asin', 'article' and 'model' sets
+    """
+    text = ' '.join(str(listing.get(field) or '') for field in ('title', 'description'))
+
+    gtins = set()
+    for field in ('gtin', 'ean', 'upc'):
+        if listing.get(field):
+            gtins.add(str(listing[field]).strip().zfill(14))
+    for code in _GTIN.findall(text):
+        if gtin_is_valid(code):
+            gtins.add(code.zfill(14))
+
+    asins = set()
+    if listing.get('asin'):
+        asins.add(str(listing['asin']).upper())
+    match = _ASIN_IN_LINK.search(listing.get('link') or '')
+    if match:
+        asins.add(match.group(1))
+
+    articles = set()
+    if listing.get('article_number'):
+        # Article numbers are only unique within one store
+        articles.add(f"{listing.get('store', '')}:{str(listing['article_number']).strip()}")
+
+    return {'gtin': gtins, 'asin': asins, 'article': articles, 'model': model_numbers(listing.get('title') or '')}
+
+
+def title_tokens(title: str) -> Set[str]:
+    return {word for word in _WORD.findall(normalize_title(title)) if word not in STOPWORDS}
+
+
+def _cosine(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / math.sqrt(len(a) * len(b))
+
+
+def _price_value(listing: Dict[str, Any]) -> Optional[float]:
+    if isinstance(listing, Product):
+        return listing.price
+    price = listing.get('price')
+    if isinstance(price, (int, float)):
+        return float(price)
+    return parse_price(price, FORMAT_AUTO)
+
+
+class ProductIndex:
+    def __init__(self,
+                 threshold: float = DEFAULT_THRESHOLD,
+                 model_threshold: float = DEFAULT_MODEL_THRESHOLD,
+                 max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        """
+        Incrementally clusters listings from all stores into canonical products.
+
+        A listing joins an existing product when it shares an exact
+        identifier with it (GTIN/EAN, ASIN or a store's article number), or
+        when its title is similar enough to a listing of that product. Titles
+        are only compared against candidates from a blocking index (title
+        token -> listing ids), ranked by the number of shared tokens and
+        capped at max_candidates, so adding a listing costs a bounded number
+        of comparisons instead of one per listing already indexed. Tokens on
+        more than max_block_size listings ("playstation" on a PS5 search) are
+        not used for blocking.
+
+        Model numbers are evidence rather than identity: matching model
+        numbers lower the similarity needed to merge, and two products that
+        both carry model numbers or GTINs that differ are never merged on
+        title similarity alone.
+
+        Args:
+            threshold: Trigram cosine similarity needed to merge on title alone
+            model_threshold: Similarity needed when the listings share a model number
+            max_block_size: Posting list length above which a token is ignored for blocking
+            max_candidates: Listings compared per added listing
+        """
+        self.threshold = threshold
+        self.model_threshold = model_threshold
+        self.max_block_size = max_block_size
+        self.max_candidates = max_candidates
+
+        self._listings: List[Dict[str, Any]] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._parent: List[int] = []  # Union-find over listing ids; a root id names a product
+        self._members: Dict[int, List[int]] = {}
+        self._identifiers: Dict[int, Dict[str, Set[str]]] = {}
+        self._keys: Dict[Tuple[str, str], int] = {}  # (kind, identifier) -> listing id in that product
+        self._blocks: Dict[str, List[int]] = {}  # Title token -> listing ids
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def _find(self, listing_id: int) -> int:
+        parent = self._parent
+        while parent[listing_id] != listing_id:
+            parent[listing_id] = parent[parent[listing_id]]  # Path halving
+            listing_id = parent[listing_id]
+        return listing_id
+
+    def _union(self, a: int, b: int) -> int:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return a
+        # Keep the older product id, merge the smaller member list into it
+        if a > b:
+            a, b = b, a
+        self._parent[b] = a
+        self._members[a].extend(self._members.pop(b))
+        for kind, values in self._identifiers.pop(b).items():
+            self._identifiers[a][kind] |= values
+        return a
+
+    def _conflicts(self, identifiers: Dict[str, Set[str]], product_id: int) -> bool:
+        known = self._identifiers[product_id]
+        for kind in ('gtin', 'model'):
+            if identifiers[kind] and known[kind] and not identifiers[kind] & known[kind]:
+                return True
+        return False
+
+    def _candidates(self, tokens: Set[str]) -> List[int]:
+        shared = Counter()
+        for token in tokens:
+            posting = self._blocks.get(token)
+            if posting and len(posting) <= self.max_block_size:
+                shared.update(posting)
+        return [listing_id for listing_id, _ in shared.most_common(self.max_candidates)]
+
+    def add(self, listing: Dict[str, Any]) -> int:
+        """
+        Index a listing.
+
+        Returns:
+            Id of the product the listing was assigned to
+        """
+        listing_id = len(self._listings)
+        title = listing.get('title') or ''
+        grams = trigrams(normalize_title(title))
+        tokens = title_tokens(title)
+        identifiers = listing_identifiers(listing)
+
+        self._listings.append(listing)
+        self._grams.append(grams)
+        self._parent.append(listing_id)
+        self._members[listing_id] = [listing_id]
+        self._identifiers[listing_id] = {kind: set(values) for kind, values in identifiers.items()}
+        product_id = listing_id
+
+        # Exact identifiers merge unconditionally
+        for kind in ('gtin', 'asin', 'article'):
+            for value in identifiers[kind]:
+                other = self._keys.get((kind, value))
+                if other is not None:
+                    product_id = self._union(product_id, other)
+
+        # Otherwise join the product of the most similar candidate listing
+        if product_id == listing_id:
+            best_score, best_product = 0.0, None
+            for candidate in self._candidates(tokens):
+                candidate_product = self._find(candidate)
+                if candidate_product == product_id or self._conflicts(identifiers, candidate_product):
+                    continue
+                self.comparisons += 1
+                score = _cosine(grams, self._grams[candidate])
+                needed = self.threshold
+                if identifiers['model'] & self._identifiers[candidate_product]['model']:
+                    needed = self.model_threshold
+                if score >= needed and score > best_score:
+                    best_score, best_product = score, candidate_product
+            if best_product is not None:
+                product_id = self._union(product_id, best_product)
+
+        for kind in ('gtin', 'asin', 'article'):
+            for value in identifiers[kind]:
+                self._keys.setdefault((kind, value), listing_id)
+        for token in tokens:
+            self._blocks.setdefault(token, []).append(listing_id)
+        return self._find(product_id)
+
+    def add_all(self, listings: Iterable[Dict[str, Any]]) -> List[int]:
+        return [self.add(listing) for listing in listings]
+
+    def product_of(self, listing_id: int) -> int:
+        """Product id of a listing (listing ids count up from 0 in the order added)."""
+        return self._find(listing_id)
+
+    def listings(self, product_id: int) -> List[Dict[str, Any]]:
+        """Every listing of a product, in the order added."""
+        return [self._listings[i] for i in sorted(self._members[self._find(product_id)])]
+
+    def products(self) -> Dict[int, List[Dict[str, Any]]]:
+        """Product id -> its listings."""
+        return {product_id: self.listings(product_id) for product_id in sorted(self._members)}
+
+    def canonical_title(self, product_id: int) -> str:
+        """The title most listings of a product agree with."""
+        members = sorted(self._members[self._find(product_id)])
+        best = max(
+            members,
+            key=lambda i: sum(_cosine(self._grams[i], self._grams[j]) for j in members)
+        )
+        return self._listings[best].get('title') or ''
+
+    def best_product(self, query: str) -> Optional[int]:
+        """The product whose listings match the query best (ties go to the product sold by more stores)."""
+        query_grams = trigrams(normalize_title(query))
+        best_key, best_product = None, None
+        for product_id, members in self._members.items():
+            similarity = max(_cosine(query_grams, self._grams[i]) for i in members)
+            stores = len({self._listings[i].get('store') for i in members})
+            key = (similarity, stores, -product_id)
+            if best_key is None or key > best_key:
+                best_key, best_product = key, product_id
+        return best_product
+
+    def best_offer(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Cheapest listing of the product that best matches the query.
+
+        Unlike the cheapest listing overall, this never compares the price
+        of a controller with that of a console.
+        """
+        product_id = self.best_product(query)
+        if product_id is None:
+            return None
+        priced = [
+            (price, listing) for listing in self.listings(product_id)
+            for price in [_price_value(listing)] if price is not None
+        ]
+        return min(priced, key=lambda item: item[0])[1] if priced else None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'listings': len(self._listings),
+            'products': len(self._members),
+            'comparisons': self.comparisons
+        }
@@ -0,0 +1,179 @@
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Dict, Optional, Any
+from urllib.parse import urlsplit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Used when a 429 response carries no (parseable) Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    def __init__(self, interval: float, burst: int = 1):
+        """
+        Token bucket that hands out one token every `interval` seconds.
+
+        Tokens are reserved rather than polled: a caller that finds the bucket
+        empty is told how long to wait for its token and the deficit is
+        carried forward, so concurrent callers are spaced out fairly without
+        holding a lock while they sleep.
+
+        Args:
+            interval: Seconds between tokens (StoreConfig.rate_limit); 0 disables limiting
+            burst: Maximum number of tokens that can accumulate while idle
+        """
+        self.interval = max(0.0, interval)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+        # Counters
+        self.requests = 0
+        self.throttled = 0
+        self.deferrals = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def _refill(self, now: float):
+        if now <= self._updated:
+            return
+        if self.interval:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+        else:
+            self._tokens = float(self.burst)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.interval:
+                self._tokens -= 1
+                wait = max(0.0, self._updated - now) + max(0.0, -self._tokens) * self.interval
+            else:
+                wait = max(0.0, self._updated - now)
+
+            self.requests += 1
+            self.total_wait += wait
+            self.last_wait = wait
+            if wait > 0:
+                self.throttled += 1
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the seconds spent waiting."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, seconds: float):
+        """Hand out no tokens for the next `seconds` (e.g. after a 429 Retry-After)."""
+        with self._lock:
+            until = time.monotonic() + max(0.0, seconds)
+            if until > self._updated:
+                # Allow exactly one request when the pause ends, not a full burst
+                self._tokens = min(max(self._tokens, 0.0), 1.0)
+                self._updated = until
+            self.deferrals += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return wait-time counters for this bucket."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'deferrals': self.deferrals,
+                'total_wait': self.total_wait,
+                'max_wait': self.max_wait,
+                'last_wait': self.last_wait,
+                'avg_wait': self.total_wait / self.requests if self.requests else 0.0
+            }
+
+
+class RateLimiter:
+    def __init__(self, default_interval: float = 0.5, default_burst: int = 1):
+        """
+        Per-host token buckets, created lazily from each StoreConfig.
+
+        Buckets are independent, so waiting on one store never blocks
+        requests to another.
+        """
+        self.default_interval = default_interval
+        self.default_burst = default_burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _host(store_config) -> str:
+        return urlsplit(store_config.base_url).netloc.lower() or store_config.name
+
+    def bucket_for(self, store_config) -> TokenBucket:
+        """Get (or create) the bucket for a store's host."""
+        host = self._host(store_config)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(
+                    getattr(store_config, 'rate_limit', self.default_interval),
+                    getattr(store_config, 'burst', self.default_burst)
+                )
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, store_config) -> float:
+        """Wait for a token for this store; returns the seconds spent waiting."""
+        return self.bucket_for(store_config).acquire()
+
+    def defer(self, store_config, retry_after: Optional[float] = None):
+        """Pause a store's bucket after it answered 429 Too Many Requests."""
+        seconds = DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+        logger.warning(f"Rate limited by {self._host(store_config)}, pausing for {seconds:.1f}s")
+        self.bucket_for(store_config).defer(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return wait-time counters per host."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.stats() for host, bucket in buckets.items()}
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter shared by all scrapers."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
@@ -0,0 +1,214 @@
+import os
+import time
+import pickle
+import sqlite3
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Optional, Any, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'result_cache.sqlite3')
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 600.0
+DEFAULT_STALE_TTL = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL
+)
+"""
+
+
+def make_key(store: str, query: str, **filters) -> str:
+    """Build a cache key from the store, the normalized query and any search filters."""
+    normalized = ' '.join(query.lower().split())
+    parts = [store, normalized] + [f"{name}={filters[name]!r}" for name in sorted(filters)]
+    return '|'.join(parts)
+
+
+class ResultCache:
+    def __init__(self,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL,
+                 stale_ttl: float = DEFAULT_STALE_TTL,
+                 path: Optional[str] = None,
+                 refresh_workers: int = 2):
+        """
+        Memoize normalized search results per (store, query, filters).
+
+        Entries live in an in-memory LRU bounded by max_entries and, when a
+        path is given, in a SQLite file so they survive restarts. An entry
+        younger than ttl is returned as-is. Between ttl and ttl + stale_ttl it
+        is still returned immediately, but a background refresh is started
+        (stale-while-revalidate). Empty results are never cached, so a failed
+        fetch is retried on the next call. Cached values are shared between
+        callers and must be treated as read-only.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            ttl: Seconds an entry is served without refreshing
+            stale_ttl: Extra seconds a stale entry may be served while it refreshes
+            path: Optional SQLite file used as the persistent backing store
+            refresh_workers: Threads used for background refreshes
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.path = path
+
+        self._entries: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._refreshing = set()
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='result-refresh')
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'evictions': 0}
+
+        self._conn = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(
+                'DELETE FROM results WHERE stored_at < ?', (time.time() - ttl - stale_ttl,)
+            )
+            self._conn.commit()
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self._conn is None:
+            return None
+        row = self._conn.execute('SELECT value, stored_at FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        entry = (pickle.loads(row[0]), row[1])
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[Any, float]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def put(self, key: str, value: Any):
+        """Store a result (ignored when empty)."""
+        if not value:
+            return
+        entry = (value, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                    (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), entry[1])
+                )
+                self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh cached result, or None."""
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is None or time.time() - entry[1] >= self.ttl:
+            return None
+        return entry[0]
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for key, computing (and caching) it on a miss.
+
+        Args:
+            key: Cache key from make_key()
+            compute: Zero-argument function that performs the real search
+
+        Returns:
+            The cached or freshly computed result
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            age = time.time() - entry[1] if entry is not None else None
+
+            if entry is not None and age < self.ttl:
+                self._stats['hits'] += 1
+                return entry[0]
+
+            if entry is not None and age < self.ttl + self.stale_ttl:
+                self._stats['stale_hits'] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, compute)
+                return entry[0]
+
+            self._stats['misses'] += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _refresh(self, key: str, compute: Callable[[], Any]):
+        try:
+            self.put(key, compute())
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            logger.error(f"Background refresh failed for {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key: str):
+        """Forget a single entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                self._conn.commit()
+
+    def clear(self):
+        """Forget every entry."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM results')
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current in-memory size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['stale_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self, wait: bool = True):
+        """Finish background refreshes and close the backing store."""
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_shared_cache: Optional[ResultCache] = None
+_shared_lock = Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache shared by all scrapers."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache(path=DEFAULT_CACHE_PATH)
+        return _shared_cache
@@ -0,0 +1,149 @@
+import sys
+import math
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional, Any
+
+from utils.price_parser import FORMAT_AUTO, parse_price
+from utils.product import Product
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columns a view can be sorted by
+SORT_COLUMNS = ('store', 'price', 'title', 'description')
+
+_COLUMN_ATTRS = {'store': 'stores', 'price': 'prices', 'title': 'titles', 'description': 'descriptions'}
+
+# Availability column values
+AVAILABLE = 1
+UNAVAILABLE = 0
+UNKNOWN = -1
+
+
+class ResultStore:
+    def __init__(self):
+        """
+        Search results kept column by column, for views that show a few rows at a time.
+
+        Each result is one row: store names are interned, prices are a float
+        array (NaN when missing) and availability a byte array (-1 unknown),
+        so thousands of listings cost a few lists and arrays rather than a
+        dict each. view() sorts and filters row numbers against the columns,
+        never against the widget that shows them, and caches the last view
+        until a row is added.
+        """
+        self.stores: List[str] = []
+        self.prices = array('d')
+        self.titles: List[str] = []
+        self.descriptions: List[str] = []
+        self.links: List[str] = []
+        self.available = array('b')
+        self._rows: Dict[tuple, int] = {}  # (store, link) -> row
+        self._view_key: Optional[tuple] = None
+        self._view = array('l')
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def add(self, result: Dict[str, Any]) -> Optional[int]:
+        """Append one result; returns its row, or None if the store already listed that link."""
+        store = sys.intern(result.get('store') or '')
+        link = result.get('link') or ''
+        if (store, link) in self._rows:
+            return None
+        if isinstance(result, Product):
+            price = result.price
+        else:
+            price = result.get('price')
+            if not isinstance(price, (int, float)):
+                price = parse_price(price, FORMAT_AUTO)
+        available = result.get('available_online')
+
+        row = len(self.links)
+        self._rows[(store, link)] = row
+        self.stores.append(store)
+        self.prices.append(math.nan if price is None else float(price))
+        self.titles.append(result.get('title') or '')
+        self.descriptions.append(result.get('description') or '')
+        self.links.append(link)
+        self.available.append(UNKNOWN if available is None else (AVAILABLE if available else UNAVAILABLE))
+        self._view_key = None
+        return row
+
+    def add_all(self, results: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for result in results if self.add(result) is not None)
+
+    def index_of(self, store: str, link: str) -> Optional[int]:
+        return self._rows.get((store, link))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """One row as a result dictionary."""
+        price = self.prices[index]
+        available = self.available[index]
+        return {
+            'store': self.stores[index],
+            'price': None if math.isnan(price) else price,
+            'title': self.titles[index],
+            'description': self.descriptions[index],
+            'link': self.links[index],
+            'available_online': None if available == UNKNOWN else bool(available)
+        }
+
+    def store_names(self) -> List[str]:
+        return sorted(set(self.stores))
+
+    def view(self,
+             sort_by: Optional[str] = None,
+             descending: bool = False,
+             stores: Optional[Iterable[str]] = None,
+             min_price: Optional[float] = None,
+             max_price: Optional[float] = None,
+             available_only: bool = False) -> array:
+        """
+        Row numbers matching the filters, in display order.
+
+        Args:
+            sort_by: One of SORT_COLUMNS, or None for arrival order
+            descending: Reverse the sort
+            stores: Only rows from these stores
+            min_price: Only rows priced at least this (rows without a price are dropped)
+            max_price: Only rows priced at most this
+            available_only: Drop rows known to be unavailable; rows without availability (most stores) are kept
+
+        Returns:
+            array of row numbers
+        """
+        if sort_by is not None and sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by}")
+        stores = frozenset(stores) if stores else None
+        key = (sort_by, descending, stores, min_price, max_price, available_only)
+        if key == self._view_key:
+            return self._view
+
+        rows: Iterable[int] = range(len(self.links))
+        if stores is not None:
+            rows = [i for i in rows if self.stores[i] in stores]
+        prices = self.prices
+        if min_price is not None:
+            rows = [i for i in rows if prices[i] >= min_price]  # NaN compares False
+        if max_price is not None:
+            rows = [i for i in rows if prices[i] <= max_price]
+        if available_only:
+            rows = [i for i in rows if self.available[i] != UNAVAILABLE]
+
+        if sort_by == 'price':
+            # Missing prices sort last either way
+            priced = [i for i in rows if not math.isnan(prices[i])]
+            missing = [i for i in rows if math.isnan(prices[i])]
+            rows = sorted(priced, key=prices.__getitem__, reverse=descending) + missing
+        elif sort_by is not None:
+            column = getattr(self, _COLUMN_ATTRS[sort_by])
+            rows = sorted(rows, key=lambda i: column[i].casefold(), reverse=descending)
+        elif descending:
+            rows = list(reversed(rows))
+
+        self._view = array('l', rows)
+        self._view_key = key
+        return self._view
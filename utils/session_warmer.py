@@ -0,0 +1,201 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+from threading import Lock
+from typing import Callable, Dict, Optional, Any, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_PATH = os.path.join('cache', 'sessions.sqlite3')
+DEFAULT_SESSION_TTL = 12 * 3600.0  # Lifetime of a warmed session whose cookies carry no expiry
+
+# Responses that mean the session is not (or no longer) accepted
+BLOCKED_STATUSES = frozenset({401, 403, 503})
+BLOCKED_BODY = re.compile(rb'captcha|robot check', re.IGNORECASE)
+BLOCKED_PAGE = re.compile(BLOCKED_BODY.pattern.decode(), re.IGNORECASE)  # The same markers in decoded HTML
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    store TEXT NOT NULL,
+    user_agent TEXT NOT NULL,
+    cookies TEXT NOT NULL,
+    warmed_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (store, user_agent)
+)
+"""
+
+
+def is_blocked(status_code: int, body: bytes = b'') -> bool:
+    """Whether a response is an anti-bot or captcha page, or was refused, rather than the requested page."""
+    return status_code in BLOCKED_STATUSES or bool(body and BLOCKED_BODY.search(body))
+
+
+def cookie_header(cookies: Dict[str, str]) -> str:
+    return '; '.join(f"{name}={value}" for name, value in cookies.items())
+
+
+class SessionWarmer:
+    def __init__(self, path: Optional[str] = DEFAULT_SESSION_PATH, ttl: float = DEFAULT_SESSION_TTL):
+        """
+        Warms a store session once and reuses its cookies until they expire.
+
+        Some stores (Amazon) only serve search pages to a client that has
+        visited the homepage first. Instead of paying that extra request on
+        every search, the cookies set by one warm-up are kept per (store,
+        User-Agent) in memory and in a SQLite file, and reused by every
+        search, across restarts, until the earliest cookie expiry (or ttl for
+        session cookies). A session is only warmed again when it expires or
+        a response shows it was rejected (invalidate()).
+
+        Args:
+            path: SQLite file the sessions are kept in (None keeps them in memory only)
+            ttl: Seconds a session lives when none of its cookies has an expiry
+        """
+        self.path = path
+        self.ttl = ttl
+        self._sessions: Dict[Tuple[str, str], Tuple[Dict[str, str], float]] = {}
+        self._locks: Dict[Tuple[str, str], Lock] = {}
+        self._lock = Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+        self._conn = None
+        if path:
+            if path != ':memory:' and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(_SCHEMA)
+            self._conn.execute('DELETE FROM sessions WHERE expires_at < ?', (time.time(),))
+            self._conn.commit()
+
+    def _counters(self, store: str) -> Dict[str, Any]:
+        counters = self._stats.get(store)
+        if counters is None:
+            counters = self._stats[store] = {
+                'warmups': 0, 'failed_warmups': 0, 'warm_time': 0.0, 'reuses': 0, 'loaded': 0, 'invalidations': 0
+            }
+        return counters
+
+    def _load(self, key: Tuple[str, str]) -> Optional[Tuple[Dict[str, str], float]]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT cookies, expires_at FROM sessions WHERE store = ? AND user_agent = ?', key
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _save(self, key: Tuple[str, str], cookies: Dict[str, str], expires_at: float):
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)',
+                key + (json.dumps(cookies), time.time(), expires_at)
+            )
+            self._conn.commit()
+
+    def cookies(self,
+                store: str,
+                user_agent: str,
+                warm: Callable[[], Optional[Tuple[Dict[str, str], Optional[float]]]]) -> Dict[str, str]:
+        """
+        Cookies of a live session for the store, warming one if needed.
+
+        Concurrent callers for the same store wait for a single warm-up.
+
+        Args:
+            store: Store the session belongs to
+            user_agent: User-Agent the session was (or will be) established with
+            warm: Performs the warm-up; returns (cookies, earliest cookie expiry or None), or None on failure
+
+        Returns:
+            Cookie name -> value (empty when warming failed)
+        """
+        key = (store, user_agent or '')
+        with self._lock:
+            lock = self._locks.setdefault(key, Lock())
+        with lock:
+            now = time.time()
+            with self._lock:
+                counters = self._counters(store)
+                session = self._sessions.get(key)
+                if session is not None and session[1] > now:
+                    counters['reuses'] += 1
+                    return session[0]
+
+            session = self._load(key)
+            if session is not None and session[1] > now:
+                with self._lock:
+                    self._sessions[key] = session
+                    counters['loaded'] += 1
+                    counters['reuses'] += 1
+                return session[0]
+
+            start = time.monotonic()
+            try:
+                warmed = warm()
+            except Exception as e:
+                logger.error(f"Warming a session for {store} failed: {str(e)}")
+                warmed = None
+            elapsed = time.monotonic() - start
+            with self._lock:
+                counters['warm_time'] += elapsed
+                if warmed is None:
+                    counters['failed_warmups'] += 1
+                    return {}
+                counters['warmups'] += 1
+
+            cookies, expires_at = warmed
+            expires_at = min(expires_at, now + self.ttl) if expires_at else now + self.ttl
+            with self._lock:
+                self._sessions[key] = (cookies, expires_at)
+            self._save(key, cookies, expires_at)
+            logger.info(f"Warmed a session for {store} in {elapsed:.2f}s ({len(cookies)} cookies)")
+            return cookies
+
+    def invalidate(self, store: str, user_agent: str):
+        """Drop a session that a store rejected, so the next search warms a new one."""
+        key = (store, user_agent or '')
+        with self._lock:
+            self._sessions.pop(key, None)
+            self._counters(store)['invalidations'] += 1
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM sessions WHERE store = ? AND user_agent = ?', key)
+                self._conn.commit()
+        logger.info(f"Session for {store} was rejected; it will be warmed again")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Warm-up cost and reuse counters per store."""
+        with self._lock:
+            return {
+                store: dict(counters, warm_time=round(counters['warm_time'], 3))
+                for store, counters in self._stats.items()
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_shared_warmer: Optional[SessionWarmer] = None
+_shared_lock = Lock()
+
+
+def get_session_warmer() -> SessionWarmer:
+    """Return the process-wide session warmer (sessions kept in cache/sessions.sqlite3)."""
+    global _shared_warmer
+    with _shared_lock:
+        if _shared_warmer is None:
+            _shared_warmer = SessionWarmer()
+        return _shared_warmer
@@ -0,0 +1,123 @@
+import logging
+import math
+from collections import Counter
+from itertools import chain
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+try:
+    from rapidfuzz import fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'rapidfuzz' if RAPIDFUZZ_AVAILABLE else 'tfidf'
+BACKENDS = ('tfidf', 'rapidfuzz', 'difflib')
+
+# Trademark signs glue words together ("PlayStation®5")
+_SYMBOLS = str.maketrans({'®': ' ', '™': ' ', '©': ' '})
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, drop trademark signs and collapse whitespace."""
+    return ' '.join(title.lower().translate(_SYMBOLS).split())
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized title, padded so word edges count."""
+    padded = f"  {text} "
+    return frozenset(map(''.join, zip(padded, padded[1:], padded[2:])))
+
+
+class TitleMatcher:
+    def __init__(self, titles: Sequence[str], backend: Optional[str] = None):
+        """
+        Scores one query against a fixed list of candidate titles at once.
+
+        The 'tfidf' backend turns every title into a set of character
+        trigrams weighted by their inverse document frequency over the
+        titles, precomputed when the matcher is built. A query is scored
+        against all titles as a sparse dot product: each title costs one set
+        intersection and a sum over the shared trigrams, both in C, instead
+        of a Python SequenceMatcher run. Scores are cosine similarities in
+        [0, 1]. Trigrams that every title shares (the brand on a search
+        page) weigh least, so the distinguishing words decide the ranking.
+
+        'rapidfuzz' scores with the C-accelerated fuzz.ratio, the same
+        measure as difflib's ratio(). 'difflib' is the pairwise
+        SequenceMatcher reference. Identical titles, common on result pages,
+        are scored once with every backend.
+
+        Args:
+            titles: Candidate titles; results refer to them by index
+            backend: 'tfidf', 'rapidfuzz' or 'difflib' (default: rapidfuzz when installed)
+        """
+        backend = backend or DEFAULT_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown matching backend: {backend}")
+        if backend == 'rapidfuzz' and not RAPIDFUZZ_AVAILABLE:
+            logger.warning("rapidfuzz not installed, falling back to TF-IDF matching")
+            backend = 'tfidf'
+        self.backend = backend
+
+        # Title index -> slot of its distinct normalized text
+        slots: Dict[str, int] = {}
+        self._slots = [slots.setdefault(normalize_title(title), len(slots)) for title in titles]
+        self._unique = list(slots)
+        if backend == 'tfidf':
+            self._build_index()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _build_index(self):
+        self._grams = [trigrams(title) for title in self._unique]
+        document_frequency = Counter(chain.from_iterable(self._grams))
+
+        # Smoothed IDF (squared, as every dot product term is idf * idf)
+        n = len(self._grams)
+        self._idf2 = {gram: (math.log((1 + n) / (1 + df)) + 1) ** 2 for gram, df in document_frequency.items()}
+        self._unseen_idf2 = (math.log(1 + n) + 1) ** 2
+        weight = self._idf2.__getitem__
+        self._norms = [math.sqrt(sum(map(weight, grams))) or 1.0 for grams in self._grams]
+
+    def _unique_scores(self, query: str) -> List[float]:
+        query = normalize_title(query)
+        if self.backend == 'tfidf':
+            grams = trigrams(query)
+            query_norm = math.sqrt(sum(self._idf2.get(gram, self._unseen_idf2) for gram in grams)) or 1.0
+            weight = self._idf2.__getitem__
+            # Rounding can push a perfect match a hair over 1
+            return [
+                min(1.0, sum(map(weight, grams & title_grams)) / (query_norm * norm))
+                for title_grams, norm in zip(self._grams, self._norms)
+            ]
+        if self.backend == 'rapidfuzz':
+            return [fuzz.ratio(query, title) / 100 for title in self._unique]
+        return [SequenceMatcher(None, query, title).ratio() for title in self._unique]
+
+    def scores(self, query: str) -> List[float]:
+        """Similarity of the query to every title, in title order."""
+        if not self._slots:
+            return []
+        unique = self._unique_scores(query)
+        return [unique[slot] for slot in self._slots]
+
+    def top_k(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Best matching titles for a query.
+
+        Returns:
+            Up to k (title index, score) pairs, best first; ties keep title order
+        """
+        ranked = sorted(enumerate(self.scores(query)), key=lambda item: item[1], reverse=True)
+        return [(index, score) for index, score in ranked[:k] if score >= min_score]
+
+
+def match_scores(query: str, titles: Sequence[str], backend: Optional[str] = None) -> List[float]:
+    """Score a query against a batch of titles (builds a throwaway TitleMatcher)."""
+    return TitleMatcher(titles, backend=backend).scores(query)
@@ -0,0 +1,95 @@
+import logging
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_MS = 50  # How often pending updates are applied (at most 20 redraws a second)
+
+
+class UiUpdateQueue:
+    def __init__(self,
+                 schedule: Callable[[int, Callable[[], None]], Any],
+                 interval_ms: int = DEFAULT_INTERVAL_MS,
+                 on_flush: Optional[Callable[[], None]] = None):
+        """
+        Thread-safe queue of UI updates, applied in batches on the UI thread.
+
+        Worker threads post() updates instead of touching widgets; a tick
+        scheduled with schedule (Tk's root.after) applies everything posted
+        since the last tick, in order, and then calls on_flush once, so a
+        burst of results costs one redraw. Updates posted with the same key
+        replace each other while pending (only the latest status text of a
+        label is worth drawing).
+
+        Args:
+            schedule: schedule(ms, callback), e.g. root.after
+            interval_ms: Milliseconds between ticks
+            on_flush: Called after each tick that applied at least one update
+        """
+        self.schedule = schedule
+        self.interval_ms = interval_ms
+        self.on_flush = on_flush
+
+        self._pending: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._sequence = count()
+        self._lock = Lock()
+        self._running = False
+        self._counts = {'posted': 0, 'coalesced': 0, 'applied': 0, 'flushes': 0}
+
+    def post(self, callback: Callable[..., Any], *args, key: Optional[Hashable] = None):
+        """Queue callback(*args) for the UI thread; with a key, it replaces a pending update with that key."""
+        with self._lock:
+            self._counts['posted'] += 1
+            if key is None:
+                key = ('_', next(self._sequence))
+            elif key in self._pending:
+                self._counts['coalesced'] += 1
+                del self._pending[key]
+            self._pending[key] = (callback, args)
+
+    def start(self):
+        """Start ticking; call from the UI thread once the main loop can run."""
+        if not self._running:
+            self._running = True
+            self.schedule(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        try:
+            self.drain()
+        finally:
+            self.schedule(self.interval_ms, self._tick)
+
+    def drain(self) -> int:
+        """Apply every pending update now, on the calling (UI) thread; returns how many ran."""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        if not pending:
+            return 0
+        for callback, args in pending.values():
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"UI update failed: {str(e)}")
+        if self.on_flush is not None:
+            try:
+                self.on_flush()
+            except Exception as e:
+                logger.error(f"UI flush failed: {str(e)}")
+        with self._lock:
+            self._counts['applied'] += len(pending)
+            self._counts['flushes'] += 1
+        return len(pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts, pending=len(self._pending))